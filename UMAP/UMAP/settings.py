@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Try to load environment variables from .env file
 try:
@@ -112,6 +113,36 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'default' holds the building snapshot and other precomputed API payloads
+# in process memory; the version keys that invalidate them live in 'shared'.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'umap-default',
+    },
+    # Small version counters that must be seen by every process on the host,
+    # including the run_jobs worker, so its writes invalidate the web caches.
+    # start.sh runs the worker in the web container for this reason.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('UMAP_SHARED_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'umap-shared-cache')),
+        # Every set() lists this directory to decide whether to cull, so only
+        # version counters that change on writes belong here (schedule, feed,
+        # saved room, recent place and session versions: about six files per
+        # user); anything written per request lives in 'default'. Culling at
+        # the default 300 entries would evict live version keys, so size this
+        # well above the user base and trim only a tenth at a time.
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('UMAP_SHARED_CACHE_MAX_ENTRIES', 60000)),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,117 @@
+"""
+Buffered UserActivity writer
+Views hand activity records to an in-process buffer instead of inserting
+them on the request path. A background thread writes them with bulk_create
+once BATCH_SIZE records are waiting or every FLUSH_INTERVAL seconds, and
+flush() writes everything immediately (registered at process exit).
+Room and floor views are passed on to the users' recent places once written.
+"""
+import atexit
+import os
+import threading
+from collections import deque
+
+from django.db import DatabaseError, close_old_connections
+
+from .models import UserActivity
+
+
+BATCH_SIZE = 100  # Wake the writer as soon as this many records are waiting
+FLUSH_INTERVAL = 2.0  # Seconds between writes while records trickle in
+MAX_PENDING = 10000  # Ring buffer size; the oldest records are dropped if the database stays unreachable
+
+
+class ActivityBuffer:
+    """Process-local queue of unsaved UserActivity records"""
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer = None
+        self._writer_pid = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, activity: UserActivity):
+        """Queue an activity record for the next write"""
+        with self._lock:
+            self._pending.append(activity)
+            pending = len(self._pending)
+        self._ensure_writer()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write every queued record now and return how many were saved"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            try:
+                UserActivity.objects.bulk_create(batch, batch_size=self.batch_size)
+                saved = batch
+            except DatabaseError as e:
+                # One bad record (e.g. its user was deleted meanwhile) shouldn't lose the batch
+                print(f"[Activity] Bulk write of {len(batch)} records failed ({e}), saving one by one")
+                saved = []
+                for activity in batch:
+                    try:
+                        activity.save()
+                        saved.append(activity)
+                    except DatabaseError as row_error:
+                        print(f"[Activity] Dropped {activity.activity_type} record for user {activity.user_id}: {row_error}")
+
+            self._remember_places(saved)
+            return len(saved)
+
+    def _remember_places(self, activities):
+        """Let recent places pick up the written room and floor views"""
+        from .recent_places import places_viewed
+
+        try:
+            places_viewed(activities)
+        except Exception as e:
+            print(f"[Activity] Could not update recent places: {e}")
+
+    def _ensure_writer(self):
+        """Start the writer thread in this process (again, after a fork)"""
+        if self._writer is not None and self._writer_pid == os.getpid() and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is not None and self._writer_pid == os.getpid() and self._writer.is_alive():
+                return
+            self._writer_pid = os.getpid()
+            self._writer = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Activity] Writer error: {e}")
+
+
+activity_buffer = ActivityBuffer()
+atexit.register(activity_buffer.flush)
+
+
+def record_activity(user, activity_type, details=None, ip_address=None):
+    """Queue a UserActivity record; it is written within FLUSH_INTERVAL seconds"""
+    activity_buffer.add(UserActivity(
+        user=user,
+        activity_type=activity_type,
+        details=details or {},
+        ip_address=ip_address
+    ))
@@ -0,0 +1,88 @@
+"""
+Unified admin activity feed over UserActivity, Feedback and SavedLocation
+Each page takes at most page_size + 1 rows from every table with a keyset
+(timestamp, id) cursor and merges them, so the cost of a page doesn't depend
+on how much history has accumulated.
+"""
+import base64
+import heapq
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Q
+
+from .models import Feedback, SavedLocation, UserActivity
+
+
+FEED_PAGE_SIZE = 10
+
+# (entry type, model, timestamp field, related rows the feed template shows);
+# the position in this list breaks ties between rows with the same timestamp
+FEED_SOURCES = [
+    ('activity', UserActivity, 'timestamp', ('user',)),
+    ('feedback', Feedback, 'creation_date', ('user', 'room__profile', 'room__floor')),
+    ('saved_location', SavedLocation, 'saved_date', ('user', 'room__profile', 'room__floor')),
+]
+
+
+def encode_cursor(key: Tuple[datetime, int, int]) -> str:
+    """Encode a feed position (timestamp, source index, id) as an opaque URL-safe string"""
+    timestamp, source_index, item_id = key
+    raw = json.dumps([timestamp.isoformat(), source_index, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, int]:
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, source_index, item_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(source_index), int(item_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid feed cursor: {cursor}") from e
+
+
+def _older_than(source_index: int, timestamp_field: str, cursor: Tuple[datetime, int, int]) -> Q:
+    """Filter one source to the rows that come after the cursor in feed order
+
+    The feed is ordered by (timestamp, source index, id), newest first.
+    """
+    cursor_time, cursor_source, cursor_id = cursor
+    if source_index < cursor_source:
+        return Q(**{f'{timestamp_field}__lte': cursor_time})
+    if source_index > cursor_source:
+        return Q(**{f'{timestamp_field}__lt': cursor_time})
+    return Q(**{f'{timestamp_field}__lt': cursor_time}) | Q(**{timestamp_field: cursor_time, 'id__lt': cursor_id})
+
+
+def get_feed_page(cursor: Optional[str] = None, page_size: int = FEED_PAGE_SIZE) -> Dict:
+    """Get one page of the feed, newest first, starting after the cursor
+
+    Returns a dict with 'entries' (dicts with type, item, timestamp, user)
+    and 'next_cursor', which is None on the last page.
+    """
+    position = decode_cursor(cursor) if cursor else None
+
+    streams = []
+    for source_index, (entry_type, model, timestamp_field, related) in enumerate(FEED_SOURCES):
+        rows = model.objects.select_related(*related)
+        if position is not None:
+            rows = rows.filter(_older_than(source_index, timestamp_field, position))
+        rows = rows.order_by(f'-{timestamp_field}', '-id')[:page_size + 1]
+        streams.append([
+            ((getattr(row, timestamp_field), source_index, row.id), entry_type, row)
+            for row in rows
+        ])
+
+    merged = list(heapq.merge(*streams, key=lambda entry: entry[0], reverse=True))
+    page = merged[:page_size]
+
+    entries: List[Dict] = [
+        {'type': entry_type, 'item': row, 'timestamp': key[0], 'user': row.user}
+        for key, entry_type, row in page
+    ]
+    return {
+        'entries': entries,
+        'next_cursor': encode_cursor(page[-1][0]) if len(merged) > page_size else None,
+    }
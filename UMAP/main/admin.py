@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import User, Admin, Profile, Floor, Room, RoomProfile, Schedule, Feedback, SavedLocation, UserActivity, UserSession
+from .models import (
+    User, Admin, Profile, Floor, Room, RoomProfile, Schedule, Feedback, SavedLocation, UserActivity, UserSession, BackgroundJob, ParsedSchedulePDF, CalendarFeedToken,
+    ActivityRollup, UserActivityRollup, RoomStats, ScheduleLoadRollup, RollupCheckpoint, RoomRatingSummary
+)
 
 
 # ---- USER ADMIN ----
@@ -164,3 +167,71 @@ class UserSessionAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'ip_address', 'device_info')
     ordering = ('-login_time',)
     readonly_fields = ('login_time', 'last_activity')
+
+
+# ---- BACKGROUND JOB ADMIN ----
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'job_type', 'status', 'created_by', 'created_at', 'finished_at', 'attempts')
+    list_filter = ('job_type', 'status')
+    search_fields = ('created_by__username', 'error')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'attempts', 'progress', 'result', 'error')
+
+
+# ---- PARSED SCHEDULE PDF ADMIN ----
+@admin.register(ParsedSchedulePDF)
+class ParsedSchedulePDFAdmin(admin.ModelAdmin):
+    list_display = ('id', 'content_hash', 'parser_version', 'hit_count', 'created_at', 'last_used_at')
+    list_filter = ('parser_version',)
+    search_fields = ('content_hash',)
+    ordering = ('-last_used_at',)
+    readonly_fields = ('content_hash', 'parser_version', 'rows', 'created_at', 'last_used_at', 'hit_count')
+
+
+# ---- CALENDAR FEED TOKEN ADMIN ----
+@admin.register(CalendarFeedToken)
+class CalendarFeedTokenAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'created_at')
+    search_fields = ('user__username',)
+    ordering = ('-created_at',)
+    readonly_fields = ('token', 'created_at')
+
+
+# ---- STATISTICS ROLLUP ADMIN ----
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ('hour', 'activity_type', 'count')
+    list_filter = ('activity_type',)
+    ordering = ('-hour',)
+
+
+@admin.register(UserActivityRollup)
+class UserActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ('hour', 'user', 'count')
+    search_fields = ('user__username',)
+    ordering = ('-hour',)
+
+
+@admin.register(RoomStats)
+class RoomStatsAdmin(admin.ModelAdmin):
+    list_display = ('room', 'rating_count', 'comment_count', 'save_count', 'schedule_count', 'updated_at')
+    ordering = ('-schedule_count',)
+
+
+@admin.register(ScheduleLoadRollup)
+class ScheduleLoadRollupAdmin(admin.ModelAdmin):
+    list_display = ('building', 'day', 'start_hour', 'count')
+    list_filter = ('building', 'day')
+
+
+@admin.register(RollupCheckpoint)
+class RollupCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_id', 'updated_at')
+
+
+# ---- ROOM RATING SUMMARY ADMIN ----
+@admin.register(RoomRatingSummary)
+class RoomRatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ('room', 'rating_count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    ordering = ('-rating_count',)
@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.db.models import Count, F
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
 from django.db import models
 from .models import Schedule, Profile, User
 from datetime import datetime, timedelta
@@ -35,29 +35,23 @@ def admin_schedules_dashboard(request):
         # Get all distinct subjects
         total_subjects_count = Schedule.objects.values('subject').distinct().count()
         
-        # Get users with schedules - don't filter yet
-        users_with_schedules = User.objects.filter(schedules__isnull=False).distinct()
-        active_users_count = users_with_schedules.count()
-        
+        # Count, weekly hours and sort order are all computed by the database,
+        # so only the users on the requested page are ever loaded
+        users_with_schedules = User.objects.filter(schedules__isnull=False).annotate(
+            schedule_count=Count('schedules'),
+            total_duration=Sum(ExpressionWrapper(
+                F('schedules__end') - F('schedules__start'), output_field=DurationField()
+            ))
+        ).order_by('-schedule_count', 'id')
+
+        # Setup pagination
+        page = request.GET.get('page', 1)
+        paginator = Paginator(users_with_schedules, 10)  # 10 users per page
+        active_users_count = paginator.count
+
         print(f"DEBUG: Total schedules: {total_schedules_count}")
         print(f"DEBUG: Total subjects: {total_subjects_count}")
         print(f"DEBUG: Users with schedules: {active_users_count}")
-        
-        # Build user stats manually
-        user_list = []
-        for user in users_with_schedules:
-            schedules = user.schedules.all()
-            user.schedule_count = schedules.count()
-            user.total_hours = calculate_weekly_hours(schedules)
-            user.subjects = list(set(schedules.values_list('subject', flat=True)))
-            user_list.append(user)
-        
-        # Sort by schedule count
-        user_list.sort(key=lambda x: x.schedule_count, reverse=True)
-        
-        # Setup pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(user_list, 10)  # 10 users per page
 
         try:
             user_schedules = paginator.page(page)
@@ -66,6 +60,19 @@ def admin_schedules_dashboard(request):
         except EmptyPage:
             user_schedules = paginator.page(paginator.num_pages)
 
+        # Distinct subjects for the users on this page, in a single query
+        page_users = list(user_schedules)
+        subjects_by_user = {user.id: [] for user in page_users}
+        subject_rows = Schedule.objects.filter(user_id__in=subjects_by_user).values_list(
+            'user_id', 'subject'
+        ).distinct().order_by('user_id', 'subject')
+        for user_id, subject in subject_rows:
+            subjects_by_user[user_id].append(subject)
+
+        for user in page_users:
+            user.total_hours = round(user.total_duration.total_seconds() / 3600, 1) if user.total_duration else 0
+            user.subjects = subjects_by_user[user.id]
+
         context = {
             'user_schedules': user_schedules,
             'total_schedules': total_schedules_count,
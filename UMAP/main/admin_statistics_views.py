@@ -1,132 +1,121 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count, Avg, Q, F
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour
 from django.utils import timezone
 from datetime import timedelta
 from .models import (
-    User, Schedule, Feedback, Room, Floor, UserActivity, 
-    RoomProfile, Profile, SavedLocation
+    User, Feedback, Room, Floor, RoomProfile, Profile,
+    ActivityRollup, UserActivityRollup, RoomStats, ScheduleLoadRollup
 )
+from .rating_analytics import get_rating_analytics
+from .statistics_rollup import get_rollups_updated_at, request_refresh
 
 
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
 
+def _room_name(room):
+    profile = getattr(room, 'profile', None)
+    return profile.name if profile else f'Room {room.id}'
+
+
+def _room_number(room):
+    profile = getattr(room, 'profile', None)
+    return profile.number if profile else 'N/A'
+
+
 @login_required
 @user_passes_test(is_admin)
 def admin_statistics(request):
-    """Comprehensive statistics dashboard for admins"""
+    """Comprehensive statistics dashboard for admins, read from the statistics rollups"""
     
     try:
         context = {}
         
+        # Statistics below come from the rollup tables kept by statistics_rollup;
+        # queue a refresh for the worker if they are getting old
+        rollups_updated_at = get_rollups_updated_at()
+        context['rollups_updated_at'] = rollups_updated_at
+        context['rollup_refreshing'] = request_refresh(rollups_updated_at, user=request.user)
+
+        room_stats = RoomStats.objects.select_related('room__profile', 'room__floor')
+
         # ============ RATINGS OVERVIEW ============
         # Top 5 highest rated rooms
-        top_rated_rooms = Room.objects.annotate(
-            avg_rating=Avg('feedbacks__rating'),
-            rating_count=Count('feedbacks')
-        ).filter(
-            rating_count__gt=0
-        ).order_by('-avg_rating')[:5]
-        
+        top_rated_rooms = room_stats.filter(rating_count__gt=0).annotate(
+            avg_rating=ExpressionWrapper(F('rating_sum') * 1.0 / F('rating_count'), output_field=FloatField())
+        ).order_by('-avg_rating', 'room_id')[:5]
+
         context['top_rated_rooms'] = [
             {
-                'name': room.profile.name if room.profile else f'Room {room.id}',
-                'number': room.profile.number if room.profile else 'N/A',
-                'rating': round(room.avg_rating, 1) if room.avg_rating else 0,
-                'count': room.rating_count
+                'name': _room_name(stats.room),
+                'number': _room_number(stats.room),
+                'rating': round(stats.avg_rating, 1),
+                'count': stats.rating_count
             }
-            for room in top_rated_rooms
+            for stats in top_rated_rooms
         ]
-        
+
         # Rooms with most comments
-        most_commented_rooms = Room.objects.annotate(
-            comment_count=Count('feedbacks', filter=Q(feedbacks__comment__isnull=False))
-        ).filter(
-            comment_count__gt=0
-        ).order_by('-comment_count')[:5]
-        
+        most_commented_rooms = room_stats.filter(comment_count__gt=0).order_by('-comment_count', 'room_id')[:5]
+
         context['most_commented_rooms'] = [
             {
-                'name': room.profile.name if room.profile else f'Room {room.id}',
-                'number': room.profile.number if room.profile else 'N/A',
-                'comments': room.comment_count
+                'name': _room_name(stats.room),
+                'number': _room_number(stats.room),
+                'comments': stats.comment_count
             }
-            for room in most_commented_rooms
+            for stats in most_commented_rooms
         ]
-        
+
         # Most saved rooms
-        most_saved_rooms = Room.objects.annotate(
-            save_count=Count('saved_by_users')
-        ).filter(
-            save_count__gt=0
-        ).order_by('-save_count')[:5]
-        
+        most_saved_rooms = room_stats.filter(save_count__gt=0).order_by('-save_count', 'room_id')[:5]
+
         context['most_saved_rooms'] = [
             {
-                'name': room.profile.name if room.profile else f'Room {room.id}',
-                'number': room.profile.number if room.profile else 'N/A',
-                'saves': room.save_count,
-                'building': room.floor.building if room.floor else 'N/A'
+                'name': _room_name(stats.room),
+                'number': _room_number(stats.room),
+                'saves': stats.save_count,
+                'building': stats.room.floor.building if stats.room.floor else 'N/A'
             }
-            for room in most_saved_rooms
+            for stats in most_saved_rooms
         ]
-        
-        # Average building rating
-        building_ratings = {}
-        for feedback in Feedback.objects.select_related('room__floor'):
-            building = feedback.room.floor.building
-            if building not in building_ratings:
-                building_ratings[building] = {'ratings': [], 'count': 0}
-            building_ratings[building]['ratings'].append(feedback.rating)
-            building_ratings[building]['count'] += 1
-        
+
+        # Average building and floor ratings, from the shared rating analytics
+        rating_analytics = get_rating_analytics()['data']
         context['building_ratings'] = [
             {
-                'name': building,
-                'rating': round(sum(data['ratings']) / len(data['ratings']), 1),
-                'count': data['count']
+                'name': building['name'],
+                'rating': round(building['average'], 1),
+                'count': building['count']
             }
-            for building, data in sorted(building_ratings.items(), 
-                                        key=lambda x: sum(x[1]['ratings']) / len(x[1]['ratings']) 
-                                        if x[1]['ratings'] else 0, reverse=True)
+            for building in rating_analytics['buildings']
         ]
-        
-        # Average floor rating
-        floor_ratings = {}
-        for feedback in Feedback.objects.select_related('room__floor'):
-            if feedback.room.floor:
-                floor_key = (feedback.room.floor.id, feedback.room.floor.name, feedback.room.floor.building)
-                if floor_key not in floor_ratings:
-                    floor_ratings[floor_key] = {'ratings': [], 'count': 0}
-                floor_ratings[floor_key]['ratings'].append(feedback.rating)
-                floor_ratings[floor_key]['count'] += 1
-        
         context['floor_ratings'] = [
             {
-                'name': floor_key[1],
-                'building': floor_key[2],
-                'rating': round(sum(data['ratings']) / len(data['ratings']), 1),
-                'count': data['count']
+                'name': floor['name'],
+                'building': floor['building'],
+                'rating': round(floor['average'], 1),
+                'count': floor['count']
             }
-            for floor_key, data in sorted(floor_ratings.items(), 
-                                         key=lambda x: sum(x[1]['ratings']) / len(x[1]['ratings']) 
-                                         if x[1]['ratings'] else 0, reverse=True)
+            for floor in rating_analytics['floors']
         ]
-        
+
         # ============ USER ACTIVITY ANALYTICS ============
-        today = timezone.now().date()
-        week_ago = timezone.now() - timedelta(days=7)
-        
-        # Most active users this week (counting all activity types)
-        # If you want to count only logins, add: .filter(activity_type='login')
-        most_active_users_qs = UserActivity.objects.filter(
-            timestamp__gte=week_ago
+        now = timezone.now()
+        today = now.date()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_ago = now - timedelta(days=7)
+
+        # Most active users this week (counting all activity types), to the hour
+        most_active_users_qs = UserActivityRollup.objects.filter(
+            hour__gte=week_ago.replace(minute=0, second=0, microsecond=0)
         ).values('user__username', 'user__first_name', 'user__last_name').annotate(
-            activity_count=Count('id')
+            activity_count=Sum('count')
         ).order_by('-activity_count')[:5]
-        
+
         context['most_active_users'] = [
             {
                 'username': user['user__username'],
@@ -136,13 +125,13 @@ def admin_statistics(request):
             }
             for user in most_active_users_qs
         ]
-        
+
         # Total ratings submitted today
         ratings_today = Feedback.objects.filter(
-            creation_date__date=today
+            creation_date__gte=today_start
         ).count()
         context['ratings_today'] = ratings_today
-        
+
         # Recent comments (last 10)
         recent_comments = Feedback.objects.filter(
             comment__isnull=False
@@ -162,43 +151,43 @@ def admin_statistics(request):
             for comment in recent_comments
         ]
         
-        # Peak usage hours (from UserActivity)
-        hour_activity = {}
-        for activity in UserActivity.objects.all():
-            hour = activity.timestamp.hour
-            hour_activity[hour] = hour_activity.get(hour, 0) + 1
-        
-        peak_hours = sorted(hour_activity.items(), key=lambda x: x[1], reverse=True)[:5]
+        # Peak usage hours (from the hourly activity rollups)
+        hour_activity = dict(
+            ActivityRollup.objects.annotate(hour_of_day=ExtractHour('hour')).values('hour_of_day').annotate(
+                total=Sum('count')
+            ).values_list('hour_of_day', 'total')
+        )
+        total_activity = sum(hour_activity.values())
+
+        peak_hours = sorted(hour_activity.items(), key=lambda x: (-x[1], x[0]))[:5]
         context['peak_hours'] = [
             {
                 'hour': f'{hour:02d}:00',
                 'count': count,
-                'percentage': round((count / sum(hour_activity.values()) * 100), 1) if hour_activity else 0
+                'percentage': round((count / total_activity * 100), 1) if total_activity else 0
             }
             for hour, count in peak_hours
         ]
-        
+
         # ============ ROOM USAGE HEATMAP ============
         # Rooms with most views
-        most_viewed_rooms = Room.objects.annotate(
-            view_count=Count('schedules')
-        ).order_by('-view_count')[:5]
-        
+        most_viewed_rooms = room_stats.order_by('-schedule_count', 'room_id')[:5]
+
         context['most_viewed_rooms'] = [
             {
-                'name': room.profile.name if room.profile else f'Room {room.id}',
-                'number': room.profile.number if room.profile else 'N/A',
-                'views': room.view_count
+                'name': _room_name(stats.room),
+                'number': _room_number(stats.room),
+                'views': stats.schedule_count
             }
-            for room in most_viewed_rooms
+            for stats in most_viewed_rooms
         ]
-        
+
         # Floors with heavy traffic
         floor_traffic = Floor.objects.annotate(
             room_count=Count('rooms'),
-            schedule_count=Count('rooms__schedules')
-        ).order_by('-schedule_count')
-        
+            schedule_count=Coalesce(Sum('rooms__stats__schedule_count'), 0)
+        ).order_by('-schedule_count', 'id')
+
         context['floor_traffic'] = [
             {
                 'name': floor.name,
@@ -208,47 +197,39 @@ def admin_statistics(request):
             }
             for floor in floor_traffic[:5]
         ]
-        
+
         # Underused rooms (rooms with 0 schedules)
-        underused_rooms = Room.objects.annotate(
-            schedule_count=Count('schedules')
-        ).filter(
-            schedule_count=0
-        )[:10]
-        
+        underused_rooms = room_stats.filter(schedule_count=0).order_by('room_id')[:10]
+
         context['underused_rooms'] = [
             {
-                'name': room.profile.name if room.profile else f'Room {room.id}',
-                'number': room.profile.number if room.profile else 'N/A',
-                'building': room.floor.building
+                'name': _room_name(stats.room),
+                'number': _room_number(stats.room),
+                'building': stats.room.floor.building
             }
-            for room in underused_rooms
+            for stats in underused_rooms
         ]
-        
+
         # ============ SCHEDULE INSIGHTS ============
         # Classes per building
-        classes_per_building = {}
-        for schedule in Schedule.objects.select_related('room__floor'):
-            building = schedule.room.floor.building
-            classes_per_building[building] = classes_per_building.get(building, 0) + 1
-        
-        context['classes_per_building'] = [
-            {'building': building, 'count': count}
-            for building, count in sorted(classes_per_building.items(), 
-                                         key=lambda x: x[1], reverse=True)
-        ]
-        
+        classes_per_building = ScheduleLoadRollup.objects.values('building').annotate(
+            count=Sum('count')
+        ).order_by('-count', 'building')
+        context['classes_per_building'] = list(classes_per_building)
+
         # Most occupied day
-        day_counts = Schedule.objects.values('day').annotate(count=Count('id')).order_by('-count')
-        context['most_occupied_day'] = day_counts.first() if day_counts.exists() else None
-        
+        context['most_occupied_day'] = ScheduleLoadRollup.objects.values('day').annotate(
+            count=Sum('count')
+        ).order_by('-count', 'day').first()
+
         # Most common class time range
-        time_ranges = {}
-        for schedule in Schedule.objects.all():
-            hour = schedule.start.hour
-            period = f'{hour:02d}:00 - {hour+1:02d}:00'
-            time_ranges[period] = time_ranges.get(period, 0) + 1
-        
+        time_ranges = {
+            f'{hour:02d}:00 - {hour+1:02d}:00': count
+            for hour, count in ScheduleLoadRollup.objects.values('start_hour').annotate(
+                count=Sum('count')
+            ).order_by('start_hour').values_list('start_hour', 'count')
+        }
+
         # Convert to 12-hour format
         def convert_to_12hour(time_str):
             parts = time_str.split(' - ')
@@ -300,33 +281,35 @@ def admin_statistics(request):
         context['rooms_missing_description'] = rooms_missing_description
         
         # ============ SYSTEM HEALTH PANEL ============
+        activity_totals = dict(
+            ActivityRollup.objects.values('activity_type').annotate(total=Sum('count')).values_list('activity_type', 'total')
+        )
+
         # Failed login attempts (attempting to track from UserActivity)
-        failed_logins = UserActivity.objects.filter(
-            activity_type__in=['login_failed']
-        ).count()
-        context['failed_logins'] = failed_logins
-        
+        context['failed_logins'] = activity_totals.get('login_failed', 0)
+
         # Successful logins today
-        logins_today = UserActivity.objects.filter(
-            activity_type='login',
-            timestamp__date=today
-        ).count()
-        context['logins_today'] = logins_today
-        
+        context['logins_today'] = ActivityRollup.objects.filter(
+            activity_type='login', hour__gte=today_start
+        ).aggregate(total=Coalesce(Sum('count'), 0))['total']
+
         # New users today
         new_users_today = User.objects.filter(
             date_joined__date=today
         ).count()
         context['new_users_today'] = new_users_today
-        
+
         # Overall system stats
+        room_totals = RoomStats.objects.aggregate(
+            schedules=Coalesce(Sum('schedule_count'), 0), ratings=Coalesce(Sum('rating_count'), 0)
+        )
         context['total_users'] = User.objects.count()
         context['total_rooms'] = Room.objects.count()
         context['total_floors'] = Floor.objects.count()
-        context['total_schedules'] = Schedule.objects.count()
-        context['total_ratings'] = Feedback.objects.count()
-        context['total_activities'] = UserActivity.objects.count()
-        
+        context['total_schedules'] = room_totals['schedules']
+        context['total_ratings'] = room_totals['ratings']
+        context['total_activities'] = sum(activity_totals.values())
+
         return render(request, 'UMAP_App/Admin/Admin_Statistics.html', context)
         
     except Exception as e:
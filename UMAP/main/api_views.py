@@ -1,55 +1,31 @@
+import json
+
+from django.db import IntegrityError
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
-from .models import Floor, Room, RoomProfile, SavedLocation, UserActivity
-from .views import extract_floor_number
+from .models import BackgroundJob, Room, RoomProfile, SavedLocation, UserActivity
+from .activity_buffer import record_activity
+from .ar_payload import get_ar_payload, get_ar_delta
+from .building_snapshot import get_building_snapshot
+from .rating_analytics import get_rating_analytics
+from .recent_places import get_recent_places
+from .room_batch import get_room_batch, parse_includes, parse_room_ids
+from .room_detail import build_room_detail, get_room, parse_fields
+from .saved_rooms import encode_bitmap, get_saved_room_ids
+from .http_cache import conditional_response, make_etag
 
 
+@require_http_methods(["GET"])
 def get_building_data(request):
-    """API endpoint to get building data for the interactive SVG map"""
+    """API endpoint to get building data for the interactive SVG map
+
+    Served from the cached building snapshot; clients sending a matching
+    If-None-Match header get a 304 instead of the full JSON.
+    """
     try:
-        # Get unique buildings and their floors, sorted by floor number
-        buildings_data = {}
-        floors = sorted(Floor.objects.all(), key=lambda f: (f.building, extract_floor_number(f.name)))
-        
-        for floor in floors:
-            if floor.building not in buildings_data:
-                buildings_data[floor.building] = {
-                    'name': floor.building,
-                    'floors': [],
-                    'rooms': []
-                }
-            
-            # Add floor info
-            buildings_data[floor.building]['floors'].append({
-                'id': floor.id,
-                'name': floor.name
-            })
-            
-            # Add rooms for this floor
-            rooms = Room.objects.filter(floor=floor).select_related('profile')
-            for room in rooms:
-                try:
-                    if hasattr(room, 'profile') and room.profile:
-                        room_data = {
-                            'id': room.id,
-                            'number': room.profile.number,
-                            'name': room.profile.name,
-                            'type': room.profile.type,
-                            'description': room.profile.description or '',
-                            'coordinates': room.profile.coordinates or {},
-                            'floor': floor.name
-                        }
-                        buildings_data[floor.building]['rooms'].append(room_data)
-                except Exception as room_error:
-                    # Log room parsing errors but continue
-                    print(f"Error processing room {room.id}: {str(room_error)}")
-                    continue
-        
-        return JsonResponse({
-            'status': 'success',
-            'buildings': buildings_data
-        })
+        snapshot = get_building_snapshot()
+        return conditional_response(request, snapshot['content'], snapshot['etag'])
         
     except Exception as e:
         import traceback
@@ -123,13 +99,17 @@ def save_location(request, room_id):
                 'error': 'authentication required'
             }, status=401)
         
-        room = Room.objects.get(id=room_id)
-        
-        # Create or get the saved location
-        saved, created = SavedLocation.objects.get_or_create(
-            user=request.user,
-            room=room
-        )
+        # Create or get the saved location; a missing room fails the foreign key
+        try:
+            saved, created = SavedLocation.objects.get_or_create(
+                user=request.user,
+                room_id=room_id
+            )
+        except IntegrityError:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Room not found'
+            }, status=404)
         
         return JsonResponse({
             'status': 'success',
@@ -138,11 +118,6 @@ def save_location(request, room_id):
             'room_id': room_id
         })
         
-    except Room.DoesNotExist:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Room not found'
-        }, status=404)
     except Exception as e:
         return JsonResponse({
             'status': 'error',
@@ -154,14 +129,19 @@ def save_location(request, room_id):
 def remove_location(request, room_id):
     """API endpoint to remove a saved location for the user"""
     try:
-        room = Room.objects.get(id=room_id)
-        
         # Delete the saved location
         deleted_count, _ = SavedLocation.objects.filter(
             user=request.user,
-            room=room
+            room_id=room_id
         ).delete()
         
+        # Only an unsaved room needs checking for existence
+        if not deleted_count and not Room.objects.filter(id=room_id).exists():
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Room not found'
+            }, status=404)
+        
         return JsonResponse({
             'status': 'success',
             'message': 'Location removed successfully' if deleted_count > 0 else 'Location was not saved',
@@ -169,11 +149,6 @@ def remove_location(request, room_id):
             'room_id': room_id
         })
         
-    except Room.DoesNotExist:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Room not found'
-        }, status=404)
     except Exception as e:
         return JsonResponse({
             'status': 'error',
@@ -183,14 +158,19 @@ def remove_location(request, room_id):
 
 @login_required
 def check_saved_location(request, room_id):
-    """API endpoint to check if a location is saved by the user"""
+    """API endpoint to check if a location is saved by the user
+
+    Answered from the user's cached saved set; only rooms that aren't saved
+    are checked for existence.
+    """
     try:
-        room = Room.objects.get(id=room_id)
+        is_saved = room_id in get_saved_room_ids(request.user.id)
         
-        is_saved = SavedLocation.objects.filter(
-            user=request.user,
-            room=room
-        ).exists()
+        if not is_saved and not Room.objects.filter(id=room_id).exists():
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Room not found'
+            }, status=404)
         
         return JsonResponse({
             'status': 'success',
@@ -198,36 +178,54 @@ def check_saved_location(request, room_id):
             'room_id': room_id
         })
         
-    except Room.DoesNotExist:
+    except Exception as e:
         return JsonResponse({
             'status': 'error',
-            'message': 'Room not found'
-        }, status=404)
+            'message': str(e)
+        }, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def get_saved_rooms(request):
+    """API endpoint for every room the user has saved
+
+    Returns the sorted room ids, or with ?format=bitmap a base64 bitmap over
+    room ids starting at 'offset'. Served with an ETag, so polling an
+    unchanged set returns a 304.
+    """
+    try:
+        room_ids = get_saved_room_ids(request.user.id)
+        if request.GET.get('format') == 'bitmap':
+            payload = {'status': 'success', 'count': len(room_ids), **encode_bitmap(room_ids)}
+        else:
+            payload = {'status': 'success', 'count': len(room_ids), 'room_ids': sorted(room_ids)}
+
+        content = json.dumps(payload).encode('utf-8')
+        return conditional_response(request, content, make_etag(content))
+
     except Exception as e:
+        print(f"Error in get_saved_rooms: {str(e)}")
         return JsonResponse({
             'status': 'error',
             'message': str(e)
         }, status=500)
 
+
 @login_required
 def track_room_view(request, room_id):
-    """Track when a user views a room"""
+    """Track when a user views a room
+
+    The activity record is buffered and written in a batch shortly after,
+    so this endpoint only reads the room.
+    """
     try:
-        print(f"\n=== TRACK_ROOM_VIEW ===")
-        print(f"User: {request.user}")
-        print(f"Room ID: {room_id}")
-        print(f"User authenticated: {request.user.is_authenticated}")
-        
         room = Room.objects.select_related('profile', 'floor').get(id=room_id)
         
-        print(f"Room found: {room}")
-        print(f"Room profile: {room.profile}")
-        print(f"Room floor: {room.floor}")
-        
-        # Create activity log for room view
-        activity = UserActivity.objects.create(
-            user=request.user,
-            activity_type=UserActivity.ActivityType.ROOM_VIEW,
+        # Queue activity log for room view
+        record_activity(
+            request.user,
+            UserActivity.ActivityType.ROOM_VIEW,
             details={
                 'room_id': room.id,
                 'room_name': room.profile.name if room.profile else f'Room {room.id}',
@@ -236,14 +234,9 @@ def track_room_view(request, room_id):
             }
         )
         
-        print(f"Activity created: {activity}")
-        print(f"Activity ID: {activity.id}")
-        print(f"=== END TRACK_ROOM_VIEW ===\n")
-        
         return JsonResponse({
             'status': 'success',
-            'message': 'Room view tracked',
-            'activity_id': activity.id
+            'message': 'Room view tracked'
         })
         
     except Room.DoesNotExist:
@@ -266,97 +259,12 @@ def track_room_view(request, room_id):
 def get_user_recent(request):
     """API endpoint to get authenticated user's recent locations"""
     try:
-        from datetime import datetime, timedelta
         from django.utils.timesince import timesince
         
-        print(f"\n=== GET_USER_RECENT ===")
-        print(f"User: {request.user}")
-        print(f"User ID: {request.user.id}")
-        print(f"User authenticated: {request.user.is_authenticated}")
-        
-        # Get recent room and floor views for the user (last 10 unique places)
-        all_activities = UserActivity.objects.filter(user=request.user).order_by('-timestamp')
-        print(f"Total activities for user: {all_activities.count()}")
-        
-        recent_activities = UserActivity.objects.filter(
-            user=request.user,
-            activity_type__in=[UserActivity.ActivityType.ROOM_VIEW, UserActivity.ActivityType.FLOOR_VIEW]
-        ).select_related('user').order_by('-timestamp')[:50]
-        
-        print(f"Found {recent_activities.count()} room/floor view activities")
-        
-        for activity in recent_activities[:5]:
-            print(f"  Activity: {activity.id} - Type: {activity.activity_type} - Time: {activity.timestamp}")
-        
-        # Track unique rooms and floors to avoid duplicates
-        seen_rooms = set()
-        seen_floors = set()
-        recent_places = []
-        
-        for activity in recent_activities:
-            if len(recent_places) >= 10:
-                break
-                
-            details = activity.details or {}
-            print(f"Processing activity type: {activity.activity_type}, details: {details}")
-            
-            if activity.activity_type == UserActivity.ActivityType.ROOM_VIEW:
-                room_id = details.get('room_id')
-                print(f"  Room view - room_id: {room_id}")
-                if room_id and room_id not in seen_rooms:
-                    seen_rooms.add(room_id)
-                    try:
-                        room = Room.objects.select_related('floor', 'profile').get(id=room_id)
-                        print(f"    Room found: {room}")
-                        
-                        # Get image URL from room profile
-                        image_url = None
-                        if room.profile:
-                            images = room.profile.get_images()
-                            if images:
-                                image_url = images[0]
-                        
-                        print(f"    Image URL: {image_url}")
-                        
-                        recent_places.append({
-                            'type': 'room',
-                            'id': room.id,
-                            'name': room.profile.name if room.profile else f'Room {room.id}',
-                            'number': room.profile.number if room.profile else 'N/A',
-                            'building': room.floor.building,
-                            'floor': room.floor.name,
-                            'floor_id': room.floor.id,
-                            'description': room.profile.description if room.profile else '',
-                            'image_url': image_url,
-                            'time_ago': timesince(activity.timestamp) + ' ago'
-                        })
-                        print(f"    Added to recent_places (total: {len(recent_places)})")
-                    except Room.DoesNotExist:
-                        print(f"    ERROR: Room {room_id} not found")
-                        pass
-                        
-            elif activity.activity_type == UserActivity.ActivityType.FLOOR_VIEW:
-                floor_id = details.get('floor_id')
-                print(f"  Floor view - floor_id: {floor_id}")
-                if floor_id and floor_id not in seen_floors:
-                    seen_floors.add(floor_id)
-                    try:
-                        floor = Floor.objects.get(id=floor_id)
-                        recent_places.append({
-                            'type': 'floor',
-                            'id': floor.id,
-                            'name': floor.name,
-                            'building': floor.building,
-                            'room_count': floor.rooms.count(),
-                            'time_ago': timesince(activity.timestamp) + ' ago'
-                        })
-                        print(f"    Added floor {floor_id} to recent_places")
-                    except Floor.DoesNotExist:
-                        print(f"    ERROR: Floor {floor_id} not found")
-                        pass
-        
-        print(f"Returning {len(recent_places)} recent places")
-        print(f"=== END GET_USER_RECENT ===\n")
+        # Last 10 unique rooms/floors from the user's recent places list
+        recent_places = get_recent_places(request.user)
+        for place in recent_places:
+            place['time_ago'] = timesince(place.pop('timestamp')) + ' ago'
         
         return JsonResponse({
             'status': 'success',
@@ -368,7 +276,6 @@ def get_user_recent(request):
         print(f"ERROR in get_user_recent: {str(e)}")
         import traceback
         traceback.print_exc()
-        print(f"=== END GET_USER_RECENT (ERROR) ===\n")
         return JsonResponse({
             'status': 'error',
             'message': str(e)
@@ -381,64 +288,28 @@ def get_ar_rooms_data(request):
     
     Returns a list of all rooms with their complete coordinates including Z (height/floor).
     Used by the AR interface to position room markers in 3D space.
+    
+    The payload is precomputed and carries a version. Clients can pass
+    ?since=<version> to get only rooms changed or deleted after that version;
+    if the version is too old or unknown, the full list is returned instead
+    (with "full": true).
     """
     try:
-        rooms_data = []
-        
-        # Get all rooms with their profiles
-        rooms = Room.objects.select_related('profile', 'floor').all()
-        
-        for room in rooms:
-            if not hasattr(room, 'profile') or not room.profile:
-                continue
-            
-            # Extract coordinates from room profile (handle both dict and string formats)
-            coords = room.profile.coordinates or {}
-            
-            # Parse coordinates if stored as string "x,y,z"
-            if isinstance(coords, str):
-                try:
-                    parts = coords.split(',')
-                    x = float(parts[0].strip()) if len(parts) > 0 else 0
-                    y = float(parts[1].strip()) if len(parts) > 1 else 0
-                    z = float(parts[2].strip()) if len(parts) > 2 else 0
-                except (ValueError, IndexError):
-                    x = y = z = 0
-            elif isinstance(coords, dict):
-                x = float(coords.get('x', 0)) if coords.get('x') is not None else 0
-                y = float(coords.get('y', 0)) if coords.get('y') is not None else 0
-                z = float(coords.get('z', 0)) if coords.get('z') is not None else 0
-            else:
-                x = y = z = 0
-            
-            room_data = {
-                'id': room.id,
-                'number': room.profile.number,
-                'name': room.profile.name,
-                'type': room.profile.type,
-                'description': room.profile.description or '',
-                'building': room.floor.building,
-                'floor': room.floor.name,
-                'floor_id': room.floor.id,
-                # ✅ Include all three coordinates for 3D positioning
-                'x': x,
-                'y': y,
-                'z': z,
-                # Also include as object for compatibility
-                'coordinates': {
-                    'x': x,
-                    'y': y,
-                    'z': z
-                },
-                'images': room.profile.get_images() if room.profile.get_images() else []
-            }
-            rooms_data.append(room_data)
-        
-        return JsonResponse({
-            'status': 'success',
-            'rooms': rooms_data,
-            'total_rooms': len(rooms_data)
-        })
+        payload = get_ar_payload()
+        
+        since = request.GET.get('since')
+        if since:
+            try:
+                delta = get_ar_delta(payload, int(since))
+            except ValueError:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'Invalid since version'
+                }, status=400)
+            if delta is not None:
+                return JsonResponse(delta)
+        
+        return conditional_response(request, payload['content'], payload['etag'])
         
     except Exception as e:
         print(f"ERROR in get_ar_rooms_data: {str(e)}")
@@ -448,3 +319,129 @@ def get_ar_rooms_data(request):
             'status': 'error',
             'message': str(e)
         }, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def get_job_status(request, job_id):
+    """API endpoint to poll a background job's status and progress
+
+    Jobs are visible to the user who queued them and to admins.
+    """
+    try:
+        job = BackgroundJob.objects.get(id=job_id)
+        is_admin = request.user.is_staff or request.user.is_superuser
+        if job.created_by_id != request.user.id and not is_admin:
+            raise BackgroundJob.DoesNotExist
+
+        return JsonResponse({
+            'status': 'success',
+            'job': job.to_dict()
+        })
+
+    except BackgroundJob.DoesNotExist:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Job not found'
+        }, status=404)
+    except Exception as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def get_rating_analytics_data(request):
+    """API endpoint for room rating analytics (admins only)
+
+    Returns the overall rating summary plus average, count and a 1-5 star
+    histogram per building, floor and room, served from the cached analytics
+    with ETag revalidation.
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Admin access required'
+        }, status=403)
+
+    try:
+        analytics = get_rating_analytics()
+        return conditional_response(request, analytics['content'], analytics['etag'])
+
+    except Exception as e:
+        print(f"Error in get_rating_analytics_data: {str(e)}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+def get_room_composite(request, room_id):
+    """API endpoint for everything the room modal shows, in one response
+
+    ?fields= selects any of details, coordinates, photos, ratings and
+    feedback (default: all but feedback). Responses carry an ETag, so
+    reopening an unchanged room returns a 304.
+    """
+    try:
+        fields = parse_fields(request.GET.get('fields', ''))
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
+    try:
+        room = get_room(room_id)
+    except Room.DoesNotExist:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Room not found'
+        }, status=404)
+
+    try:
+        content = json.dumps(build_room_detail(room, fields, request.user)).encode('utf-8')
+        return conditional_response(request, content, make_etag(content))
+
+    except Exception as e:
+        print(f"Error in get_room_composite: {str(e)}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+def get_rooms_batch(request):
+    """API endpoint to look up many rooms in one request
+
+    ?ids=1,2,3 (up to 200 rooms) and ?include= any of summary, saved and
+    rating (default: summary). saved is only true for a logged-in user's
+    saved rooms.
+    """
+    try:
+        room_ids = parse_room_ids(request.GET.get('ids', ''))
+        includes = parse_includes(request.GET.get('include', ''))
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
+    try:
+        batch = get_room_batch(room_ids, includes, request.user)
+        return JsonResponse({
+            'status': 'success',
+            'rooms': {str(room_id): room for room_id, room in batch['rooms'].items()},
+            'missing': batch['missing']
+        })
+
+    except Exception as e:
+        print(f"Error in get_rooms_batch: {str(e)}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
@@ -0,0 +1,215 @@
+"""
+Materialized room payload for the AR module
+Keeps a precomputed, versioned list of rooms with parsed 3D coordinates
+so /api/ar/rooms/ can serve full snapshots or deltas without touching the
+database unless room data has changed. Each worker keeps its own payload,
+while the version history behind ?since= deltas is in the shared cache.
+"""
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Tuple
+
+from django.core.cache import cache, caches
+
+from .http_cache import bump_cache_version, get_cache_version, make_etag
+from .models import RoomProfile
+
+
+DIRTY_CACHE_KEY = 'ar_rooms:data_version'
+PAYLOAD_CACHE_KEY = 'ar_rooms:payload'
+HISTORY_CACHE_KEY = 'ar_rooms:history'
+
+
+def parse_coordinates(coords) -> Tuple[float, float, float]:
+    """Parse room coordinates stored either as a dict or an "x,y,z" string"""
+    def to_float(value):
+        try:
+            return float(value) if value is not None else 0
+        except (ValueError, TypeError):
+            return 0
+
+    if isinstance(coords, str):
+        parts = coords.split(',')
+        return tuple(to_float(parts[i].strip()) if len(parts) > i else 0 for i in range(3))
+    if isinstance(coords, dict):
+        return to_float(coords.get('x')), to_float(coords.get('y')), to_float(coords.get('z'))
+    return 0, 0, 0
+
+
+def _get_data_version() -> int:
+    """Get the counter bumped by model signals whenever room data changes"""
+    return get_cache_version(DIRTY_CACHE_KEY)
+
+
+def invalidate_ar_payload():
+    """Mark the AR payload stale; it is rebuilt lazily on the next request"""
+    bump_cache_version(DIRTY_CACHE_KEY)
+
+
+def _build_room_rows() -> Dict[int, Dict]:
+    """Load every room with a profile in one query and build its AR entry"""
+    rows = {}
+    profiles = RoomProfile.objects.values_list(
+        'room_id', 'number', 'name', 'type', 'description', 'coordinates', 'images',
+        'room__floor_id', 'room__floor__name', 'room__floor__building'
+    ).order_by('room_id')
+
+    for (room_id, number, name, room_type, description, coordinates, images,
+         floor_id, floor_name, building) in profiles:
+        x, y, z = parse_coordinates(coordinates or {})
+        rows[room_id] = {
+            'id': room_id,
+            'number': number,
+            'name': name,
+            'type': room_type,
+            'description': description or '',
+            'building': building,
+            'floor': floor_name,
+            'floor_id': floor_id,
+            # ✅ Include all three coordinates for 3D positioning
+            'x': x,
+            'y': y,
+            'z': z,
+            # Also include as object for compatibility
+            'coordinates': {
+                'x': x,
+                'y': y,
+                'z': z
+            },
+            'images': images if isinstance(images, list) else []
+        }
+    return rows
+
+
+def _row_hash(row: Dict) -> str:
+    """Fingerprint a room's AR entry so workers can diff without sharing full rows"""
+    return hashlib.md5(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _next_history(history: Optional[Dict], rows: Dict[int, Dict]) -> Dict:
+    """Advance the shared version history to the given rows
+
+    Each room remembers the version at which it last changed and deleted
+    rooms leave a tombstone, which is what makes ?since= deltas possible.
+    When there is no history yet, it starts fresh at a time-based base
+    version so versions keep increasing across cache flushes. New versions
+    are time-based too, so two workers that advance the history at the
+    same moment never hand out the same version for different rooms.
+    Returns the given history itself when no room changed.
+    """
+    room_hashes = {room_id: _row_hash(row) for room_id, row in rows.items()}
+
+    if history is None:
+        version = time.time_ns() // 1000
+        return {
+            'base_version': version,
+            'version': version,
+            'room_hashes': room_hashes,
+            'room_versions': {room_id: version for room_id in rows},
+            'deleted': {},
+        }
+
+    old_hashes = history['room_hashes']
+    changed = [room_id for room_id, row_hash in room_hashes.items() if old_hashes.get(room_id) != row_hash]
+    removed = [room_id for room_id in old_hashes if room_id not in room_hashes]
+    if not changed and not removed:
+        return history
+
+    version = max(time.time_ns() // 1000, history['version'] + 1)
+    room_versions = dict(history['room_versions'])
+    deleted = dict(history['deleted'])
+    for room_id in changed:
+        room_versions[room_id] = version
+        deleted.pop(room_id, None)
+    for room_id in removed:
+        room_versions.pop(room_id, None)
+        deleted[room_id] = version
+
+    return {
+        'base_version': history['base_version'],
+        'version': version,
+        'room_hashes': room_hashes,
+        'room_versions': room_versions,
+        'deleted': deleted,
+    }
+
+
+def _rebuild_payload(data_version: int) -> Dict:
+    """Rebuild this worker's payload from the database and the shared history
+
+    The version history lives in the shared cache, so a ?since= version
+    handed out by one worker means the same thing to every other worker.
+    Only the first worker to see a change advances the history; the rest
+    find their rooms already match its fingerprints and reuse its versions.
+    """
+    rows = _build_room_rows()
+    previous = caches['shared'].get(HISTORY_CACHE_KEY)
+    history = _next_history(previous, rows)
+    if history is not previous:
+        caches['shared'].set(HISTORY_CACHE_KEY, history, None)
+
+    version = history['version']
+    content = json.dumps({
+        'status': 'success',
+        'full': True,
+        'version': version,
+        'rooms': list(rows.values()),
+        'total_rooms': len(rows)
+    }).encode('utf-8')
+
+    return {
+        'base_version': history['base_version'],
+        'version': version,
+        'room_versions': history['room_versions'],
+        'deleted': history['deleted'],
+        'data_version': data_version,
+        'rows': rows,
+        'content': content,
+        'etag': make_etag(content),
+    }
+
+
+def get_ar_payload() -> Dict:
+    """Get the current materialized AR payload, rebuilding it only if stale"""
+    data_version = _get_data_version()
+    payload = cache.get(PAYLOAD_CACHE_KEY)
+
+    if payload is None or payload['data_version'] != data_version:
+        payload = _rebuild_payload(data_version)
+        cache.set(PAYLOAD_CACHE_KEY, payload, None)
+
+    return payload
+
+
+def get_ar_delta(payload: Dict, since: int) -> Optional[Dict]:
+    """Get rooms changed or deleted after version ``since``
+
+    Returns None when the delta cannot be computed (the client's version
+    predates the payload history or is from the future), in which case
+    the caller should fall back to a full snapshot.
+    """
+    if since < payload['base_version'] or since > payload['version']:
+        return None
+
+    rows = payload['rows']
+    changed = [
+        rows[room_id]
+        for room_id, room_version in payload['room_versions'].items()
+        if room_version > since
+    ]
+    deleted = [
+        room_id
+        for room_id, deleted_version in payload['deleted'].items()
+        if deleted_version > since
+    ]
+
+    return {
+        'status': 'success',
+        'full': False,
+        'since': since,
+        'version': payload['version'],
+        'rooms': changed,
+        'deleted': deleted,
+        'total_rooms': len(rows)
+    }
@@ -11,6 +11,8 @@ from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from .models import User, UserActivity, Profile, College, UserSession
+from .activity_buffer import record_activity
+from .session_cache import deactivate_user_sessions
 import json
 
 def get_client_ip(request):
@@ -23,17 +25,13 @@ def get_client_ip(request):
     return ip
 
 def track_activity(user, activity_type, details=None, request=None):
-    """Utility function to track user activities"""
-    if details is None:
-        details = {}
-    activity = UserActivity(
-        user=user,
-        activity_type=activity_type,
-        details=details
+    """Utility function to track user activities (buffered, see activity_buffer)"""
+    record_activity(
+        user,
+        activity_type,
+        details=details,
+        ip_address=request.META.get('REMOTE_ADDR') if request else None
     )
-    if request:
-        activity.ip_address = request.META.get('REMOTE_ADDR')
-    activity.save()
 
 def login_ajax(request):
     """Handle AJAX login requests"""
@@ -122,8 +120,7 @@ def login_ajax(request):
                 })
 
             # Invalidate all previous sessions for this user
-            from .models import UserSession
-            UserSession.objects.filter(user=user, is_active=True).update(is_active=False)
+            deactivate_user_sessions(user)
 
             # Login successful
             auth_login(request, user)
@@ -349,8 +346,7 @@ def login_view(request):
                     messages.error(request, "Your account has been deactivated. Please contact our administrator for assistance.")
                 else:
                     # Invalidate all previous sessions for this user
-                    from .models import UserSession
-                    UserSession.objects.filter(user=user, is_active=True).update(is_active=False)
+                    deactivate_user_sessions(user)
                     
                     # Log the user in
                     auth_login(request, user)
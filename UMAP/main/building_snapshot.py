@@ -0,0 +1,95 @@
+"""
+Building snapshot layer for the interactive map
+Builds the building -> floors -> rooms tree in a fixed number of queries
+and keeps the serialized result in a versioned cache.
+"""
+import json
+from typing import Dict
+
+from django.core.cache import cache
+
+from .http_cache import bump_cache_version, get_cache_version, make_etag
+from .models import Floor, RoomProfile
+
+
+VERSION_CACHE_KEY = 'building_snapshot:version'
+SNAPSHOT_CACHE_KEY = 'building_snapshot:{version}'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def get_snapshot_version() -> int:
+    """Get the current snapshot version"""
+    return get_cache_version(VERSION_CACHE_KEY)
+
+
+def invalidate_building_snapshot():
+    """Bump the snapshot version so the next request rebuilds the tree"""
+    bump_cache_version(VERSION_CACHE_KEY)
+
+
+def build_building_data() -> Dict[str, Dict]:
+    """Build the buildings dict served by /api/buildings/
+
+    Uses two queries regardless of the number of floors: one for floors
+    and one for all room profiles joined to their room's floor.
+    """
+    from .views import extract_floor_number
+
+    floors = sorted(
+        Floor.objects.only('id', 'name', 'building'),
+        key=lambda f: (f.building, extract_floor_number(f.name))
+    )
+
+    rooms_by_floor = {}
+    profiles = RoomProfile.objects.values_list(
+        'room_id', 'room__floor_id', 'number', 'name', 'type', 'description', 'coordinates'
+    ).order_by('room_id')
+    for room_id, floor_id, number, name, room_type, description, coordinates in profiles:
+        rooms_by_floor.setdefault(floor_id, []).append({
+            'id': room_id,
+            'number': number,
+            'name': name,
+            'type': room_type,
+            'description': description or '',
+            'coordinates': coordinates or {},
+        })
+
+    buildings_data = {}
+    for floor in floors:
+        building = buildings_data.setdefault(floor.building, {
+            'name': floor.building,
+            'floors': [],
+            'rooms': []
+        })
+        building['floors'].append({
+            'id': floor.id,
+            'name': floor.name
+        })
+        for room_data in rooms_by_floor.get(floor.id, []):
+            building['rooms'].append({**room_data, 'floor': floor.name})
+
+    return buildings_data
+
+
+def get_building_snapshot() -> Dict:
+    """Get the serialized building snapshot for the current version
+
+    Returns a dict with 'version', 'etag' and 'content' (JSON bytes).
+    """
+    version = get_snapshot_version()
+    cache_key = SNAPSHOT_CACHE_KEY.format(version=version)
+
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        content = json.dumps({
+            'status': 'success',
+            'buildings': build_building_data()
+        }).encode('utf-8')
+        snapshot = {
+            'version': version,
+            'etag': make_etag(content),
+            'content': content,
+        }
+        cache.set(cache_key, snapshot, SNAPSHOT_TIMEOUT)
+
+    return snapshot
@@ -0,0 +1,96 @@
+"""
+Helpers for versioned caches and for serving cached API payloads with conditional GET support
+"""
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+def get_cache_version(key: str) -> int:
+    """Get a shared version counter, seeding it if the cache was cleared
+
+    Cached payloads are stored under their version, so old versions simply
+    stop being read and expire on their own. The seed is the current time
+    in nanoseconds, so a reset counter never points back at a payload that
+    was cached before the reset.
+    """
+    version = caches['shared'].get(key)
+    if version is None:
+        caches['shared'].add(key, time.time_ns(), None)
+        version = caches['shared'].get(key)
+    return version
+
+
+def bump_cache_version(key: str) -> int:
+    """Move a shared version counter forward and return the new version
+
+    The new version is the current time in nanoseconds (or one past the
+    old version if the clock is behind it), so it also records when the
+    data last changed and concurrent bumps never reuse a version.
+    """
+    version = max(time.time_ns(), (caches['shared'].get(key) or 0) + 1)
+    caches['shared'].set(key, version, None)
+    return version
+
+
+def make_etag(content: bytes) -> str:
+    """Build a strong ETag (quoted) from response bytes"""
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+def etag_matches(request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag
+
+    Uses weak comparison, like Django's own conditional GET handling,
+    so "W/" prefixed ETags sent back by proxies still match.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+
+    client_etags = parse_etags(header)
+    if '*' in client_etags:
+        return True
+
+    target = etag.removeprefix('W/')
+    return any(client_etag.removeprefix('W/') == target for client_etag in client_etags)
+
+
+def is_not_modified(request, etag: str, last_modified: float = None) -> bool:
+    """Check whether the client's cached copy is still current
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when the client sent no ETag, as RFC 9110 requires.
+    """
+    if request.headers.get('If-None-Match'):
+        return etag_matches(request, etag)
+    if last_modified is not None:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        return since is not None and int(last_modified) <= since
+    return False
+
+
+def conditional_response(request, content, etag: str,
+                         content_type: str = 'application/json', last_modified: float = None):
+    """Return a 304 if the client already has this version, otherwise the full body
+
+    ``content`` may be bytes or a callable returning bytes, which is only
+    called when the body is actually sent. ``last_modified`` is a Unix
+    timestamp that adds Last-Modified/If-Modified-Since handling.
+
+    Responses are marked "no-cache" so browsers keep the body but always
+    revalidate, which turns repeat fetches into cheap 304s.
+    """
+    if is_not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content() if callable(content) else content, content_type=content_type)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    return response
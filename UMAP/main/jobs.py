@@ -0,0 +1,206 @@
+"""
+Database-backed background job queue
+Views enqueue long-running work as BackgroundJob rows and return right away.
+The run_jobs management command claims pending jobs one at a time, runs the
+handler registered for the job type and records progress, the result or the
+error on the job row, where the job status endpoint can read it.
+"""
+import traceback
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+
+JOB_HANDLERS: Dict[str, Callable[[BackgroundJob], Dict]] = {}
+CLAIM_BATCH_SIZE = 10
+MAX_ATTEMPTS = 3  # Starts allowed before an abandoned job is failed instead of requeued
+
+
+def job_handler(job_type: str):
+    """Register a function as the handler for a job type
+
+    The handler receives the claimed job and returns a JSON-serializable
+    result dict; raising marks the job as failed.
+    """
+    def register(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return register
+
+
+def enqueue_job(job_type: str, payload: Dict, user=None) -> BackgroundJob:
+    """Queue a job for the worker"""
+    job = BackgroundJob.objects.create(job_type=job_type, payload=payload, created_by=user)
+    print(f"[Jobs] Queued job #{job.id} ({job_type})")
+    return job
+
+
+def update_progress(job: BackgroundJob, **counts):
+    """Merge counts into the job's progress without touching other fields
+
+    Each update also records a heartbeat, so a long job that keeps
+    reporting progress is never mistaken for an abandoned one.
+    """
+    job.progress = {**job.progress, **counts}
+    job.heartbeat_at = timezone.now()
+    BackgroundJob.objects.filter(id=job.id).update(progress=job.progress, heartbeat_at=job.heartbeat_at)
+
+
+def claim_next_job() -> Optional[BackgroundJob]:
+    """Claim the oldest pending job, or return None if the queue is empty
+
+    A job is claimed with a conditional UPDATE on its status, so two workers
+    racing for the same row can never both run it.
+    """
+    pending_ids = BackgroundJob.objects.filter(
+        status=BackgroundJob.Status.PENDING
+    ).order_by('created_at', 'id').values_list('id', flat=True)[:CLAIM_BATCH_SIZE]
+
+    for job_id in pending_ids:
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(
+            id=job_id, status=BackgroundJob.Status.PENDING
+        ).update(
+            status=BackgroundJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """Run a claimed job's handler and record the outcome"""
+    handler = JOB_HANDLERS.get(job.job_type)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job type '{job.job_type}'")
+        job.result = handler(job) or {}
+        job.status = BackgroundJob.Status.SUCCEEDED
+        job.error = ''
+    except Exception as e:
+        print(f"[Jobs] Job #{job.id} failed: {e}\n{traceback.format_exc()}")
+        job.status = BackgroundJob.Status.FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(stale_after: timedelta) -> Dict[str, int]:
+    """Put jobs left running by a worker that died back in the queue
+
+    A running job is stale when its last heartbeat (the claim or the latest
+    progress update) is older than stale_after, however long ago it started.
+    A job that has already been started MAX_ATTEMPTS times is marked
+    failed instead, so a job that keeps crashing its worker cannot loop
+    forever. Returns the number of jobs requeued and failed.
+    """
+    now = timezone.now()
+    stale = BackgroundJob.objects.filter(status=BackgroundJob.Status.RUNNING, heartbeat_at__lt=now - stale_after)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=BackgroundJob.Status.FAILED,
+        error=f'Worker stopped responding on each of {MAX_ATTEMPTS} attempts',
+        finished_at=now
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status=BackgroundJob.Status.PENDING, started_at=None, heartbeat_at=None
+    )
+    return {'requeued': requeued, 'failed': failed}
+
+
+# ---- JOB HANDLERS ----
+
+@job_handler(BackgroundJob.JobType.FLOOR_SVG_IMPORT)
+def import_floor_svg(job: BackgroundJob) -> Dict:
+    """Stream a floor's SVG and create its rooms, reporting progress as it goes
+
+    Payload: floor_id, plus optional update_existing and require_coords flags
+    passed through to sync_floor_rooms.
+    """
+    from .models import Floor
+    from .room_manager import RoomNameManager
+    from .room_sync import sync_floor_rooms
+    from .svg_parser import SVGParser
+    from .views import extract_floor_number
+
+    floor = Floor.objects.get(id=job.payload['floor_id'])
+    if not floor.floorplan_svg:
+        raise ValueError(f"Floor {floor.id} has no floorplan SVG")
+
+    floor_number = extract_floor_number(floor.name)
+    parser = SVGParser(floor.floorplan_svg.path, floor_number=floor_number, building_id='10', streaming=True)
+
+    coords_resolver = RoomNameManager.get_coordinate_resolver()
+    if not len(coords_resolver):
+        print("[Floor Import] Warning: Could not load Room_coords.csv - Z coordinates will not be available")
+
+    def report_progress(report):
+        update_progress(job, parsed=report['extracted'], matched=report['matched'],
+                        created=report['created'], updated=report['updated'], skipped=report['skipped'])
+
+    report = sync_floor_rooms(
+        floor, parser.iter_rooms(), floor_number, coords_resolver,
+        update_existing=job.payload.get('update_existing', False),
+        require_coords=job.payload.get('require_coords', False),
+        progress_callback=report_progress
+    )
+    report_progress(report)
+
+    print(f"[Floor Import] Job #{job.id} floor {floor.name}: created {report['created']}, "
+          f"updated {report['updated']}, skipped {report['skipped']}")
+    return {'floor_id': floor.id, **report}
+
+
+@job_handler(BackgroundJob.JobType.SCHEDULE_IMPORT)
+def import_schedule_pdf(job: BackgroundJob) -> Dict:
+    """Parse an uploaded COR PDF and swap the parsed rows in as the user's schedule
+
+    Payload: pdf_name (path of the upload in default storage), the original
+    filename and the content_hash of the PDF bytes. The stored PDF is
+    deleted once it has been parsed and the parsed rows are cached by hash.
+    """
+    from django.core.files.storage import default_storage
+    from .schedule_import import cache_parsed_rows, get_cached_rows, import_rows, parse_schedule_pdf
+
+    if job.created_by is None:
+        raise ValueError("The user who uploaded this schedule no longer exists")
+
+    pdf_name = job.payload['pdf_name']
+    content_hash = job.payload.get('content_hash')
+    try:
+        # The same PDF may have been parsed while this job was queued
+        rows = get_cached_rows(content_hash) if content_hash else None
+        if rows is None:
+            rows = parse_schedule_pdf(
+                default_storage.path(pdf_name),
+                progress_callback=lambda done, total: update_progress(job, pages_parsed=done, pages_total=total)
+            )
+            if content_hash:
+                cache_parsed_rows(content_hash, rows)
+    finally:
+        default_storage.delete(pdf_name)
+    update_progress(job, rows=len(rows))
+
+    result = import_rows(job.created_by, rows)
+    update_progress(job, created=result['created'])
+    return result
+
+
+@job_handler(BackgroundJob.JobType.STATISTICS_ROLLUP)
+def refresh_statistics(job: BackgroundJob) -> Dict:
+    """Bring the admin statistics rollups up to date
+
+    Payload: optional rebuild_activity flag to recompute the activity
+    rollups from scratch.
+    """
+    from .statistics_rollup import refresh_rollups
+
+    return refresh_rollups(rebuild_activity=job.payload.get('rebuild_activity', False))
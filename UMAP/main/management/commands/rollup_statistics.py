@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.statistics_rollup import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Refreshes the pre-aggregated statistics shown on the admin statistics dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop the activity rollups and recompute them from every UserActivity row'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep running and refresh every N minutes instead of exiting after one refresh'
+        )
+
+    def handle(self, *args, **options):
+        rebuild = options['rebuild']
+        try:
+            while True:
+                report = refresh_rollups(rebuild_activity=rebuild)
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ Rolled up {report['activity_ids']} activity id(s), "
+                    f"{report['rooms']} room(s), {report['schedule_load_rows']} schedule load row(s)"
+                ))
+                if not options['interval']:
+                    break
+                rebuild = False
+                time.sleep(options['interval'] * 60)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nStatistics rollup stopped'))
@@ -0,0 +1,72 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from main.jobs import claim_next_job, requeue_stale_jobs, run_job
+from main.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = 'Processes queued background jobs (floor SVG imports, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process every pending job and exit instead of polling'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=60,
+            help='Minutes without a heartbeat (claim or progress update) after which a running job is considered abandoned and re-queued'
+        )
+        parser.add_argument(
+            '--requeue-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between checks for abandoned jobs'
+        )
+
+    def requeue_stale(self, stale_after):
+        counts = requeue_stale_jobs(stale_after)
+        if counts['requeued']:
+            self.stdout.write(self.style.WARNING(f'⊘ Re-queued {counts["requeued"]} abandoned job(s)'))
+        if counts['failed']:
+            self.stdout.write(self.style.ERROR(f'✗ Failed {counts["failed"]} job(s) that ran out of attempts'))
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_after'])
+        self.requeue_stale(stale_after)
+        last_requeue = time.monotonic()
+
+        self.stdout.write(self.style.SUCCESS('✓ Job worker started'))
+        try:
+            while True:
+                # Jobs abandoned by another worker are picked up while this one keeps running
+                if time.monotonic() - last_requeue >= options['requeue_interval']:
+                    self.requeue_stale(stale_after)
+                    last_requeue = time.monotonic()
+
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                self.stdout.write(f'→ Running job #{job.id} ({job.job_type})')
+                job = run_job(job)
+                if job.status == BackgroundJob.Status.SUCCEEDED:
+                    self.stdout.write(self.style.SUCCESS(f'✓ Job #{job.id} succeeded'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'✗ Job #{job.id} failed: {job.error}'))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nJob worker stopped'))
@@ -1,12 +1,10 @@
 """
 Session management middleware to enforce single device login per user
 """
-import django.utils.timezone
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.contrib.sessions.models import Session
 from django.contrib.auth import logout
-from .models import UserSession
+from .session_cache import is_session_active
 
 
 class SingleDeviceSessionMiddleware:
@@ -24,16 +22,8 @@ class SingleDeviceSessionMiddleware:
             session_key = request.session.session_key
             
             # Check if this session is still valid in UserSession model
-            try:
-                user_session = UserSession.objects.get(
-                    user=request.user,
-                    session_key=session_key,
-                    is_active=True
-                )
-                # Update last activity time
-                user_session.last_activity = django.utils.timezone.now()
-                user_session.save(update_fields=['last_activity'])
-            except UserSession.DoesNotExist:
+            # (cached, with last_activity written at most once a minute)
+            if not is_session_active(request.user.id, session_key):
                 # Session not found or marked inactive - user was logged out from another device
                 logout(request)
                 
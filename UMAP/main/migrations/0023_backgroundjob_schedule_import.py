@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0022_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('floor_svg_import', 'Floor SVG Import'), ('schedule_import', 'Schedule PDF Import')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0023_backgroundjob_schedule_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedSchedulePDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('parser_version', models.PositiveIntegerField()),
+                ('rows', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Parsed Schedule PDF',
+                'verbose_name_plural': 'Parsed Schedule PDFs',
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'parser_version'), name='unique_parsed_schedule_pdf')],
+            },
+        ),
+    ]
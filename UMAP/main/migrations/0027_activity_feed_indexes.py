@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0026_statistics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['creation_date', 'id'], name='feedback_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedlocation',
+            index=models.Index(fields=['saved_date', 'id'], name='savedlocation_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['timestamp', 'id'], name='useractivity_feed_idx'),
+        ),
+    ]
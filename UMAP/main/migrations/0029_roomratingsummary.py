@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_rating_summaries(apps, schema_editor):
+    """Summarize the ratings that already exist"""
+    Feedback = apps.get_model('main', 'Feedback')
+    RoomRatingSummary = apps.get_model('main', 'RoomRatingSummary')
+
+    rows = Feedback.objects.values('room_id').annotate(
+        rating_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    )
+    RoomRatingSummary.objects.bulk_create([RoomRatingSummary(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0028_useractivity_event_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['room', '-creation_date', '-id'], name='feedback_room_page_idx'),
+        ),
+        migrations.AddField(
+            model_name='roomratingsummary',
+            name='room',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='main.room'),
+        ),
+        migrations.RunPython(build_rating_summaries, migrations.RunPython.noop),
+    ]
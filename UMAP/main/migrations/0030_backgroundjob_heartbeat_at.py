@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_heartbeats(apps, schema_editor):
+    """Jobs already running count from their start until they report progress"""
+    BackgroundJob = apps.get_model('main', 'BackgroundJob')
+    BackgroundJob.objects.filter(started_at__isnull=False).update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0029_roomratingsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 
@@ -180,6 +181,12 @@ class Feedback(models.Model):
     rating = models.PositiveSmallIntegerField()
     comment = models.TextField(blank=True, max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['creation_date', 'id'], name='feedback_feed_idx'),
+            models.Index(fields=['room', '-creation_date', '-id'], name='feedback_room_page_idx'),
+        ]
+
     def __str__(self):
         return f"Feedback by {self.user.username} on Room {self.room.id}"
 
@@ -192,6 +199,9 @@ class SavedLocation(models.Model):
     class Meta:
         unique_together = ('user', 'room')  # Prevent duplicate saves
         ordering = ['-saved_date']
+        indexes = [
+            models.Index(fields=['saved_date', 'id'], name='savedlocation_feed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.room.profile.name if self.room.profile else 'Room'}"
@@ -220,12 +230,15 @@ class UserActivity(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
     activity_type = models.CharField(max_length=20, choices=ActivityType.choices)
     details = models.JSONField(default=dict)  # Store additional details as JSON
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)  # Set when the event happens, not when the buffered row is written
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = 'User Activities'
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='useractivity_feed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.get_activity_type_display()} - {self.timestamp}"
@@ -275,3 +288,184 @@ class UserSession(models.Model):
         
         return f"{device} - {browser}"
 
+
+
+# BACKGROUND JOB MODEL - Long-running work processed by the run_jobs worker
+class BackgroundJob(models.Model):
+    class JobType(models.TextChoices):
+        FLOOR_SVG_IMPORT = 'floor_svg_import', 'Floor SVG Import'
+        SCHEDULE_IMPORT = 'schedule_import', 'Schedule PDF Import'
+        STATISTICS_ROLLUP = 'statistics_rollup', 'Statistics Rollup'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    job_type = models.CharField(max_length=30, choices=JobType.choices)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    payload = models.JSONField(default=dict)  # Handler arguments
+    progress = models.JSONField(default=dict)  # Counts reported while running
+    result = models.JSONField(default=dict)  # Handler return value
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Last sign of life from the worker running it
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.get_job_type_display()} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    def to_dict(self):
+        """Status payload served by the job status endpoint"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+# PARSED SCHEDULE PDF MODEL - Parsed COR rows keyed by a hash of the PDF bytes
+class ParsedSchedulePDF(models.Model):
+    content_hash = models.CharField(max_length=64)  # SHA-256 of the uploaded PDF
+    parser_version = models.PositiveIntegerField()  # schedule_import.PARSER_VERSION used to parse it
+    rows = models.JSONField(default=list)  # Normalized rows from schedule_import.extract_page_rows
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'parser_version'], name='unique_parsed_schedule_pdf'),
+        ]
+        verbose_name = 'Parsed Schedule PDF'
+        verbose_name_plural = 'Parsed Schedule PDFs'
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} (v{self.parser_version}) - {len(self.rows)} rows"
+
+
+# CALENDAR FEED TOKEN MODEL - Secret token in a user's subscribable iCal feed URL
+class CalendarFeedToken(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed_token')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - calendar feed"
+
+    @staticmethod
+    def generate_token():
+        import secrets
+        return secrets.token_urlsafe(32)
+
+
+# ACTIVITY ROLLUP MODEL - UserActivity counts per hour and activity type
+class ActivityRollup(models.Model):
+    hour = models.DateTimeField()  # Start of the hour (UTC)
+    activity_type = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'activity_type'], name='unique_activity_rollup')
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.activity_type}: {self.count}"
+
+
+# USER ACTIVITY ROLLUP MODEL - UserActivity counts per user and hour
+class UserActivityRollup(models.Model):
+    hour = models.DateTimeField()  # Start of the hour (UTC)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'user'], name='unique_user_activity_rollup')
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.user.username}: {self.count}"
+
+
+# ROOM STATS MODEL - Precomputed rating, comment, save and schedule counts per room
+class RoomStats(models.Model):
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, related_name='stats')
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    save_count = models.PositiveIntegerField(default=0)
+    schedule_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for Room {self.room_id}"
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+
+# SCHEDULE LOAD ROLLUP MODEL - Class counts per building, day and start hour
+class ScheduleLoadRollup(models.Model):
+    building = models.CharField(max_length=100)
+    day = models.CharField(max_length=20)
+    start_hour = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.building} {self.day} {self.start_hour:02d}:00: {self.count}"
+
+
+# ROLLUP CHECKPOINT MODEL - Progress of the statistics rollups
+class RollupCheckpoint(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)  # Highest source row id already rolled up
+    updated_at = models.DateTimeField(null=True, blank=True)  # Time of the last completed refresh
+
+    def __str__(self):
+        return f"{self.name} (up to #{self.last_id})"
+
+
+# ROOM RATING SUMMARY MODEL - Running rating totals per room, updated on every rating change
+class RoomRatingSummary(models.Model):
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, related_name='rating_summary')
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Ratings for Room {self.room_id}: {self.rating_count}"
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @property
+    def histogram(self):
+        return {str(stars): getattr(self, f'stars_{stars}') for stars in range(1, 6)}
@@ -0,0 +1,111 @@
+"""
+Room rating analytics shared by the admin statistics page and the ratings API
+Averages, counts and 1-5 star histograms per building, floor and room are
+aggregated by the database and kept in a versioned cache that feedback
+signals invalidate.
+"""
+import json
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.db.models import Avg, Count
+
+from .http_cache import bump_cache_version, get_cache_version, make_etag
+from .models import Feedback
+
+
+VERSION_CACHE_KEY = 'rating_analytics:version'
+ANALYTICS_CACHE_KEY = 'rating_analytics:{version}'
+ANALYTICS_TIMEOUT = 60 * 60 * 24
+RATING_VALUES = range(1, 6)
+
+# Grouping fields for each level, in the order they appear in the payload
+LEVEL_FIELDS = {
+    'buildings': ('room__floor__building',),
+    'floors': ('room__floor_id', 'room__floor__name', 'room__floor__building'),
+    'rooms': ('room_id', 'room__profile__number', 'room__profile__name', 'room__floor_id'),
+}
+LEVEL_KEYS = {
+    'buildings': ('name',),
+    'floors': ('id', 'name', 'building'),
+    'rooms': ('id', 'number', 'name', 'floor_id'),
+}
+
+
+def get_analytics_version() -> int:
+    """Get the current analytics version"""
+    return get_cache_version(VERSION_CACHE_KEY)
+
+
+def invalidate_rating_analytics():
+    """Bump the analytics version so the next request recomputes the aggregates"""
+    bump_cache_version(VERSION_CACHE_KEY)
+
+
+def _empty_histogram() -> Dict[str, int]:
+    return {str(value): 0 for value in RATING_VALUES}
+
+
+def _summarize_level(level: str) -> List[Dict]:
+    """Average, count and histogram for every group of one level, in two queries"""
+    fields = LEVEL_FIELDS[level]
+    keys = LEVEL_KEYS[level]
+
+    groups = {}
+    for row in Feedback.objects.values(*fields).annotate(average=Avg('rating'), count=Count('id')):
+        group_key = tuple(row[field] for field in fields)
+        groups[group_key] = {
+            **dict(zip(keys, group_key)),
+            'average': round(row['average'], 2),
+            'count': row['count'],
+            'histogram': _empty_histogram(),
+        }
+
+    for row in Feedback.objects.values(*fields, 'rating').annotate(count=Count('id')):
+        group = groups.get(tuple(row[field] for field in fields))
+        if group is not None and str(row['rating']) in group['histogram']:
+            group['histogram'][str(row['rating'])] = row['count']
+
+    return sorted(groups.values(), key=lambda group: (-group['average'], -group['count']))
+
+
+def build_rating_analytics() -> Dict:
+    """Build the full analytics payload: overall summary plus every level"""
+    overall = Feedback.objects.aggregate(average=Avg('rating'), count=Count('id'))
+    histogram = _empty_histogram()
+    for rating, count in Feedback.objects.values('rating').annotate(count=Count('id')).values_list('rating', 'count'):
+        if str(rating) in histogram:
+            histogram[str(rating)] = count
+
+    return {
+        'overall': {
+            'average': round(overall['average'], 2) if overall['average'] is not None else 0,
+            'count': overall['count'],
+            'histogram': histogram,
+        },
+        **{level: _summarize_level(level) for level in LEVEL_FIELDS},
+    }
+
+
+def get_rating_analytics() -> Dict:
+    """Get the rating analytics for the current version
+
+    Returns a dict with 'version', 'etag', 'data' (the payload dict) and
+    'content' (the JSON response bytes).
+    """
+    version = get_analytics_version()
+    cache_key = ANALYTICS_CACHE_KEY.format(version=version)
+
+    analytics = cache.get(cache_key)
+    if analytics is None:
+        data = build_rating_analytics()
+        content = json.dumps({'status': 'success', **data}).encode('utf-8')
+        analytics = {
+            'version': version,
+            'etag': make_etag(content),
+            'data': data,
+            'content': content,
+        }
+        cache.set(cache_key, analytics, ANALYTICS_TIMEOUT)
+
+    return analytics
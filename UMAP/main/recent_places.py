@@ -0,0 +1,124 @@
+"""
+Per-user list of recently viewed rooms and floors
+Each user's recent places are rebuilt newest first and deduplicated from
+their latest view activities and cached under a per-user version, which
+the activity writer bumps after writing new room or floor views. The list
+is only rebuilt after the user viewed something new, and hydrating it
+takes one in_bulk query for rooms and one for floors.
+"""
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .http_cache import bump_cache_version, get_cache_version
+from .models import Floor, Room, UserActivity
+
+
+VERSION_CACHE_KEY = 'recent_places:version:{user_id}'
+RECENT_PLACES_CACHE_KEY = 'recent_places:{user_id}:{version}'
+RECENT_PLACES_TIMEOUT = 60 * 60 * 24
+RECENT_PLACES_LIMIT = 10  # Places shown to the user
+RECENT_PLACES_KEPT = 20  # Places remembered, so deleted rooms don't shrink the list
+REBUILD_ACTIVITY_LIMIT = 50  # Latest view activities the list is built from
+
+PLACE_ACTIVITY_TYPES = {
+    UserActivity.ActivityType.ROOM_VIEW: ('room', 'room_id'),
+    UserActivity.ActivityType.FLOOR_VIEW: ('floor', 'floor_id'),
+}
+
+
+def _place_from_activity(activity_type, details):
+    """Get the (place type, id) a view activity refers to, or None"""
+    place = PLACE_ACTIVITY_TYPES.get(activity_type)
+    if place is None:
+        return None
+    place_type, id_field = place
+    place_id = (details or {}).get(id_field)
+    return (place_type, place_id) if place_id else None
+
+
+def _rebuild_entries(user_id: int) -> List[list]:
+    """Rebuild a user's recent places from their latest written view activities"""
+    entries, seen = [], set()
+    activities = UserActivity.objects.filter(
+        user_id=user_id, activity_type__in=list(PLACE_ACTIVITY_TYPES)
+    ).order_by('-timestamp').values_list('activity_type', 'details', 'timestamp')[:REBUILD_ACTIVITY_LIMIT]
+    for activity_type, details, timestamp in activities:
+        place = _place_from_activity(activity_type, details)
+        if place and place not in seen and len(entries) < RECENT_PLACES_KEPT:
+            seen.add(place)
+            entries.append([place[0], place[1], timestamp.timestamp()])
+    return entries
+
+
+def _get_entries(user_id: int) -> List[list]:
+    # The version is read before the activities, so views written after the
+    # rebuild always move the version past the cached list
+    version = get_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+    key = RECENT_PLACES_CACHE_KEY.format(user_id=user_id, version=version)
+    entries = cache.get(key)
+    if entries is None:
+        entries = _rebuild_entries(user_id)
+        cache.set(key, entries, RECENT_PLACES_TIMEOUT)
+    return entries
+
+
+def places_viewed(activities):
+    """Invalidate the recent places of users whose room or floor views were just written"""
+    user_ids = {
+        activity.user_id for activity in activities
+        if _place_from_activity(activity.activity_type, activity.details)
+    }
+    for user_id in user_ids:
+        bump_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+
+
+def get_recent_places(user, limit: int = RECENT_PLACES_LIMIT) -> List[Dict]:
+    """Get the user's recent rooms and floors, newest first
+
+    Places that no longer exist are skipped. Each dict carries the view
+    'timestamp' as an aware datetime.
+    """
+    entries = _get_entries(user.id)
+    room_ids = [place_id for place_type, place_id, _ in entries if place_type == 'room']
+    floor_ids = [place_id for place_type, place_id, _ in entries if place_type == 'floor']
+
+    rooms = Room.objects.select_related('floor', 'profile').in_bulk(room_ids) if room_ids else {}
+    floors = Floor.objects.annotate(room_count=Count('rooms')).in_bulk(floor_ids) if floor_ids else {}
+
+    recent_places = []
+    for place_type, place_id, viewed_at in entries:
+        if len(recent_places) >= limit:
+            break
+        timestamp = datetime.fromtimestamp(viewed_at, tz=dt_timezone.utc)
+
+        if place_type == 'room' and place_id in rooms:
+            room = rooms[place_id]
+            profile = getattr(room, 'profile', None)
+            images = profile.get_images() if profile else []
+            recent_places.append({
+                'type': 'room',
+                'id': room.id,
+                'name': profile.name if profile else f'Room {room.id}',
+                'number': profile.number if profile else 'N/A',
+                'building': room.floor.building,
+                'floor': room.floor.name,
+                'floor_id': room.floor.id,
+                'description': profile.description if profile else '',
+                'image_url': images[0] if images else None,
+                'timestamp': timestamp
+            })
+        elif place_type == 'floor' and place_id in floors:
+            floor = floors[place_id]
+            recent_places.append({
+                'type': 'floor',
+                'id': floor.id,
+                'name': floor.name,
+                'building': floor.building,
+                'room_count': floor.room_count,
+                'timestamp': timestamp
+            })
+
+    return recent_places
@@ -0,0 +1,76 @@
+"""
+Batch room lookups for lists of rooms (search results, room cards, recents)
+Resolves up to MAX_BATCH_ROOMS rooms with one in_bulk query, with saved
+state from the user's cached saved set, so a page of rooms costs one request.
+"""
+from typing import Dict, Iterable, List
+
+from .models import Room
+from .room_detail import room_summary
+from .room_ratings import MAX_BATCH_ROOMS, summary_to_dict
+from .saved_rooms import get_saved_room_ids
+
+
+BATCH_INCLUDES = ('summary', 'saved', 'rating')
+DEFAULT_BATCH_INCLUDES = ('summary',)
+
+
+def parse_room_ids(value: str, limit: int = MAX_BATCH_ROOMS) -> List[int]:
+    """Parse a comma-separated ?ids= value, keeping order and dropping duplicates
+
+    Raises ValueError for non-numeric ids or more than limit rooms.
+    """
+    try:
+        room_ids = list(dict.fromkeys(int(room_id) for room_id in value.split(',') if room_id.strip()))
+    except ValueError:
+        raise ValueError('ids must be a comma-separated list of room ids')
+    if len(room_ids) > limit:
+        raise ValueError(f'At most {limit} rooms per request')
+    return room_ids
+
+
+def parse_includes(value: str) -> tuple:
+    """Parse an ?include= value, raising ValueError for unknown names"""
+    if not value:
+        return DEFAULT_BATCH_INCLUDES
+    includes = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in includes if name not in BATCH_INCLUDES]
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(unknown)}. Choose from {', '.join(BATCH_INCLUDES)}")
+    return includes
+
+
+def get_room_batch(room_ids: Iterable[int], includes: Iterable[str], user) -> Dict:
+    """Look up many rooms at once
+
+    Returns a dict with 'rooms' (per-room dicts keyed by room id, holding
+    the keys of each include) and 'missing' (requested ids that don't exist).
+    """
+    room_ids = list(room_ids)
+    related = ['floor', 'profile']
+    if 'rating' in includes:
+        related.append('rating_summary')
+    rooms = Room.objects.select_related(*related).in_bulk(room_ids) if room_ids else {}
+
+    saved_ids = set()
+    if 'saved' in includes and user.is_authenticated:
+        saved_ids = get_saved_room_ids(user.id)
+
+    results = {}
+    for room_id in room_ids:
+        room = rooms.get(room_id)
+        if room is None:
+            continue
+        result = {'id': room.id}
+        if 'summary' in includes:
+            result.update(room_summary(room))
+        if 'saved' in includes:
+            result['is_saved'] = room.id in saved_ids
+        if 'rating' in includes:
+            result.update(summary_to_dict(getattr(room, 'rating_summary', None)))
+        results[room_id] = result
+
+    return {
+        'rooms': results,
+        'missing': [room_id for room_id in room_ids if room_id not in rooms],
+    }
@@ -0,0 +1,96 @@
+"""
+Composite room payload for the room modal
+Details, coordinates, photos, the rating summary and the first page of
+feedback come from one select_related query (plus the feedback queries when
+requested), so opening a room takes one request instead of three. Clients
+pick the parts they render with ?fields=.
+"""
+import json
+from typing import Dict, Iterable
+
+from .models import Room
+from .room_ratings import get_feedback_listing, summary_to_dict
+
+
+ROOM_DETAIL_FIELDS = ('details', 'coordinates', 'photos', 'ratings', 'feedback')
+DEFAULT_ROOM_DETAIL_FIELDS = ('details', 'coordinates', 'photos', 'ratings')
+
+
+def parse_fields(value: str) -> tuple:
+    """Parse a ?fields= value, raising ValueError for unknown names"""
+    if not value:
+        return DEFAULT_ROOM_DETAIL_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in ROOM_DETAIL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(ROOM_DETAIL_FIELDS)}")
+    return fields
+
+
+def get_room(room_id: int) -> Room:
+    """Load a room with its profile, floor and rating summary in one query"""
+    return Room.objects.select_related('profile', 'floor', 'rating_summary').get(id=room_id)
+
+
+def _coordinates(profile) -> Dict:
+    """Room coordinates with every field present, even if 0 or None"""
+    coordinates = profile.coordinates if profile else None
+    if not coordinates:
+        return {}
+    try:
+        coordinates = json.loads(coordinates) if isinstance(coordinates, str) else coordinates
+    except ValueError as e:
+        print(f"Error parsing coordinates for room {profile.room_id}: {str(e)}")
+        return {}
+    if isinstance(coordinates, dict):
+        return {key: coordinates.get(key) for key in ('x', 'y', 'z', 'width', 'height')}
+    return coordinates
+
+
+def room_summary(room: Room) -> Dict:
+    """Name, number, type, location and first photo of a room loaded with profile and floor
+
+    Shared by room cards (the batch lookup) and the modal's details, so
+    both always show the same fields.
+    """
+    profile = getattr(room, 'profile', None)
+    images = profile.get_images() if profile else []
+    return {
+        'name': profile.name if profile else '',
+        'number': profile.number if profile else '',
+        'type': profile.type if profile else '',
+        'floor': room.floor.name,
+        'floor_id': room.floor_id,
+        'building': room.floor.building,
+        'image_url': images[0] if images else None,
+    }
+
+
+def build_room_detail(room: Room, fields: Iterable[str], user) -> Dict:
+    """Build the composite payload for the selected fields
+
+    Each field adds its keys at the top level, named as in the single-purpose
+    room, photos and ratings endpoints, so the payload can stand in for any
+    of their responses.
+    """
+    profile = getattr(room, 'profile', None)
+    images = profile.get_images() if profile else []
+    payload = {'status': 'success', 'id': room.id}
+
+    if 'details' in fields:
+        payload.update(room_summary(room))
+        payload['description'] = profile.description if profile else ''
+    if 'coordinates' in fields:
+        payload['coordinates'] = _coordinates(profile)
+    if 'photos' in fields:
+        payload['photos'] = [{
+            'id': idx,
+            'url': image_url,
+            'caption': f'Room Photo {idx + 1}'
+        } for idx, image_url in enumerate(images)]
+    if 'ratings' in fields:
+        payload.update(summary_to_dict(getattr(room, 'rating_summary', None)))
+    if 'feedback' in fields:
+        payload.update(get_feedback_listing(room.id, user))
+
+    return payload
@@ -7,11 +7,95 @@ from django.conf import settings
 from typing import Dict, Optional
 
 
+class CoordinateMatch:
+    """Result of a coordinate lookup: the coordinates, the CSV key and how it matched"""
+    def __init__(self, coords: Dict[str, float], csv_key: str, strategy: str):
+        self.coords = coords
+        self.csv_key = csv_key
+        self.strategy = strategy
+    
+    def __repr__(self):
+        return f"CoordinateMatch(key={self.csv_key}, strategy={self.strategy})"
+
+
+class RoomCoordinateResolver:
+    """Resolves SVG room IDs / room numbers to Room_coords.csv coordinates
+    
+    Precomputes a suffix index over the CSV keys so the "key ends with the
+    room number" fallback is a dict lookup instead of a scan over every CSV
+    row. The suffix index keeps the first key (in CSV order) for each
+    suffix, matching the old linear scan.
+    """
+    
+    EXACT = 'exact'
+    ROOM_NUMBER = 'room_number'
+    MAPPED_ROOM_NUMBER = 'mapped_room_number'
+    TRUNCATED_DIGITS = 'truncated_digits'
+    SUFFIX = 'suffix'
+    
+    def __init__(self, coords_map: Dict[str, Dict[str, float]],
+                 room_number_to_id: Optional[Dict[str, str]] = None):
+        self.coords_map = coords_map
+        self.room_number_to_id = room_number_to_id or {}
+        self._suffix_index = {}
+        for key in coords_map:
+            for i in range(len(key) + 1):
+                self._suffix_index.setdefault(key[i:], key)
+    
+    def __len__(self):
+        return len(self.coords_map)
+    
+    def _match(self, key: Optional[str], strategy: str) -> Optional[CoordinateMatch]:
+        if key is not None and key in self.coords_map:
+            return CoordinateMatch(self.coords_map[key], key, strategy)
+        return None
+    
+    def by_key(self, key: str, strategy: str = EXACT) -> Optional[CoordinateMatch]:
+        """Exact lookup of a CSV key"""
+        return self._match(key, strategy)
+    
+    def by_mapped_room_number(self, room_number: str) -> Optional[CoordinateMatch]:
+        """Look up a room number (e.g. "720") via its full Room Id from DataDicForSVG.csv"""
+        return self._match(self.room_number_to_id.get(room_number), self.MAPPED_ROOM_NUMBER)
+    
+    def by_truncated_digits(self, room_id: str, floor_number: Optional[int]) -> Optional[CoordinateMatch]:
+        """Look up the last 3 (floors 1-9) or 4 (floors 10+) digits of a room ID"""
+        if not floor_number:
+            return None
+        extracted = room_id[-3:] if floor_number <= 9 else room_id[-4:]
+        return self._match(extracted, self.TRUNCATED_DIGITS)
+    
+    def by_suffix(self, suffix: str) -> Optional[CoordinateMatch]:
+        """Find the first CSV key ending with the given string"""
+        return self._match(self._suffix_index.get(str(suffix)), self.SUFFIX)
+    
+    def resolve_svg_element(self, room_id: str, floor_number: Optional[int]) -> Optional[CoordinateMatch]:
+        """Resolve an SVG element ID, as done by SVGParser
+        
+        Order: mapped room number, exact key, truncated digits, suffix.
+        """
+        return (self.by_mapped_room_number(room_id)
+                or self.by_key(room_id)
+                or self.by_truncated_digits(room_id, floor_number)
+                or self.by_suffix(room_id))
+    
+    def resolve_room(self, svg_room_id: str, room_number: str) -> Optional[CoordinateMatch]:
+        """Resolve a parsed room, as done when creating rooms from a floor SVG
+        
+        Order: exact SVG ID, extracted room number, room number suffix.
+        """
+        return (self.by_key(svg_room_id)
+                or self.by_key(room_number, self.ROOM_NUMBER)
+                or self.by_suffix(room_number))
+
+
 class RoomNameManager:
     """Manages room name mapping from CSV files"""
     
     _room_names_cache = None
     _room_coords_cache = None
+    _room_number_to_id_cache = None
+    _coordinate_resolver = None
     _csv_file_path = None
     _coords_file_path = None
     
@@ -182,10 +266,55 @@ class RoomNameManager:
         room_coords = RoomNameManager.load_room_coordinates()
         return room_coords.get(room_number)
     
+    @staticmethod
+    def load_room_number_to_id_map() -> Dict[str, str]:
+        """Load the Room Number -> Room Id mapping from DataDicForSVG.csv
+        
+        This allows matching SVG element IDs (which are room numbers like '720')
+        to their full Room IDs (like '10721') for coordinate lookup.
+        """
+        if RoomNameManager._room_number_to_id_cache is not None:
+            return RoomNameManager._room_number_to_id_cache
+        
+        room_number_to_id = {}
+        csv_file = RoomNameManager.get_csv_file_path()
+        
+        if csv_file:
+            try:
+                with open(csv_file, 'r', encoding='utf-8') as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        if not row or not row.get('Room Number') or not row.get('Room Id'):
+                            continue
+                        
+                        room_number = row.get('Room Number', '').strip()
+                        room_id = row.get('Room Id', '').strip()
+                        
+                        if room_number and room_id:
+                            # Example: "720" -> "10721"
+                            room_number_to_id[room_number] = room_id
+            except Exception as e:
+                print(f"Warning: Error building room number to ID mapping: {str(e)}")
+        
+        RoomNameManager._room_number_to_id_cache = room_number_to_id
+        return room_number_to_id
+    
+    @staticmethod
+    def get_coordinate_resolver() -> RoomCoordinateResolver:
+        """Get the shared coordinate resolver built over Room_coords.csv"""
+        if RoomNameManager._coordinate_resolver is None:
+            RoomNameManager._coordinate_resolver = RoomCoordinateResolver(
+                RoomNameManager.load_room_coordinates(),
+                RoomNameManager.load_room_number_to_id_map()
+            )
+        return RoomNameManager._coordinate_resolver
+    
     @staticmethod
     def clear_cache():
         """Clear the cache (useful for testing or after CSV updates)"""
         RoomNameManager._room_names_cache = None
         RoomNameManager._room_coords_cache = None
+        RoomNameManager._room_number_to_id_cache = None
+        RoomNameManager._coordinate_resolver = None
         RoomNameManager._csv_file_path = None
         RoomNameManager._coords_file_path = None
@@ -0,0 +1,158 @@
+"""
+Room rating summaries and paginated room feedback
+Each room's rating count, sum and 1-5 star histogram live in
+RoomRatingSummary, adjusted by feedback signals on every rating change, so
+averages never require reading the room's feedback. Feedback listings are
+keyset-paginated on (creation_date, id), newest first.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import F, Q
+
+from .models import Feedback, RoomRatingSummary
+
+
+FEEDBACK_PAGE_SIZE = 10
+MAX_FEEDBACK_PAGE_SIZE = 50
+MAX_BATCH_ROOMS = 200  # Rooms per summary batch request
+RATING_VALUES = range(1, 6)
+
+
+def _rating_delta(rating: int, step: int) -> Dict:
+    """F() updates that add (step=1) or remove (step=-1) one rating"""
+    delta = {
+        'rating_count': F('rating_count') + step,
+        'rating_sum': F('rating_sum') + step * rating,
+    }
+    if rating in RATING_VALUES:
+        delta[f'stars_{rating}'] = F(f'stars_{rating}') + step
+    return delta
+
+
+def apply_rating_change(old: Optional[Tuple[int, int]] = None, new: Optional[Tuple[int, int]] = None):
+    """Move a rating between room summaries
+
+    old and new are (room_id, rating) pairs; old is None for a new rating and
+    new is None for a deleted one. Updates are single UPDATE statements, so
+    concurrent ratings of the same room don't overwrite each other.
+    """
+    if old == new:
+        return
+    if old is not None:
+        RoomRatingSummary.objects.filter(room_id=old[0], rating_count__gt=0).update(**_rating_delta(old[1], -1))
+    if new is not None:
+        RoomRatingSummary.objects.get_or_create(room_id=new[0])
+        RoomRatingSummary.objects.filter(room_id=new[0]).update(**_rating_delta(new[1], 1))
+
+
+def summary_to_dict(summary: Optional[RoomRatingSummary]) -> Dict:
+    """Serialize a room summary (or None for an unrated room) for the API"""
+    if summary is None:
+        return {
+            'total_ratings': 0,
+            'average_rating': 0,
+            'histogram': {str(value): 0 for value in RATING_VALUES},
+        }
+    return {
+        'total_ratings': summary.rating_count,
+        'average_rating': round(summary.average_rating, 1),
+        'histogram': summary.histogram,
+    }
+
+
+def get_rating_summary(room_id: int) -> Dict:
+    """Get one room's total_ratings, average_rating and histogram"""
+    return summary_to_dict(RoomRatingSummary.objects.filter(room_id=room_id).first())
+
+
+def get_rating_summaries(room_ids: Iterable[int]) -> Dict[int, Dict]:
+    """Get rating summaries for many rooms in one query, keyed by room id
+
+    Rooms without ratings get an empty summary.
+    """
+    room_ids = list(room_ids)
+    summaries = {summary.room_id: summary for summary in RoomRatingSummary.objects.filter(room_id__in=room_ids)}
+    return {room_id: summary_to_dict(summaries.get(room_id)) for room_id in room_ids}
+
+
+def encode_cursor(feedback: Feedback) -> str:
+    """Encode a feedback's (creation_date, id) position as an opaque URL-safe string"""
+    raw = json.dumps([feedback.creation_date.isoformat(), feedback.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        creation_date, feedback_id = json.loads(raw)
+        return datetime.fromisoformat(creation_date), int(feedback_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid feedback cursor: {cursor}") from e
+
+
+def get_feedback_page(room_id: int, cursor: Optional[str] = None, page_size: int = FEEDBACK_PAGE_SIZE) -> Dict:
+    """Get one page of a room's feedback, newest first, starting after the cursor
+
+    Returns a dict with 'feedbacks' (Feedback objects with user and profile
+    loaded) and 'next_cursor', which is None on the last page.
+    """
+    page_size = max(1, min(page_size, MAX_FEEDBACK_PAGE_SIZE))
+    feedbacks = Feedback.objects.filter(room_id=room_id).select_related('user__profile')
+    if cursor:
+        creation_date, feedback_id = decode_cursor(cursor)
+        feedbacks = feedbacks.filter(
+            Q(creation_date__lt=creation_date) | Q(creation_date=creation_date, id__lt=feedback_id)
+        )
+
+    rows = list(feedbacks.order_by('-creation_date', '-id')[:page_size + 1])
+    page = rows[:page_size]
+    return {
+        'feedbacks': page,
+        'next_cursor': encode_cursor(page[-1]) if len(rows) > page_size else None,
+    }
+
+
+def feedback_to_dict(feedback: Feedback, user) -> Dict:
+    """Serialize a feedback loaded with user__profile, as shown to the given user"""
+    profile = getattr(feedback.user, 'profile', None)
+    return {
+        'id': feedback.id,
+        'rating': feedback.rating,
+        'comment': feedback.comment,
+        'user': feedback.user.display_name(),
+        'date': feedback.creation_date.strftime('%Y-%m-%d %H:%M'),
+        'created_at': feedback.creation_date.isoformat(),
+        'updated_at': feedback.updated_at.isoformat(),
+        'user_type': feedback.user.get_type_display(),
+        'profile_picture': profile.profile_pic.url if profile and profile.profile_pic else None,
+        'is_own_feedback': user.is_authenticated and feedback.user_id == user.id
+    }
+
+
+def get_feedback_listing(room_id: int, user, cursor: Optional[str] = None, page_size: int = FEEDBACK_PAGE_SIZE) -> Dict:
+    """Get a page of serialized feedback plus the user's own rating of the room
+
+    Raises ValueError for a malformed cursor.
+    """
+    page = get_feedback_page(room_id, cursor, page_size)
+
+    user_rating = None
+    if user.is_authenticated:
+        user_feedback = Feedback.objects.filter(room_id=room_id, user=user).first()
+        if user_feedback:
+            user_rating = {
+                'id': user_feedback.id,
+                'rating': user_feedback.rating,
+                'comment': user_feedback.comment
+            }
+
+    return {
+        'feedbacks': [feedback_to_dict(feedback, user) for feedback in page['feedbacks']],
+        'next_cursor': page['next_cursor'],
+        'user_rating': user_rating,
+        'is_authenticated': user.is_authenticated
+    }
@@ -0,0 +1,509 @@
+"""
+In-process search index for rooms and floors
+Backs /api/search-rooms/ with precomputed lookup tables so search-as-you-type
+never has to scan RoomProfile rows in Python or hit the database.
+"""
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.db.models import Count, F
+
+from .http_cache import bump_cache_version, get_cache_version
+from .models import Floor, RoomProfile
+
+
+VERSION_CACHE_KEY = 'room_search:version'
+
+# Match scores, highest first
+SCORE_EXACT_NUMBER = 100
+SCORE_EXACT_DIGITS = 90
+SCORE_NUMBER_PREFIX = 80
+SCORE_NUMBER_SUFFIX = 70
+SCORE_NAME_TOKEN = 60
+SCORE_NAME_PREFIX = 50
+SCORE_SUBSTRING = 40
+SCORE_NUMBER_TYPO = 30
+SCORE_NAME_TYPO = 20
+
+TYPO_SIMILARITY_THRESHOLD = 0.4
+
+
+def normalize_number(value: str) -> str:
+    """Normalize a room number for matching (e.g., "10-05" / "10 05" -> "1005")"""
+    return (value or '').replace('-', '').replace(' ', '').upper()
+
+
+def digits_only(value: str) -> str:
+    """Keep only the digits of a room number (e.g., "HPSB 1005" -> "1005")"""
+    return re.sub(r'[^0-9]', '', value or '')
+
+
+def tokenize(value: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return re.findall(r'[a-z0-9]+', (value or '').lower())
+
+
+def trigrams(value: str) -> Set[str]:
+    """Get the set of character trigrams of a string"""
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Check if two strings differ by at most one insert, delete, substitution or swap"""
+    if a == b:
+        return True
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > 1:
+        return False
+
+    if len_a == len_b:
+        diffs = [i for i in range(len_a) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        # Adjacent transposition, e.g. "1050" vs "1005"
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+
+    if len_a > len_b:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def deletions(value: str) -> Set[str]:
+    """Get the strings one character deletion away from a string"""
+    return {value[:i] + value[i + 1:] for i in range(len(value))}
+
+
+def padded_trigrams(value: str) -> Set[str]:
+    """Get the trigrams of a word padded with spaces, so short words still have some"""
+    return trigrams(f" {value} ")
+
+
+def floor_grams(value: str) -> Set[str]:
+    """Get every substring of one to three characters of a string"""
+    return {value[i:i + n] for n in (1, 2, 3) for i in range(len(value) - n + 1)}
+
+
+class _KeyIndex:
+    """Maps string keys to room ids with prefix and suffix lookup via bisect
+
+    With ``fuzzy=True`` it also keeps a deletion neighbourhood (every key
+    and its one-deletion variants -> keys) and a trigram -> keys table, so
+    one-edit and trigram-similar keys are found by lookup instead of by
+    comparing the query against every key.
+    """
+
+    def __init__(self, fuzzy: bool = False):
+        self.postings: Dict[str, Set[int]] = {}
+        self.fuzzy = fuzzy
+        self._neighbours: Dict[str, Set[str]] = {}  # key or one-deletion variant -> keys
+        self._key_trigrams: Dict[str, Set[str]] = {}  # padded trigram -> keys
+        self._sorted_keys: Optional[List[str]] = None
+        self._sorted_reversed: Optional[List[str]] = None
+
+    def add(self, key: str, room_id: int):
+        if not key:
+            return
+        ids = self.postings.setdefault(key, set())
+        if not ids:
+            self._sorted_keys = self._sorted_reversed = None
+            if self.fuzzy:
+                self._link_key(key)
+        ids.add(room_id)
+
+    def remove(self, key: str, room_id: int):
+        ids = self.postings.get(key)
+        if not ids:
+            return
+        ids.discard(room_id)
+        if not ids:
+            del self.postings[key]
+            self._sorted_keys = self._sorted_reversed = None
+            if self.fuzzy:
+                self._unlink_key(key)
+
+    def _link_key(self, key: str):
+        for variant in deletions(key) | {key}:
+            self._neighbours.setdefault(variant, set()).add(key)
+        for gram in padded_trigrams(key):
+            self._key_trigrams.setdefault(gram, set()).add(key)
+
+    def _unlink_key(self, key: str):
+        for table, entries in ((self._neighbours, deletions(key) | {key}),
+                               (self._key_trigrams, padded_trigrams(key))):
+            for entry in entries:
+                keys = table.get(entry)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del table[entry]
+
+    def within_one_edit(self, query: str) -> Set[str]:
+        """Keys at most one insert, delete, substitution or swap away from the query
+
+        Two strings within one edit always share the original or a
+        one-deletion variant, so the candidates come from the deletion
+        neighbourhood and only those are checked.
+        """
+        candidates = set()
+        for variant in deletions(query) | {query}:
+            candidates.update(self._neighbours.get(variant, ()))
+        return {key for key in candidates if within_one_edit(key, query)}
+
+    def similar(self, query: str, threshold: float) -> Set[str]:
+        """Keys whose padded trigram Jaccard similarity to the query is at least ``threshold``"""
+        query_grams = padded_trigrams(query)
+        overlap: Dict[str, int] = {}
+        for gram in query_grams:
+            for key in self._key_trigrams.get(gram, ()):
+                overlap[key] = overlap.get(key, 0) + 1
+        return {
+            key for key, shared in overlap.items()
+            if shared / (len(query_grams) + len(padded_trigrams(key)) - shared) >= threshold
+        }
+
+    def exact(self, key: str) -> Set[int]:
+        return self.postings.get(key, set())
+
+    def _range(self, sorted_keys: List[str], prefix: str) -> Iterable[str]:
+        start = bisect_left(sorted_keys, prefix)
+        for i in range(start, len(sorted_keys)):
+            if not sorted_keys[i].startswith(prefix):
+                break
+            yield sorted_keys[i]
+
+    def prefix(self, prefix: str) -> Iterable[str]:
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.postings)
+        return self._range(self._sorted_keys, prefix)
+
+    def suffix(self, suffix: str) -> Iterable[str]:
+        if self._sorted_reversed is None:
+            self._sorted_reversed = sorted(key[::-1] for key in self.postings)
+        return (key[::-1] for key in self._range(self._sorted_reversed, suffix[::-1]))
+
+
+class RoomSearchIndex:
+    """Ranked room search over normalized numbers, digits, name tokens and trigrams
+
+    The index is built lazily from the database, kept current by model
+    signals through refresh_rooms()/refresh_floor(), and rebuilt from
+    scratch whenever the shared version key moves (e.g. another worker
+    process changed room data).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.version = None
+
+    def _reset(self):
+        self.rooms: Dict[int, Dict] = {}  # room_id -> result dict + index keys
+        self.floors: Dict[int, Dict] = {}  # floor_id -> floor result + search text
+        self.floor_grams: Dict[str, Set[int]] = {}  # 1-3 character substrings of floor text
+        self.numbers = _KeyIndex()  # normalized numbers
+        self.building_numbers = _KeyIndex()  # numbers with building prefix, e.g. "HPSB1005"
+        self.digits = _KeyIndex(fuzzy=True)  # digit-only numbers
+        self.tokens = _KeyIndex(fuzzy=True)  # lowercase name tokens
+        self.name_trigrams: Dict[str, Set[int]] = {}  # trigrams of lowercased name and number
+
+    # ---- Building ----
+
+    def _room_keys(self, profile: Dict) -> Dict:
+        number = profile['number'] or ''
+        name = profile['name'] or ''
+        building = normalize_number(profile['building'])
+        normalized = normalize_number(number)
+        search_text = f"{name.lower()} {number.lower()}"
+        return {
+            'numbers': {normalized} - {''},
+            'building_numbers': {f"{building}{normalized}"} if normalized else set(),
+            'digits': {digits_only(number)} - {''},
+            'tokens': set(tokenize(name)),
+            'trigrams': trigrams(search_text),
+            'search_text': search_text,
+        }
+
+    def _add_room(self, profile: Dict):
+        room_id = profile['room_id']
+        keys = self._room_keys(profile)
+        for key in keys['numbers']:
+            self.numbers.add(key, room_id)
+        for key in keys['building_numbers']:
+            self.building_numbers.add(key, room_id)
+        for key in keys['digits']:
+            self.digits.add(key, room_id)
+        for key in keys['tokens']:
+            self.tokens.add(key, room_id)
+        for gram in keys['trigrams']:
+            self.name_trigrams.setdefault(gram, set()).add(room_id)
+
+        self.rooms[room_id] = {
+            'keys': keys,
+            'sort_key': keys['search_text'],
+            'result': {
+                'id': room_id,
+                'type': 'room',
+                'name': profile['name'],
+                'number': profile['number'],
+                'building': profile['building'],
+                'floor': profile['floor_name'],
+                'floor_id': profile['floor_id'],
+                'room_type': profile['type'],
+                'description': profile['description'][:100] if profile['description'] else ''
+            }
+        }
+
+    def _remove_room(self, room_id: int):
+        entry = self.rooms.pop(room_id, None)
+        if entry is None:
+            return
+        keys = entry['keys']
+        for key in keys['numbers']:
+            self.numbers.remove(key, room_id)
+        for key in keys['building_numbers']:
+            self.building_numbers.remove(key, room_id)
+        for key in keys['digits']:
+            self.digits.remove(key, room_id)
+        for key in keys['tokens']:
+            self.tokens.remove(key, room_id)
+        for gram in keys['trigrams']:
+            ids = self.name_trigrams.get(gram)
+            if ids is not None:
+                ids.discard(room_id)
+                if not ids:
+                    del self.name_trigrams[gram]
+
+    def _profile_rows(self, **filters):
+        return RoomProfile.objects.filter(**filters).values(
+            'room_id', 'number', 'name', 'type', 'description',
+            floor_id=F('room__floor_id'),
+            floor_name=F('room__floor__name'),
+            building=F('room__floor__building'),
+        )
+
+    def _floor_rows(self, **filters):
+        return Floor.objects.filter(**filters).annotate(room_count=Count('rooms')).values(
+            'id', 'name', 'building', 'room_count'
+        )
+
+    def _add_floor(self, floor: Dict):
+        search_text = f"{floor['name'].lower()}\n{floor['building'].lower()}"
+        for gram in floor_grams(search_text):
+            self.floor_grams.setdefault(gram, set()).add(floor['id'])
+        self.floors[floor['id']] = {
+            'search_text': search_text,
+            'result': {
+                'id': floor['id'],
+                'type': 'floor',
+                'name': floor['name'],
+                'building': floor['building'],
+                'room_count': floor['room_count']
+            }
+        }
+
+    def _remove_floor(self, floor_id: int):
+        entry = self.floors.pop(floor_id, None)
+        if entry is None:
+            return
+        for gram in floor_grams(entry['search_text']):
+            ids = self.floor_grams.get(gram)
+            if ids is not None:
+                ids.discard(floor_id)
+                if not ids:
+                    del self.floor_grams[gram]
+
+    def rebuild(self):
+        """Rebuild the whole index (two queries)"""
+        with self._lock:
+            version = get_index_version()
+            self._reset()
+            for profile in self._profile_rows():
+                self._add_room(profile)
+            for floor in self._floor_rows():
+                self._add_floor(floor)
+            self.version = version
+
+    def ensure_current(self):
+        """Rebuild if the index was never built or the shared version moved"""
+        if not self._is_current():
+            self.rebuild()
+
+    def refresh_rooms(self, room_ids: Iterable[int]):
+        """Re-index the given rooms, dropping any that no longer exist"""
+        room_ids = set(room_ids)
+        with self._lock:
+            if self._is_current():
+                for room_id in room_ids:
+                    self._remove_room(room_id)
+                for profile in self._profile_rows(room_id__in=room_ids):
+                    self._add_room(profile)
+            self._mark_changed()
+
+    def refresh_floors(self, floor_ids: Iterable[int], include_rooms: bool = False):
+        """Re-index floors (name, building, room count) and optionally their rooms"""
+        floor_ids = set(floor_ids)
+        with self._lock:
+            if self._is_current():
+                for floor_id in floor_ids:
+                    self._remove_floor(floor_id)
+                for floor in self._floor_rows(id__in=floor_ids):
+                    self._add_floor(floor)
+
+                if include_rooms:
+                    stale = [room_id for room_id, entry in self.rooms.items()
+                             if entry['result']['floor_id'] in floor_ids]
+                    for room_id in stale:
+                        self._remove_room(room_id)
+                    for profile in self._profile_rows(room__floor_id__in=floor_ids):
+                        self._add_room(profile)
+            self._mark_changed()
+
+    def _is_current(self) -> bool:
+        return self.version is not None and self.version == get_index_version()
+
+    def _mark_changed(self):
+        """Bump the shared version after an incremental update
+
+        Other processes see the new version and rebuild on their next
+        search. This one stays current only if it applied the update to an
+        index that was already current; otherwise it rebuilds lazily too.
+        """
+        was_current = self._is_current()
+        version = bump_index_version()
+        self.version = version if was_current else None
+
+    # ---- Searching ----
+
+    def _match_name_tokens(self, query_tokens: List[str]) -> Dict[int, int]:
+        """Rooms whose name matches every query token, exactly or as a prefix"""
+        matched = None
+        for token in query_tokens:
+            token_scores = {}
+            for room_id in self.tokens.exact(token):
+                token_scores[room_id] = SCORE_NAME_TOKEN
+            for key in self.tokens.prefix(token):
+                for room_id in self.tokens.postings[key]:
+                    token_scores.setdefault(room_id, SCORE_NAME_PREFIX)
+
+            if matched is None:
+                matched = token_scores
+            else:
+                matched = {room_id: min(score, token_scores[room_id])
+                           for room_id, score in matched.items() if room_id in token_scores}
+            if not matched:
+                return {}
+        return matched or {}
+
+    def _match_substring(self, query_lower: str) -> Set[int]:
+        """Rooms whose name or number contains the query (needs 3+ characters)"""
+        grams = trigrams(query_lower)
+        if not grams:
+            return set()
+        postings = sorted((self.name_trigrams.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {room_id for room_id in candidates
+                if query_lower in self.rooms[room_id]['keys']['search_text']}
+
+    def _match_typos(self, normalized: str, numeric: str, query_tokens: List[str]) -> Dict[int, int]:
+        """Typo-tolerant matches: one-edit room numbers and trigram-similar name tokens"""
+        scores = {}
+        if len(numeric) >= 3:
+            for key in self.digits.within_one_edit(numeric):
+                for room_id in self.digits.postings[key]:
+                    scores[room_id] = SCORE_NUMBER_TYPO
+
+        for token in query_tokens:
+            if len(token) < 3:
+                continue
+            keys = self.tokens.similar(token, TYPO_SIMILARITY_THRESHOLD) | self.tokens.within_one_edit(token)
+            for key in keys:
+                for room_id in self.tokens.postings[key]:
+                    scores.setdefault(room_id, SCORE_NAME_TYPO)
+        return scores
+
+    def search_rooms(self, query: str, limit: int = 20) -> List[Dict]:
+        """Get ranked room results for a query"""
+        self.ensure_current()
+
+        normalized = normalize_number(query)
+        numeric = digits_only(query)
+        query_lower = query.lower().strip()
+        query_tokens = tokenize(query)
+
+        with self._lock:
+            scores: Dict[int, int] = {}
+
+            def award(room_ids, score):
+                for room_id in room_ids:
+                    if scores.get(room_id, 0) < score:
+                        scores[room_id] = score
+
+            award(self.numbers.exact(normalized), SCORE_EXACT_NUMBER)
+            if numeric:
+                award(self.digits.exact(numeric), SCORE_EXACT_DIGITS)
+
+            for key in self.numbers.prefix(normalized):
+                award(self.numbers.postings[key], SCORE_NUMBER_PREFIX)
+            for key in self.numbers.suffix(normalized):
+                award(self.numbers.postings[key], SCORE_NUMBER_SUFFIX)
+            if numeric:
+                # Building-prefixed forms only make sense once a number is typed,
+                # otherwise "HPS" would match every room in the building
+                award(self.building_numbers.exact(normalized), SCORE_EXACT_NUMBER)
+                for key in self.building_numbers.prefix(normalized):
+                    award(self.building_numbers.postings[key], SCORE_NUMBER_PREFIX)
+                for key in self.digits.prefix(numeric):
+                    award(self.digits.postings[key], SCORE_NUMBER_PREFIX)
+                for key in self.digits.suffix(numeric):
+                    award(self.digits.postings[key], SCORE_NUMBER_SUFFIX)
+
+            for room_id, score in self._match_name_tokens(query_tokens).items():
+                award([room_id], score)
+            award(self._match_substring(query_lower), SCORE_SUBSTRING)
+
+            # Only fall back to typo tolerance when nothing matched outright
+            if not scores:
+                for room_id, score in self._match_typos(normalized, numeric, query_tokens).items():
+                    award([room_id], score)
+
+            ranked = sorted(scores, key=lambda room_id: (-scores[room_id], self.rooms[room_id]['sort_key']))
+            return [self.rooms[room_id]['result'] for room_id in ranked[:limit]]
+
+    def search_floors(self, query: str, limit: int = 10) -> List[Dict]:
+        """Get floors whose name or building contains the query
+
+        Queries of up to three characters are answered directly from the
+        substring table; longer ones intersect the postings of their
+        trigrams and only check the floors left.
+        """
+        self.ensure_current()
+        query_lower = query.lower()
+        with self._lock:
+            if not query_lower:
+                floor_ids = set(self.floors)
+            elif len(query_lower) <= 3:
+                floor_ids = self.floor_grams.get(query_lower, set())
+            else:
+                postings = sorted((self.floor_grams.get(gram, set()) for gram in trigrams(query_lower)), key=len)
+                floor_ids = {floor_id for floor_id in set(postings[0]).intersection(*postings[1:])
+                             if query_lower in self.floors[floor_id]['search_text']}
+            return [self.floors[floor_id]['result'] for floor_id in sorted(floor_ids)[:limit]]
+
+
+def get_index_version() -> int:
+    """Get the shared index version, bumped whenever room data changes"""
+    return get_cache_version(VERSION_CACHE_KEY)
+
+
+def bump_index_version() -> int:
+    """Bump the shared index version so other processes rebuild"""
+    return bump_cache_version(VERSION_CACHE_KEY)
+
+
+room_search_index = RoomSearchIndex()
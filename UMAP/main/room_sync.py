@@ -0,0 +1,143 @@
+"""
+Bulk synchronization of a floor's rooms with rooms parsed from its SVG
+Loads the floor's existing room profiles once, diffs them against the parsed
+SVG rooms and writes all changes with bulk_create/bulk_update inside a single
+transaction, so a floor is never left half-written.
+"""
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+
+from .models import Floor, Room, RoomProfile
+
+
+UPDATE_FIELDS = ['coordinates', 'name', 'type', 'svg_room_id']
+BATCH_SIZE = 500
+PROGRESS_INTERVAL = 50  # Rooms between progress callbacks
+
+
+def get_room_name_and_type(svg_room, room_number: str) -> Tuple[str, str]:
+    """Determine room name and type from a parsed SVG room"""
+    if svg_room.room_name:
+        # Use name from CSV reference
+        return svg_room.room_name, svg_room.room_type or "Classroom"
+    if svg_room.room_type:
+        # Use room type if no CSV name available
+        return svg_room.room_type, svg_room.room_type
+    # Default fallback
+    return f"Room {room_number}", "Classroom"
+
+
+def sync_floor_rooms(floor: Floor, svg_rooms: Iterable, floor_number: int, coords_resolver,
+                     update_existing: bool = True, require_coords: bool = True,
+                     progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Create or update a floor's rooms from parsed SVG rooms in bulk
+
+    Args:
+        floor: Floor the rooms belong to
+        svg_rooms: Parsed SVGRoom objects (a list or the streaming generator)
+        floor_number: Floor number used to extract room numbers from SVG IDs
+        coords_resolver: RoomCoordinateResolver over Room_coords.csv
+        update_existing: Update rooms whose number already exists on the floor;
+            if False they are counted as skipped
+        require_coords: Skip rooms without a CSV coordinate match; if False
+            they are created with their SVG position and Z=0
+        progress_callback: Called with the report so far every
+            PROGRESS_INTERVAL parsed rooms
+
+    Returns:
+        Report dict with extracted, matched, created, updated and skipped
+        counts, the skipped rooms and a count of rooms per coordinate match
+        strategy.
+    """
+    from .views import extract_room_number
+
+    report = {
+        'extracted': 0,
+        'matched': 0,
+        'created': 0,
+        'updated': 0,
+        'skipped': 0,
+        'skipped_rooms': [],
+        'match_strategies': {},
+    }
+
+    # Existing profiles for the floor, keyed by room number (one query)
+    existing = {}
+    for profile in RoomProfile.objects.filter(room__floor=floor).order_by('room_id'):
+        existing.setdefault(profile.number, profile)
+
+    to_create = {}  # room number -> unsaved RoomProfile
+    to_update = {}  # room number -> existing RoomProfile
+
+    for svg_room in svg_rooms:
+        report['extracted'] += 1
+        if progress_callback and report['extracted'] % PROGRESS_INTERVAL == 0:
+            progress_callback(report)
+        room_number = extract_room_number(svg_room.room_id, floor_number)
+
+        profile = existing.get(room_number) or to_create.get(room_number)
+        if profile is not None and not update_existing:
+            report['skipped'] += 1
+            continue
+
+        coords_match = coords_resolver.resolve_room(svg_room.room_id, room_number)
+        if coords_match:
+            report['matched'] += 1
+            strategies = report['match_strategies']
+            strategies[coords_match.strategy] = strategies.get(coords_match.strategy, 0) + 1
+            coordinates = {
+                'x': coords_match.coords['x'],
+                'y': coords_match.coords['y'],
+                'z': coords_match.coords['z'],  # ✅ Z from CSV
+                'width': svg_room.width,
+                'height': svg_room.height
+            }
+        elif require_coords:
+            report['skipped'] += 1
+            report['skipped_rooms'].append({
+                'svg_id': svg_room.room_id,
+                'room_number': room_number
+            })
+            continue
+        else:
+            # Fallback: use SVG coordinates without Z
+            coordinates = {
+                'x': svg_room.x,
+                'y': svg_room.y,
+                'z': 0,  # Default Z value
+                'width': svg_room.width,
+                'height': svg_room.height
+            }
+
+        room_name, room_type = get_room_name_and_type(svg_room, room_number)
+
+        if profile is None:
+            profile = RoomProfile(number=room_number, description="")
+            to_create[room_number] = profile
+            report['created'] += 1
+        else:
+            if room_number in existing:
+                to_update[room_number] = profile
+            report['updated'] += 1
+
+        profile.coordinates = coordinates
+        profile.name = room_name
+        profile.type = room_type
+        profile.svg_room_id = svg_room.room_id
+
+    with transaction.atomic():
+        new_profiles = list(to_create.values())
+        rooms = Room.objects.bulk_create([Room(floor=floor) for _ in new_profiles], batch_size=BATCH_SIZE)
+        for room, profile in zip(rooms, new_profiles):
+            profile.room = room
+        RoomProfile.objects.bulk_create(new_profiles, batch_size=BATCH_SIZE)
+        RoomProfile.objects.bulk_update(list(to_update.values()), UPDATE_FIELDS, batch_size=BATCH_SIZE)
+
+        if new_profiles or to_update:
+            # Bulk writes skip model signals, so refresh cached room data explicitly
+            from .signals import rooms_bulk_changed
+            room_ids = [room.id for room in rooms] + [profile.room_id for profile in to_update.values()]
+            rooms_bulk_changed(room_ids, [floor.id])
+
+    return report
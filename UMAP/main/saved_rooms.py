@@ -0,0 +1,56 @@
+"""
+Per-user set of saved room ids
+Each user's saved room ids are loaded in one query and cached under a
+per-user version that SavedLocation signals bump once a save or unsave
+commits, so saved-state checks don't query the database. The set can also be sent as a bitmap over room ids.
+"""
+import base64
+from typing import Dict, Set
+
+from django.core.cache import cache
+
+from .http_cache import bump_cache_version, get_cache_version
+from .models import SavedLocation
+
+
+VERSION_CACHE_KEY = 'saved_rooms:version:{user_id}'
+SAVED_ROOMS_CACHE_KEY = 'saved_rooms:{user_id}:{version}'
+SAVED_ROOMS_TIMEOUT = 60 * 60
+
+
+def get_saved_room_ids(user_id: int) -> Set[int]:
+    """Get the ids of every room the user has saved
+
+    The version is read before the database, so a load racing a save or
+    unsave is cached under a version that the change has already moved past.
+    """
+    version = get_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+    key = SAVED_ROOMS_CACHE_KEY.format(user_id=user_id, version=version)
+    room_ids = cache.get(key)
+    if room_ids is None:
+        room_ids = set(SavedLocation.objects.filter(user_id=user_id).values_list('room_id', flat=True))
+        cache.set(key, room_ids, SAVED_ROOMS_TIMEOUT)
+    return room_ids
+
+
+def invalidate_saved_room_ids(user_id: int):
+    """Bump the user's saved rooms version so the next check reloads the set"""
+    bump_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+
+
+def encode_bitmap(room_ids: Set[int]) -> Dict:
+    """Encode room ids as a base64 bitmap
+
+    Bit i (least significant bit first within each byte) is set when room
+    offset + i is saved.
+    """
+    if not room_ids:
+        return {'offset': 0, 'length': 0, 'bitmap': ''}
+
+    offset = min(room_ids)
+    length = max(room_ids) - offset + 1
+    bits = bytearray((length + 7) // 8)
+    for room_id in room_ids:
+        position = room_id - offset
+        bits[position // 8] |= 1 << (position % 8)
+    return {'offset': offset, 'length': length, 'bitmap': base64.b64encode(bytes(bits)).decode('ascii')}
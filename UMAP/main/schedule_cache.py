@@ -0,0 +1,98 @@
+"""
+Per-user cache of the schedule JSON rendered by schedule_view
+Builds a user's schedule list in one query and keeps the serialized result
+under a per-user version that model signals bump whenever one of the
+user's schedules is added, changed, deleted or imported.
+"""
+import json
+from typing import Dict, List
+
+from django.core.cache import cache
+
+from .http_cache import bump_cache_version, get_cache_version
+from .models import Schedule
+
+
+VERSION_CACHE_KEY = 'schedule_json:version:{user_id}'
+JSON_CACHE_KEY = 'schedule_json:{user_id}:{version}'
+JSON_TIMEOUT = 60 * 60 * 24
+SCHEDULE_COLORS = ['blue', 'green', 'purple', 'red', 'yellow']
+
+
+def get_schedule_version(user_id: int) -> int:
+    """Get the user's schedule version"""
+    return get_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+
+
+def invalidate_user_schedule(user_id: int):
+    """Bump the user's schedule version so the next page view rebuilds the JSON
+
+    The version is the time of the change in nanoseconds, which doubles as
+    the Last-Modified time of the user's calendar feed.
+    """
+    bump_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+
+
+def get_schedule_last_modified(user_id: int) -> float:
+    """Get the time of the user's last schedule change as a Unix timestamp"""
+    return get_schedule_version(user_id) / 1e9
+
+
+def build_schedule_data(user) -> List[Dict]:
+    """Build the schedule items for the schedule page
+
+    Loads the schedules with their room profiles in one query and assigns
+    colors to schedules without a valid one in a single bulk update.
+    """
+    schedules = list(
+        Schedule.objects.filter(user=user).select_related('room__profile').order_by('start')
+    )
+
+    recolored = []
+    color_index = 0
+    for s in schedules:
+        # Assign a color if none is set
+        if not s.color or s.color not in SCHEDULE_COLORS:
+            s.color = SCHEDULE_COLORS[color_index]
+            color_index = (color_index + 1) % len(SCHEDULE_COLORS)
+            recolored.append(s)
+    if recolored:
+        Schedule.objects.bulk_update(recolored, ['color'])
+
+    schedule_data = []
+    for s in schedules:
+        # Get room number, falling back to TBA if not available
+        room_text = "TBA"
+        if s.room_text:
+            # Use the stored original room text (e.g., "HPSB 1009")
+            room_text = s.room_text
+        elif s.room_id:
+            try:
+                room_text = s.room.profile.number if hasattr(s.room, 'profile') else str(s.room)
+            except Exception:
+                pass
+
+        # Create schedule item with converted field names to match frontend
+        schedule_data.append({
+            "id": s.id,
+            "course_code": s.course_code or "",
+            "subject_name": s.subject or "",  # Convert subject → subject_name
+            "day": s.day,
+            "start_time": s.start.strftime('%H:%M') if s.start else '00:00',  # Convert start → start_time
+            "end_time": s.end.strftime('%H:%M') if s.end else '00:00',  # Convert end → end_time
+            "room": room_text,  # Use original room text or room number
+            "color": s.color or SCHEDULE_COLORS[0]  # Fallback to first color if none set
+        })
+    return schedule_data
+
+
+def get_schedule_json(user) -> str:
+    """Get the user's schedule JSON for the current version"""
+    cache_key = JSON_CACHE_KEY.format(user_id=user.id, version=get_schedule_version(user.id))
+
+    schedule_json = cache.get(cache_key)
+    if schedule_json is None:
+        schedule_json = json.dumps(build_schedule_data(user))
+        cache.set(cache_key, schedule_json, JSON_TIMEOUT)
+
+    return schedule_json
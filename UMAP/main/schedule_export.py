@@ -1,10 +1,19 @@
-from django.http import HttpResponse, FileResponse
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+from django.db.models import Case, IntegerField, Value, When
 from django.shortcuts import redirect
 from django.contrib import messages
-from .models import Schedule
+from .http_cache import bump_cache_version, conditional_response, get_cache_version
+from .models import CalendarFeedToken, Schedule
+from .schedule_cache import get_schedule_last_modified, get_schedule_version
 from openpyxl import Workbook
 from datetime import datetime, timedelta
+from functools import partial
+from io import BytesIO
 import os
 import tempfile
 from reportlab.lib import colors
@@ -14,18 +23,86 @@ from reportlab.lib.styles import getSampleStyleSheet
 import icalendar
 import pytz
 
+DAY_ORDER = {
+    'Monday': 0,
+    'Tuesday': 1,
+    'Wednesday': 2,
+    'Thursday': 3,
+    'Friday': 4,
+    'Saturday': 5,
+    'Sunday': 6
+}
+EXPORT_CACHE_KEY = 'schedule_export:{user_id}:{version}:{format_type}:{variant}'
+EXPORT_TIMEOUT = 60 * 60 * 24
+FEED_TOKEN_CACHE_KEY = 'schedule_feed:token:{token}'
+FEED_VERSION_CACHE_KEY = 'schedule_feed:version:{user_id}'
+FEED_TOKEN_TIMEOUT = 60 * 60
+STREAM_CHUNK_SIZE = 64 * 1024
+
 def _get_day_order(day):
     """Map day name to numeric order starting from Monday"""
-    day_order = {
-        'Monday': 0,
-        'Tuesday': 1,
-        'Wednesday': 2,
-        'Thursday': 3,
-        'Friday': 4,
-        'Saturday': 5,
-        'Sunday': 6
-    }
-    return day_order.get(day, 7)  # Return 7 for unknown days (sorts last)
+    return DAY_ORDER.get(day, 7)  # Return 7 for unknown days (sorts last)
+
+def _get_semester_start():
+    """Monday of the current week, where exported calendars start"""
+    now = datetime.now()
+    return (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _room_number(schedule):
+    """Room number shown in exports, from the room profile when there is one"""
+    return schedule.room.profile.number if hasattr(schedule.room, 'profile') else str(schedule.room)
+
+def get_export_schedules(user_id):
+    """Get the user's schedules with room profiles in one query, Monday first then by start time"""
+    day_order = Case(
+        *[When(day=day, then=Value(order)) for day, order in DAY_ORDER.items()],
+        default=Value(7),
+        output_field=IntegerField()
+    )
+    return list(
+        Schedule.objects.filter(user_id=user_id)
+        .select_related('room__profile')
+        .order_by(day_order, 'start', 'id')
+    )
+
+def get_export_content(user_id, username, format_type, allow_empty=False):
+    """Get the exported file bytes for the user's current schedule version
+
+    Exports are cached per user, format and schedule version, so repeated
+    downloads don't touch the database until the schedule changes.
+    Returns None if the user has no schedules, unless allow_empty is set.
+    The cache entry records whether the schedule was empty, so an empty
+    calendar cached for the feed is never served as a download.
+    """
+    builder = EXPORT_FORMATS[format_type][0]
+    # Calendar dates depend on the current week, so iCal entries also expire weekly
+    semester_start = _get_semester_start()
+    variant = semester_start.date().isoformat() if format_type == 'ical' else ''
+    cache_key = EXPORT_CACHE_KEY.format(
+        user_id=user_id, version=get_schedule_version(user_id), format_type=format_type, variant=variant
+    )
+
+    cached = cache.get(cache_key)
+    if cached is None:
+        schedules = get_export_schedules(user_id)
+        if not schedules and not allow_empty:
+            return None
+        if format_type == 'ical':
+            content = builder(schedules, username, semester_start)
+        else:
+            content = builder(schedules, username)
+        cached = (content, not schedules)
+        cache.set(cache_key, cached, EXPORT_TIMEOUT)
+
+    content, is_empty = cached
+    if is_empty and not allow_empty:
+        return None
+    return content
+
+def _stream_content(content):
+    """Yield exported bytes in chunks"""
+    for offset in range(0, len(content), STREAM_CHUNK_SIZE):
+        yield content[offset:offset + STREAM_CHUNK_SIZE]
 
 @login_required
 def export_schedule(request, format_type='excel'):
@@ -35,32 +112,33 @@ def export_schedule(request, format_type='excel'):
     - PDF
     - iCal (.ics)
     """
-    # Get schedules and sort by day order (Monday first) then by start time
-    schedules = Schedule.objects.filter(user=request.user)
-    schedules = sorted(schedules, key=lambda x: (_get_day_order(x.day), x.start))
-    
-    if not schedules:
-        messages.error(request, "No schedules found to export. Please add some schedules first.")
-        return redirect('schedule_view')
-    
-    if format_type == 'excel':
-        return _export_excel(schedules, request.user.username)
-    elif format_type == 'pdf':
-        return _export_pdf(schedules, request.user.username)
-    elif format_type == 'ical':
-        return _export_ical(schedules, request.user.username)
-    else:
+    if format_type not in EXPORT_FORMATS:
         messages.error(request, "Unsupported export format.")
         return redirect('schedule_view')
 
+    content = get_export_content(request.user.id, request.user.username, format_type)
+    if content is None:
+        messages.error(request, "No schedules found to export. Please add some schedules first.")
+        return redirect('schedule_view')
+
+    _, content_type, extension = EXPORT_FORMATS[format_type]
+    response = StreamingHttpResponse(_stream_content(content), content_type=content_type)
+    response['Content-Length'] = len(content)
+    response['Content-Disposition'] = f'attachment; filename=schedule_{request.user.username}.{extension}'
+    return response
+
 def _export_excel(schedules, username):
     """Export schedules to Excel format"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Class Schedule"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Class Schedule")
     
     # Headers
     headers = ["Day", "Course Code", "Subject Title", "Start Time", "End Time", "Room", "Color"]
+    
+    # Style the worksheet (write-only sheets need widths before any rows)
+    for column in range(1, len(headers) + 1):
+        ws.column_dimensions[chr(64 + column)].width = 15
+    
     ws.append(headers)
     
     # Data rows
@@ -71,33 +149,24 @@ def _export_excel(schedules, username):
             schedule.subject,
             schedule.start.strftime("%I:%M %p"),
             schedule.end.strftime("%I:%M %p"),
-            schedule.room.profile.number if hasattr(schedule.room, 'profile') else str(schedule.room),
+            _room_number(schedule),
             schedule.color
         ]
         ws.append(row)
     
-    # Style the worksheet
-    for column in range(1, len(headers) + 1):
-        ws.column_dimensions[chr(64 + column)].width = 15
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename=schedule_{username}.xlsx'
-    wb.save(response)
-    return response
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
 
 def _export_pdf(schedules, username):
     """Export schedules to PDF format"""
     from reportlab.lib.pagesizes import landscape, A4
     from reportlab.lib.units import inch
     
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename=schedule_{username}.pdf'
+    output = BytesIO()
     
     # Create PDF document with landscape orientation for better fit
-    doc = SimpleDocTemplate(response, pagesize=landscape(letter), 
+    doc = SimpleDocTemplate(output, pagesize=landscape(letter), 
                            topMargin=0.5*inch, bottomMargin=0.5*inch,
                            leftMargin=0.5*inch, rightMargin=0.5*inch)
     elements = []
@@ -116,7 +185,7 @@ def _export_pdf(schedules, username):
     
     for schedule in schedules:
         time_str = f"{schedule.start.strftime('%I:%M %p')} - {schedule.end.strftime('%I:%M %p')}"
-        room_info = schedule.room.profile.number if hasattr(schedule.room, 'profile') and schedule.room.profile else str(schedule.room)
+        room_info = _room_number(schedule)
         row = [
             schedule.day,
             schedule.course_code,
@@ -152,17 +221,15 @@ def _export_pdf(schedules, username):
     
     elements.append(table)
     doc.build(elements)
-    return response
+    return output.getvalue()
 
-def _export_ical(schedules, username):
-    """Export schedules to iCal format"""
+def _export_ical(schedules, username, semester_start):
+    """Export schedules to iCal format, starting from the given Monday"""
     cal = icalendar.Calendar()
     cal.add('prodid', '-//Campus Navigator//Class Schedule//')
     cal.add('version', '2.0')
     
-    # Get the current semester's start and end dates (approximate)
-    now = datetime.now()
-    semester_start = now - timedelta(days=now.weekday())  # Previous Monday
+    # Semester end date (approximate)
     semester_end = semester_start + timedelta(weeks=16)  # 16-week semester
     
     # Time zone
@@ -173,17 +240,13 @@ def _export_ical(schedules, username):
         event = icalendar.Event()
         
         # Basic event info
-        room_number = schedule.room.profile.number if hasattr(schedule.room, 'profile') else str(schedule.room)
+        room_number = _room_number(schedule)
         event.add('summary', f"{schedule.course_code} - {schedule.subject}")
         event.add('location', room_number)
         event.add('description', f"Course: {schedule.subject}\\nRoom: {room_number}")
         
         # Convert day string to number (0 = Monday)
-        day_map = {
-            'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
-            'Friday': 4, 'Saturday': 5, 'Sunday': 6
-        }
-        day_num = day_map[schedule.day]
+        day_num = DAY_ORDER[schedule.day]
         
         # First occurrence of the class
         first_class = semester_start + timedelta(days=day_num)
@@ -209,7 +272,92 @@ def _export_ical(schedules, username):
         
         cal.add_component(event)
     
-    # Create response
-    response = HttpResponse(cal.to_ical(), content_type='text/calendar')
-    response['Content-Disposition'] = f'attachment; filename=schedule_{username}.ics'
-    return response
\ No newline at end of file
+    return cal.to_ical()
+
+
+# format_type -> (builder, content type, file extension)
+EXPORT_FORMATS = {
+    'excel': (_export_excel, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'pdf': (_export_pdf, 'application/pdf', 'pdf'),
+    'ical': (_export_ical, 'text/calendar', 'ics'),
+}
+
+
+def _lookup_feed_owner(token):
+    return CalendarFeedToken.objects.filter(token=token).values_list('user_id', 'user__username').first()
+
+
+def _get_feed_owner(token):
+    """Get (user_id, username) for a calendar feed token, or None
+
+    The lookup is cached in the shared cache together with the owner's
+    feed version, which revoking the URL bumps, so a revoked token stops
+    working in every process at once. On a miss the token is looked up
+    again after reading the version: a revocation that commits after that
+    second lookup also bumps the version after it, so the entry can never
+    outlive the revocation.
+    """
+    cache_key = FEED_TOKEN_CACHE_KEY.format(token=token)
+    cached = caches['shared'].get(cache_key)
+    if cached is not None:
+        owner, version = cached
+        if version == get_cache_version(FEED_VERSION_CACHE_KEY.format(user_id=owner[0])):
+            return owner
+
+    owner = _lookup_feed_owner(token)
+    if owner is None:
+        return None
+    version = get_cache_version(FEED_VERSION_CACHE_KEY.format(user_id=owner[0]))
+    owner = _lookup_feed_owner(token)
+    if owner is not None:
+        caches['shared'].set(cache_key, (owner, version), FEED_TOKEN_TIMEOUT)
+    return owner
+
+@require_http_methods(["GET", "HEAD"])
+def schedule_ical_feed(request, token):
+    """Subscribable iCal feed of a user's schedule, authenticated by the URL token
+
+    Calendar apps poll this URL, so revalidation is answered from the
+    schedule version alone: a matching ETag or If-Modified-Since gets a 304
+    without loading the calendar body, and the body itself comes from the
+    export cache until the schedule changes.
+    """
+    owner = _get_feed_owner(token)
+    if owner is None:
+        raise Http404("Unknown calendar feed")
+    user_id, username = owner
+
+    # The feed changes with the schedule and rolls over every week
+    semester_start = _get_semester_start()
+    version = get_schedule_version(user_id)
+    etag = f'"ical-{user_id}-{version}-{semester_start.date().isoformat()}"'
+    last_modified = max(get_schedule_last_modified(user_id), semester_start.timestamp())
+
+    response = conditional_response(
+        request,
+        lambda: get_export_content(user_id, username, 'ical', allow_empty=True),
+        etag,
+        content_type='text/calendar; charset=utf-8',
+        last_modified=last_modified
+    )
+    response['Content-Disposition'] = f'inline; filename=schedule_{username}.ics'
+    return response
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def schedule_feed_url(request):
+    """API endpoint to get the user's calendar feed URL; POST issues a new one, revoking the old URL"""
+    feed = CalendarFeedToken.objects.filter(user=request.user).first()
+
+    if feed and request.method == 'POST':
+        feed.token = CalendarFeedToken.generate_token()
+        feed.save(update_fields=['token'])
+        # Every process drops its cached lookup of the old token
+        transaction.on_commit(partial(bump_cache_version, FEED_VERSION_CACHE_KEY.format(user_id=request.user.id)))
+    elif not feed:
+        feed = CalendarFeedToken.objects.create(user=request.user, token=CalendarFeedToken.generate_token())
+
+    return JsonResponse({
+        'status': 'success',
+        'url': request.build_absolute_uri(reverse('schedule_ical_feed', args=[feed.token]))
+    })
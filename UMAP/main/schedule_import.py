@@ -0,0 +1,397 @@
+"""
+Background import of schedules from Certificate of Registration (COR) PDFs
+Pages are parsed into normalized rows in a process pool, the rows are staged
+and the user's schedule is then replaced with them in a single transaction,
+so a failed or empty parse never wipes an existing schedule. Parsed rows are
+kept per PDF content hash, so re-uploading a COR skips parsing entirely.
+"""
+import hashlib
+import os
+import random
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import django
+import pdfplumber
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .models import Floor, ParsedSchedulePDF, Room, RoomProfile, Schedule
+from .timetable import WeeklyTimetable
+
+
+PARSE_WORKERS = max(1, min(4, os.cpu_count() or 1))  # Processes used for multi-page PDFs
+PARSER_VERSION = 1  # Bump whenever parsing changes so cached rows are re-parsed
+SCHEDULE_COLORS = ['blue', 'green', 'purple', 'red', 'yellow']
+
+
+def _find_header_index(headers, keys):
+    """Find index of first matching key in headers using multiple match strategies"""
+    for i, header in enumerate(headers):
+        # Skip empty headers
+        if not header:
+            continue
+
+        header = str(header).strip().upper()
+
+        # Try exact match first
+        if header in keys:
+            return i
+
+        # Try case-insensitive contains
+        for key in keys:
+            if key.upper() in header:
+                return i
+
+        # Try matching individual words
+        header_words = set(header.split())
+        for key in keys:
+            key_words = set(key.upper().split())
+            if header_words & key_words:  # Check for any word overlap
+                return i
+
+    return None
+
+
+def _extract_table(page):
+    """Extract the schedule table from a PDF page, or None if there isn't one"""
+    try:
+        # Try normal table extraction first
+        table = page.extract_table()
+
+        if not table:
+            # If no table found, try with different settings
+            table = page.extract_table({
+                'vertical_strategy': 'text',
+                'horizontal_strategy': 'text',
+                'intersection_y_tolerance': 10
+            })
+        return table
+    except Exception:
+        return None
+
+
+def extract_page_rows(pdf_path: str, page_index: int) -> List[Dict]:
+    """Parse one PDF page into normalized schedule rows
+
+    Runs inside the parse pool, so it only reads the PDF and never touches
+    the database. Each row is a dict with course_code, subject, day, start
+    and end ("HH:MM") and room_text.
+    """
+    from .schedule_views import _clean_room_text, _extract_time_ranges, _parse_days
+
+    with pdfplumber.open(pdf_path) as pdf:
+        table = _extract_table(pdf.pages[page_index])
+
+    rows = []
+    if not table or len(table) <= 1:
+        return rows
+
+    # Clean and normalize header row
+    header = [(str(h).strip().upper() if h else "") for h in table[0]]
+
+    # Skip rows until we find a valid header row
+    header_row_idx = 0
+    for idx, row in enumerate(table):
+        row_text = " ".join(str(cell).strip().upper() for cell in row if cell)
+        if any(key in row_text for key in ["COURSE", "SUBJECT", "TIME", "ROOM"]):
+            header = [(str(h).strip().upper() if h else "") for h in row]
+            header_row_idx = idx
+            break
+
+    # Remove rows before the header
+    table = table[header_row_idx:]
+
+    # More flexible header detection for COR format
+    idx_code = _find_header_index(header, ["COURSE CODE", "COURSE NO", "SUBJ CODE", "SUBJECT CODE"]) or 0
+    idx_desc = _find_header_index(header, ["DESCRIPTION", "TITLE", "SUBJECT", "COURSE TITLE"]) or 1
+    idx_time = _find_header_index(header, ["TIME", "SCHEDULE"]) or 2
+    idx_days = _find_header_index(header, ["DAYS", "DAY"]) or 3
+    idx_room = _find_header_index(header, ["ROOM", "RM", "ROOM NO", "VENUE"]) or 4
+
+    for row in table[1:]:
+        row = [(cell or "").strip() for cell in row] + [""] * 8
+        course_code = row[idx_code]
+        subject = row[idx_desc]
+        time_cell = row[idx_time]
+        days_cell = row[idx_days]
+        room_cell = _clean_room_text(row[idx_room] or "TBA")
+
+        if not course_code or not subject:
+            continue
+
+        time_ranges = _extract_time_ranges(time_cell)
+        if not time_ranges:
+            time_ranges = _extract_time_ranges(" ".join(re.split(r'[/\n]+', time_cell)))
+
+        day_tokens = [t.strip() for t in re.split(r'[/\n.]+', days_cell) if t.strip()]
+        if not day_tokens and days_cell:
+            day_tokens = [days_cell]
+
+        if not time_ranges:
+            continue
+
+        # If we have multiple time ranges but single day token, parse the day token
+        # to see if it contains multiple days (e.g., "MTH" = Monday & Thursday)
+        expanded_from_single_token = False
+        if len(time_ranges) > 1 and len(day_tokens) == 1:
+            parsed_days_from_single_token = _parse_days(day_tokens[0])
+            if len(parsed_days_from_single_token) == len(time_ranges):
+                # Perfect match: use parsed days directly
+                day_tokens = parsed_days_from_single_token
+                expanded_from_single_token = True
+
+        # Only process time ranges that have corresponding day tokens
+        # Don't cycle through days if we have more time ranges than days
+        for idx_tr, (st, et) in enumerate(time_ranges):
+            if idx_tr >= len(day_tokens):
+                # Stop processing if we've exhausted day tokens
+                # This prevents creating unwanted schedules
+                break
+
+            raw_day = day_tokens[idx_tr]
+
+            # If we already expanded from a single token, the day_tokens are full day names
+            # and don't need further parsing
+            if expanded_from_single_token:
+                parsed_days = [raw_day]
+            else:
+                parsed_days = _parse_days(raw_day) or ["Monday"]
+
+            for day in parsed_days:
+                rows.append({
+                    'course_code': course_code,
+                    'subject': subject,
+                    'day': day,
+                    'start': st.strftime('%H:%M'),
+                    'end': et.strftime('%H:%M'),
+                    'room_text': room_cell,
+                })
+
+    return rows
+
+
+def parse_schedule_pdf(pdf_path: str,
+                       progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+    """Parse every page of a COR PDF into schedule rows, in page order
+
+    Multi-page PDFs are parsed in parallel in a process pool.
+    progress_callback is called with (pages parsed, total pages).
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+
+    if progress_callback:
+        progress_callback(0, page_count)
+
+    page_rows = [[] for _ in range(page_count)]
+    if page_count <= 1 or PARSE_WORKERS == 1:
+        for page_index in range(page_count):
+            page_rows[page_index] = extract_page_rows(pdf_path, page_index)
+            if progress_callback:
+                progress_callback(page_index + 1, page_count)
+    else:
+        # Forked pool processes must not inherit open database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(PARSE_WORKERS, page_count),
+                                 initializer=django.setup) as executor:
+            futures = {
+                executor.submit(extract_page_rows, pdf_path, page_index): page_index
+                for page_index in range(page_count)
+            }
+            for pages_done, future in enumerate(as_completed(futures), 1):
+                page_rows[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(pages_done, page_count)
+
+    rows = [row for rows in page_rows for row in rows]
+    print(f"[Schedule Import] Parsed {len(rows)} rows from {page_count} page(s) of {os.path.basename(pdf_path)}")
+    return rows
+
+
+def hash_uploaded_file(uploaded_file) -> str:
+    """Get the SHA-256 hex digest of an uploaded file's bytes"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cached_rows(content_hash: str) -> Optional[List[Dict]]:
+    """Get previously parsed rows for a PDF hash, or None if it was never parsed"""
+    cached = ParsedSchedulePDF.objects.filter(
+        content_hash=content_hash, parser_version=PARSER_VERSION
+    ).values_list('id', 'rows').first()
+    if cached is None:
+        return None
+
+    cached_id, rows = cached
+    ParsedSchedulePDF.objects.filter(id=cached_id).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+    return rows
+
+
+def cache_parsed_rows(content_hash: str, rows: List[Dict]):
+    """Remember the rows parsed from a PDF hash"""
+    try:
+        ParsedSchedulePDF.objects.get_or_create(
+            content_hash=content_hash,
+            parser_version=PARSER_VERSION,
+            defaults={'rows': rows}
+        )
+    except IntegrityError:
+        # Another import cached the same PDF first
+        pass
+
+
+def get_placeholder_room() -> Room:
+    """Get the "TBA" room used for schedules whose room isn't in the system"""
+    placeholder_room = Room.objects.filter(profile__number="TBA").first()
+    if not placeholder_room:
+        floor = Floor.objects.first()
+        if not floor:
+            floor = Floor.objects.create(name="Default Floor", building="Main Building")
+
+        placeholder_room = Room.objects.create(floor=floor)
+        RoomProfile.objects.create(
+            room=placeholder_room,
+            number="TBA",
+            name="To Be Announced",
+            type="Unknown"
+        )
+    return placeholder_room
+
+
+def resolve_rooms(room_numbers: Iterable[str]) -> Dict[str, int]:
+    """Map room numbers to existing room IDs with a single query
+
+    Matches the rules of _find_existing_room_by_number: an exact match on
+    the profile number wins over a case-insensitive one, ties go to the
+    lowest room ID and "TBA" never matches.
+    """
+    wanted = {number for number in room_numbers if number and number != "TBA"}
+    if not wanted:
+        return {}
+
+    exact = {}
+    insensitive = {}
+    profiles = RoomProfile.objects.annotate(number_lower=Lower('number')).filter(
+        number_lower__in={number.lower() for number in wanted}
+    ).order_by('room_id').values_list('number', 'number_lower', 'room_id')
+    for number, number_lower, room_id in profiles:
+        exact.setdefault(number, room_id)
+        insensitive.setdefault(number_lower, room_id)
+
+    room_ids = {}
+    for number in wanted:
+        room_id = exact.get(number) or insensitive.get(number.lower())
+        if room_id:
+            room_ids[number] = room_id
+    return room_ids
+
+
+def replace_user_schedules(user, rows: List[Dict]) -> Dict:
+    """Atomically replace a user's schedules with staged rows
+
+    The old schedule stays visible until the transaction commits and is
+    kept untouched if anything fails. Rows overlapping an earlier row on
+    the same day are skipped. Room numbers are resolved up front and the
+    schedules are written with one bulk_create, so the number of queries
+    doesn't grow with the number of classes.
+
+    Returns:
+        Dict with created and skipped counts and the imported rows.
+    """
+    room_ids = resolve_rooms(row['room_text'] for row in rows)
+    placeholder_room = None
+
+    imported_rows = []
+    schedules = []
+    booked = WeeklyTimetable()  # Rows accepted so far
+    skipped = 0
+
+    for row in rows:
+        start = datetime.strptime(row['start'], '%H:%M').time()
+        end = datetime.strptime(row['end'], '%H:%M').time()
+
+        if booked.overlaps(row['day'], start, end):
+            skipped += 1
+            continue
+        booked.add(row['day'], start, end)
+
+        # Use the existing room if there is one, otherwise the placeholder
+        room_id = room_ids.get(row['room_text'])
+        if not room_id:
+            if placeholder_room is None:
+                placeholder_room = get_placeholder_room()
+            room_id = placeholder_room.id
+            print(f"ℹ️ Room '{row['room_text']}' from schedule not in system - displaying as '{row['room_text']}'")
+
+        schedules.append(Schedule(
+            user=user,
+            course_code=row['course_code'][:Schedule._meta.get_field('course_code').max_length],
+            subject=row['subject'][:Schedule._meta.get_field('subject').max_length],
+            room_id=room_id,
+            day=row['day'],
+            start=start,
+            end=end,
+            color=random.choice(SCHEDULE_COLORS),
+            room_text=row['room_text'][:Schedule._meta.get_field('room_text').max_length]  # Store original room text
+        ))
+        imported_rows.append(row)
+
+    with transaction.atomic():
+        Schedule.objects.filter(user=user).delete()
+        Schedule.objects.bulk_create(schedules)
+
+        # bulk_create skips model signals, so refresh the cached schedule explicitly
+        from .signals import schedules_bulk_changed
+        schedules_bulk_changed([user.id])
+
+    print(f"[Schedule Import] Replaced schedule for {user.username}: created {len(imported_rows)}, skipped {skipped}")
+    return {'created': len(imported_rows), 'skipped': skipped, 'rows': imported_rows}
+
+
+def write_excel_copy(user, rows: List[Dict]) -> str:
+    """Save the parsed rows as an Excel workbook and return its path"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Schedule"
+    ws.append(["Course Code", "Title", "Day", "Start Time", "End Time", "Room"])
+    for row in rows:
+        ws.append([
+            row['course_code'],
+            row['subject'],
+            row['day'],
+            datetime.strptime(row['start'], '%H:%M').strftime("%I:%M %p"),
+            datetime.strptime(row['end'], '%H:%M').strftime("%I:%M %p"),
+            row['room_text']
+        ])
+
+    excel_path = os.path.join(tempfile.gettempdir(), f"{user.username}_schedule.xlsx")
+    wb.save(excel_path)
+    return excel_path
+
+
+def import_rows(user, rows: List[Dict]) -> Dict:
+    """Swap parsed rows in as the user's schedule and save the Excel copy
+
+    Returns:
+        Dict with created, skipped and rows counts, plus excel_path when
+        anything was imported. No rows means the existing schedule is kept.
+    """
+    if not rows:
+        return {'created': 0, 'skipped': 0, 'rows': 0}
+
+    result = replace_user_schedules(user, rows)
+    return {
+        'created': result['created'],
+        'skipped': result['skipped'],
+        'rows': len(rows),
+        'excel_path': write_excel_copy(user, result['rows']),
+    }
@@ -3,44 +3,23 @@ from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.core.exceptions import ValidationError
-from django.db import models
-from .models import Schedule, Room, Floor, RoomProfile
+from django.core.files.storage import default_storage
+from .models import Schedule, Room, Floor, RoomProfile, BackgroundJob
 from .room_manager import RoomNameManager
+from .jobs import enqueue_job
+from .schedule_import import get_cached_rows, hash_uploaded_file, import_rows
+from .schedule_cache import get_schedule_json
+from .timetable import WeeklyTimetable
 import json
-import os
-import signal
 import re
-import tempfile
-import pdfplumber
-import random
-from contextlib import contextmanager
+import uuid
 from datetime import datetime, timedelta
-from django.db import IntegrityError
 import traceback
 from django.contrib import messages
-from openpyxl import Workbook
 from . import schedule_export
 
 
-@contextmanager
-def timeout(seconds):
-    """Context manager for timeouts. Works on Unix systems, no-op on Windows."""
-    if os.name == 'nt':  # Windows: no signal alarm
-        yield
-        return
-
-    import signal
-
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Processing took more than {seconds} seconds")
-
-    original_handler = signal.signal(signal.SIGALRM, timeout_handler)
-    try:
-        signal.alarm(seconds)
-        yield
-    finally:
-        signal.alarm(0)
-        signal.signal(signal.SIGALRM, original_handler)
+IMPORT_JOB_SESSION_KEY = 'schedule_import_job'
 
 
 def _parse_days(raw):
@@ -422,101 +401,18 @@ def _find_existing_room_by_number(room_number: str):
         return None
 
 
-def _has_overlap(user, day, start, end):
-
-    """
-    Return True if the given time range overlaps any existing Schedule for the same user and day.
-    Overlap test: existing.start < new_end and existing.end > new_start
-    """
-    from datetime import time as _time
-    qs = Schedule.objects.filter(user=user, day=day)
-    # If no existing, no overlap
-    if not qs.exists():
-        return False
-    # Check for any overlap
-    for ex in qs:
-        if (ex.start < end) and (ex.end > start):
-            return True
-    return False
-
-
 @login_required
 @login_required(login_url='login')
 def schedule_view(request):
-    print("\n=== Schedule View Debug ===")
-    print("Current user:", request.user.username)
-    print("Current user ID:", request.user.id)
-    
-    # Get all schedules for current user, ordered by start time
-    schedules = Schedule.objects.filter(user=request.user).order_by('start')
-    
-    # Debug information
-    print("\nAll schedules in database:")
-    all_schedules = Schedule.objects.all()
-    total_count = all_schedules.count()
-    user_count = schedules.count()
-    
-    print(f"Total schedules in database: {total_count}")
-    print(f"Schedules for current user: {user_count}")
-    
-    if total_count > 0 and user_count == 0:
-        # This would indicate schedules exist but none belong to current user
-        print("\nSchedules by user:")
-        for result in Schedule.objects.values('user__username').annotate(count=models.Count('id')).order_by('user__username'):
-            print(f"- {result['user__username']}: {result['count']} schedules")
-            
-    # Initialize schedule data list
-    schedule_data = []
-    colors = ['blue', 'green', 'purple', 'red', 'yellow']
-    color_index = 0
-    
-    for s in schedules:
-        try:
-            # Format times as HH:MM
-            start = s.start.strftime('%H:%M') if s.start else '00:00'
-            end = s.end.strftime('%H:%M') if s.end else '00:00'
-            
-            # Assign a color if none is set
-            if not s.color or s.color not in colors:
-                s.color = colors[color_index]
-                color_index = (color_index + 1) % len(colors)
-                s.save()
-
-            # Get room number, falling back to TBA if not available
-            room_text = "TBA"
-            if s.room_text:
-                # Use the stored original room text (e.g., "HPSB 1009")
-                room_text = s.room_text
-            elif s.room:
-                try:
-                    room_text = s.room.profile.number if hasattr(s.room, 'profile') else str(s.room)
-                except:
-                    pass
-
-            # Create schedule item with converted field names to match frontend
-            schedule_item = {
-                "id": s.id,
-                "course_code": s.course_code or "",
-                "subject_name": s.subject or "",  # Convert subject → subject_name
-                "day": s.day,
-                "start_time": start,  # Convert start → start_time
-                "end_time": end,      # Convert end → end_time
-                "room": room_text,    # Use original room text or room number
-                "color": s.color or colors[0]  # Fallback to first color if none set
-            }
-            schedule_data.append(schedule_item)
-        except Exception as e:
-            print(f"Error processing schedule {s.id}:", str(e))
+    import_pending = _pop_finished_import(request)
 
-    # Convert schedule data to JSON and debug output
-    json_data = json.dumps(schedule_data)
-    print("\nSchedule data for current user:")
-    print("- Number of schedules:", len(schedule_data))
-    print("- JSON data being sent to template:", json_data)
+    # Schedule JSON comes from a per-user cache, rebuilt in one query after changes
+    json_data = get_schedule_json(request.user)
     
     # Render template with JSON-encoded schedule data
     return render(request, "UMAP_App/Users/Users_Schedule.html", {
-        "schedule_data": json_data
+        "schedule_data": json_data,
+        "import_pending": import_pending
     })
 
 
@@ -564,7 +460,7 @@ def add_class(request):
                 }, status=400)
 
             # Check for time overlap
-            if _has_overlap(request.user, class_data['day'], start, end):
+            if WeeklyTimetable.for_user(request.user).overlaps(class_data['day'], start, end):
                 return JsonResponse({
                     'success': False,
                     'error': 'You already have a class scheduled at this time.'
@@ -643,241 +539,81 @@ def upload_schedule(request):
         messages.error(request, "❌ File is too large (max 10MB)")
         return redirect("schedule_view")
 
-    # Delete all existing schedules for this user
-    Schedule.objects.filter(user=request.user).delete()
-
-    temp_file = None
-    schedule_count = 0
-    parsed_rows = []  # hold rows for Excel export
+    # A PDF parsed before (a re-upload, or the same COR from a classmate)
+    # goes straight to schedule creation without touching pdfplumber
+    content_hash = hash_uploaded_file(pdf_file)
+    cached_rows = get_cached_rows(content_hash)
+    if cached_rows is not None:
+        try:
+            result = import_rows(request.user, cached_rows)
+        except Exception as e:
+            messages.error(request, f"❌ Error processing PDF: {e}")
+            return redirect("schedule_view")
 
-    try:
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        for chunk in pdf_file.chunks():
-            temp_file.write(chunk)
-        temp_file.flush()
-
-        with pdfplumber.open(temp_file.name) as pdf:
-            for page in pdf.pages:
-                # Try to find table in multiple ways
-                table = None
-                try:
-                    # Try normal table extraction first
-                    table = page.extract_table()
-                    
-                    if not table:
-                        # If no table found, try with different settings
-                        table = page.extract_table({
-                            'vertical_strategy': 'text',
-                            'horizontal_strategy': 'text',
-                            'intersection_y_tolerance': 10
-                        })
-                except Exception:
-                    pass
-
-                if table and len(table) > 1:
-                    # Clean and normalize header row
-                    header = [(str(h).strip().upper() if h else "") for h in table[0]]
-                    
-                    # Skip rows until we find a valid header row
-                    header_row_idx = 0
-                    for idx, row in enumerate(table):
-                        row_text = " ".join(str(cell).strip().upper() for cell in row if cell)
-                        if any(key in row_text for key in ["COURSE", "SUBJECT", "TIME", "ROOM"]):
-                            header = [(str(h).strip().upper() if h else "") for h in row]
-                            header_row_idx = idx
-                            break
-                    
-                    # Remove rows before the header
-                    table = table[header_row_idx:]
-
-                    def _find_header_index(headers, keys):
-                        """Find index of first matching key in headers using multiple match strategies"""
-                        for i, header in enumerate(headers):
-                            # Skip empty headers
-                            if not header:
-                                continue
-                            
-                            header = str(header).strip().upper()
-                            
-                            # Try exact match first
-                            if header in keys:
-                                return i
-                            
-                            # Try case-insensitive contains
-                            for key in keys:
-                                if key.upper() in header:
-                                    return i
-                            
-                            # Try matching individual words
-                            header_words = set(header.split())
-                            for key in keys:
-                                key_words = set(key.upper().split())
-                                if header_words & key_words:  # Check for any word overlap
-                                    return i
-                        
-                        return None
-
-                    # More flexible header detection for COR format
-                    idx_code = _find_header_index(header, ["COURSE CODE", "COURSE NO", "SUBJ CODE", "SUBJECT CODE"]) or 0
-                    idx_desc = _find_header_index(header, ["DESCRIPTION", "TITLE", "SUBJECT", "COURSE TITLE"]) or 1
-                    idx_time = _find_header_index(header, ["TIME", "SCHEDULE"]) or 2
-                    idx_days = _find_header_index(header, ["DAYS", "DAY"]) or 3
-                    idx_room = _find_header_index(header, ["ROOM", "RM", "ROOM NO", "VENUE"]) or 4
-
-                    for row in table[1:]:
-                        row = [(cell or "").strip() for cell in row] + [""] * 8
-                        course_code = row[idx_code]
-                        subject = row[idx_desc]
-                        time_cell = row[idx_time]
-                        days_cell = row[idx_days]
-                        room_cell = _clean_room_text(row[idx_room] or "TBA")
-
-                        if not course_code or not subject:
-                            continue
-
-                        time_ranges = _extract_time_ranges(time_cell)
-                        if not time_ranges:
-                            time_ranges = _extract_time_ranges(" ".join(re.split(r'[/\n]+', time_cell)))
-
-                        day_tokens = [t.strip() for t in re.split(r'[/\n.]+', days_cell) if t.strip()]
-                        if not day_tokens and days_cell:
-                            day_tokens = [days_cell]
-
-                        if not time_ranges:
-                            continue
-
-                        # Debug: log what we extracted
-                        print(f"DEBUG: course_code={course_code}, subject={subject}")
-                        print(f"DEBUG: raw days_cell='{days_cell}'")
-                        print(f"DEBUG: time_ranges count={len(time_ranges)}, ranges={[(s.strftime('%H:%M'), e.strftime('%H:%M')) for s, e in time_ranges]}")
-                        print(f"DEBUG: day_tokens (after split and filter)={day_tokens}")
-
-                        # If we have multiple time ranges but single day token, parse the day token
-                        # to see if it contains multiple days (e.g., "MTH" = Monday & Thursday)
-                        expanded_from_single_token = False
-                        if len(time_ranges) > 1 and len(day_tokens) == 1:
-                            parsed_days_from_single_token = _parse_days(day_tokens[0])
-                            if len(parsed_days_from_single_token) == len(time_ranges):
-                                # Perfect match: use parsed days directly
-                                day_tokens = parsed_days_from_single_token
-                                expanded_from_single_token = True
-                                print(f"DEBUG: Expanded single day token to {day_tokens}")
-
-                        # Only process time ranges that have corresponding day tokens
-                        # Don't cycle through days if we have more time ranges than days
-                        for idx_tr, (st, et) in enumerate(time_ranges):
-                            if idx_tr >= len(day_tokens):
-                                # Stop processing if we've exhausted day tokens
-                                # This prevents creating unwanted schedules
-                                print(f"DEBUG: Skipping idx_tr={idx_tr} because idx_tr >= len(day_tokens)={len(day_tokens)}")
-                                break
-                            
-                            raw_day = day_tokens[idx_tr]
-                            
-                            # If we already expanded from a single token, the day_tokens are full day names
-                            # and don't need further parsing
-                            if expanded_from_single_token:
-                                parsed_days = [raw_day]
-                            else:
-                                parsed_days = _parse_days(raw_day) or ["Monday"]
-                            
-                            time_str = f"{st.strftime('%H:%M')}-{et.strftime('%H:%M')}"
-                            print(f"DEBUG:   idx_tr={idx_tr}: raw_day='{raw_day}', parsed_days={parsed_days}, time={time_str}")
-
-                            for day in parsed_days:
-                                try:
-                                    if _has_overlap(request.user, day, st, et):
-                                        continue
-
-                                    # Define available colors directly
-                                    available_colors = ['blue', 'green', 'purple', 'red', 'yellow']
-                                    
-                                    # Try to find existing room
-                                    room = _find_existing_room_by_number(room_cell)
-                                    
-                                    if not room:
-                                        # Room not found - use placeholder instead of creating
-                                        floor = Floor.objects.first()
-                                        if not floor:
-                                            floor = Floor.objects.create(name="Default Floor", building="Main Building")
-                                        
-                                        placeholder_room = Room.objects.filter(profile__number="TBA").first()
-                                        if not placeholder_room:
-                                            placeholder_room = Room.objects.create(floor=floor)
-                                            RoomProfile.objects.create(
-                                                room=placeholder_room,
-                                                number="TBA",
-                                                name="To Be Announced",
-                                                type="Unknown"
-                                            )
-                                        room = placeholder_room
-                                        print(f"ℹ️ Room '{room_cell}' from schedule not in system - displaying as '{room_cell}'")
-                                    else:
-                                        print(f"✓ Found existing room {room.profile.number} ({room.profile.name})")
-
-                                    try:
-                                        print(f"Creating schedule for user {request.user.username} (ID: {request.user.id})")
-                                        schedule = Schedule.objects.create(
-                                            user=request.user,  # Explicitly set the user
-                                            course_code=course_code,
-                                            subject=subject,
-                                            room=room,
-                                            day=day,
-                                            start=st,
-                                            end=et,
-                                            color=random.choice(available_colors),
-                                            room_text=room_cell  # Store original room text
-                                        )
-                                        print(f"Created schedule {schedule.id} for {schedule.user.username}")
-                                        schedule_count += 1
-
-                                        # save to parsed rows for Excel
-                                    except Exception as e:
-                                        print(f"Error creating schedule for user {request.user.username}: {str(e)}")
-                                        continue
-                                    parsed_rows.append([
-                                        course_code,
-                                        subject,
-                                        day,
-                                        st.strftime("%I:%M %p"),
-                                        et.strftime("%I:%M %p"),
-                                        room_cell
-                                    ])
-                                except IntegrityError:
-                                    continue
-
-        # create Excel with openpyxl if any rows parsed
-        if parsed_rows:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Schedule"
-            ws.append(["Course Code", "Title", "Day", "Start Time", "End Time", "Room"])
-            for row in parsed_rows:
-                ws.append(row)
-
-            excel_path = os.path.join(tempfile.gettempdir(), f"{request.user.username}_schedule.xlsx")
-            wb.save(excel_path)
-
-            request.session["last_schedule_excel"] = excel_path
-
-        if schedule_count > 0:
-            messages.success(request, f"✅ Imported {schedule_count} schedules! Excel copy saved too.")
+        if result['created'] > 0:
+            messages.success(request, f"✅ Imported {result['created']} schedules! Excel copy saved too.")
         else:
             messages.warning(request, "⚠️ No valid schedules imported from the PDF.")
+        return redirect("schedule_view")
 
-    except Exception as e:
-        messages.error(request, f"❌ Error processing PDF: {e}")
-    finally:
-        if temp_file:
-            try:
-                temp_file.close()
-                os.unlink(temp_file.name)
-            except Exception:
-                pass
+    # Parsing runs in the run_jobs worker; the user's current schedule is only
+    # replaced once the whole PDF has been parsed successfully.
+    pdf_name = default_storage.save(f"schedule_imports/{uuid.uuid4().hex}.pdf", pdf_file)
+    job = enqueue_job(
+        BackgroundJob.JobType.SCHEDULE_IMPORT,
+        {'pdf_name': pdf_name, 'filename': pdf_file.name, 'content_hash': content_hash},
+        user=request.user
+    )
+    request.session[IMPORT_JOB_SESSION_KEY] = job.id
 
+    messages.info(request, "⏳ Importing your schedule in the background. This page will refresh when it's done.")
     return redirect("schedule_view")
 
 
+@login_required
+@require_http_methods(["GET"])
+def schedule_import_status(request):
+    """API endpoint to poll the status of the user's latest schedule import"""
+    job = BackgroundJob.objects.filter(
+        created_by=request.user,
+        job_type=BackgroundJob.JobType.SCHEDULE_IMPORT
+    ).order_by('-created_at', '-id').first()
+
+    if not job:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'No schedule import found'
+        }, status=404)
+
+    return JsonResponse({
+        'status': 'success',
+        'job': job.to_dict()
+    })
+
+
+def _pop_finished_import(request):
+    """Flash the outcome of a finished schedule import, returning True while one is still running"""
+    job_id = request.session.get(IMPORT_JOB_SESSION_KEY)
+    if not job_id:
+        return False
+
+    job = BackgroundJob.objects.filter(id=job_id, created_by=request.user).first()
+    if job and not job.is_finished:
+        return True
+
+    request.session.pop(IMPORT_JOB_SESSION_KEY, None)
+    if not job:
+        return False
+
+    if job.status == BackgroundJob.Status.FAILED:
+        messages.error(request, f"❌ Error processing PDF: {job.error}. Your previous schedule was kept.")
+    elif job.result.get('created', 0) > 0:
+        messages.success(request, f"✅ Imported {job.result['created']} schedules! Excel copy saved too.")
+    else:
+        messages.warning(request, "⚠️ No valid schedules imported from the PDF.")
+    return False
+
+
 @login_required
 @require_http_methods(["GET", "POST", "DELETE"])
 def schedule_class_detail(request, class_id):
@@ -893,13 +629,31 @@ def schedule_class_detail(request, class_id):
             if 'day' in data and 'start' in data:
                 class_item.day = data['day']
                 class_item.start = datetime.strptime(data['start'], '%H:%M').time()
-                class_item.save()
             elif 'duration' in data:
                 new_duration = int(data['duration'])
                 class_item.end = (datetime.combine(datetime.today(), class_item.start) +
                                      timedelta(hours=new_duration)).time()
-                class_item.save()
+            else:
+                return JsonResponse({'success': True})
+
+            if class_item.start >= class_item.end:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'End time must be after start time.'
+                }, status=400)
+
+            # Check the moved or resized class against the user's other classes
+            conflict_ids = WeeklyTimetable.for_user(request.user, exclude_id=class_item.id).conflicts_with(
+                class_item.day, class_item.start, class_item.end
+            )
+            if conflict_ids:
+                course_codes = Schedule.objects.filter(id__in=conflict_ids).values_list('course_code', flat=True)
+                return JsonResponse({
+                    'success': False,
+                    'error': f'This overlaps with {", ".join(sorted(course_codes))}.'
+                }, status=400)
 
+            class_item.save()
             return JsonResponse({'success': True})
 
     except Schedule.DoesNotExist:
@@ -910,6 +664,76 @@ def schedule_class_detail(request, class_id):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 
+@login_required
+@require_http_methods(["GET", "POST"])
+def validate_timetable(request):
+    """API endpoint to find every overlapping pair of classes in one pass
+
+    GET checks the user's saved schedule. POST checks a JSON body of
+    {"classes": [{"day", "start", "end", ...}], "include_existing": bool};
+    submitted classes are reported by index, saved ones by schedule id.
+    """
+    classes = []
+    include_existing = True
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or b'{}')
+            classes = data.get('classes', [])
+            include_existing = bool(data.get('include_existing', False))
+            if not isinstance(classes, list):
+                raise ValueError('"classes" must be a list')
+        except (ValueError, AttributeError) as e:
+            return JsonResponse({'status': 'error', 'message': f'Invalid JSON body: {e}'}, status=400)
+
+    details = {}
+    timetable = WeeklyTimetable()
+
+    if include_existing:
+        saved = Schedule.objects.filter(user=request.user).values_list(
+            'id', 'course_code', 'day', 'start', 'end'
+        )
+        for schedule_id, course_code, day, start, end in saved:
+            key = ('saved', schedule_id)
+            details[key] = {'source': 'saved', 'id': schedule_id, 'course_code': course_code,
+                            'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')}
+            timetable.add(day, start, end, key)
+
+    for index, class_data in enumerate(classes):
+        try:
+            start = datetime.strptime(str(class_data['start']), '%H:%M').time()
+            end = datetime.strptime(str(class_data['end']), '%H:%M').time()
+            day = class_data['day']
+            if day not in schedule_export.DAY_ORDER:
+                raise ValueError(day)
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Class {index} needs a day (Monday to Sunday) and HH:MM start and end times'
+            }, status=400)
+        if start >= end:
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Class {index}: end time must be after start time'
+            }, status=400)
+
+        key = ('submitted', index)
+        details[key] = {'source': 'submitted', 'index': index, 'course_code': class_data.get('course_code', ''),
+                        'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')}
+        timetable.add(day, start, end, key)
+
+    conflicts = [
+        {'day': conflict['day'], 'first': details[conflict['first']], 'second': details[conflict['second']]}
+        for conflict in timetable.conflicts()
+    ]
+
+    return JsonResponse({
+        'status': 'success',
+        'valid': not conflicts,
+        'checked': len(details),
+        'conflicts': conflicts
+    })
+
+
 @login_required
 def delete_class(request, schedule_id):
     try:
@@ -949,3 +773,13 @@ def delete_all_schedules(request):
 def export_schedule(request, format_type):
     """Export schedule in the specified format (excel, pdf, or ical)"""
     return schedule_export.export_schedule(request, format_type)
+
+
+def schedule_ical_feed(request, token):
+    """Subscribable iCal feed of a user's schedule, authenticated by the token in the URL"""
+    return schedule_export.schedule_ical_feed(request, token)
+
+
+def schedule_feed_url(request):
+    """Get or regenerate the current user's calendar feed URL"""
+    return schedule_export.schedule_feed_url(request)
@@ -0,0 +1,61 @@
+"""
+Cached session validity for SingleDeviceSessionMiddleware
+Remembers in process memory which session keys belong to an active
+UserSession so requests don't have to query the table, and writes
+last_activity at most once per LAST_ACTIVITY_INTERVAL per session. Each
+entry carries the user's shared session version, which deactivating any of
+the user's sessions bumps, so every process drops the entries at once.
+"""
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .http_cache import bump_cache_version, get_cache_version
+from .models import UserSession
+
+
+SESSION_CACHE_KEY = 'user_session:{session_key}'
+VERSION_CACHE_KEY = 'user_session:version:{user_id}'
+LAST_ACTIVITY_INTERVAL = 60  # Seconds between last_activity writes for one session
+
+
+def is_session_active(user_id: int, session_key: str) -> bool:
+    """Check that the session is the user's active session, touching last_activity
+
+    A cached entry answers without a query until its last_activity write is
+    due; the write itself is a conditional UPDATE that also re-validates
+    the session, so a cache miss costs one query instead of two.
+    """
+    if not session_key:
+        return False
+
+    # Read before the UPDATE, so a deactivation committing after it also
+    # moves the version past the entry written below
+    version = get_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+    key = SESSION_CACHE_KEY.format(session_key=session_key)
+    if cache.get(key) == (user_id, version):
+        return True
+
+    active = UserSession.objects.filter(
+        user_id=user_id, session_key=session_key, is_active=True
+    ).update(last_activity=timezone.now())
+    if active:
+        # The entry expires when the next last_activity write is due
+        cache.set(key, (user_id, version), LAST_ACTIVITY_INTERVAL)
+    else:
+        cache.delete(key)
+    return bool(active)
+
+
+def forget_user_sessions(user_id: int):
+    """Invalidate every process's cached validity for a user's sessions"""
+    bump_cache_version(VERSION_CACHE_KEY.format(user_id=user_id))
+
+
+def deactivate_user_sessions(user) -> int:
+    """Deactivate all of a user's active sessions, e.g. before logging in on a new device"""
+    deactivated = UserSession.objects.filter(user=user, is_active=True).update(is_active=False)
+    transaction.on_commit(partial(forget_user_sessions, user.id))
+    return deactivated
@@ -0,0 +1,118 @@
+"""
+Model signal handlers that keep cached room, rating, schedule and session data in sync with the database
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .ar_payload import invalidate_ar_payload
+from .building_snapshot import invalidate_building_snapshot
+from .models import Feedback, Floor, Room, RoomProfile, SavedLocation, Schedule, UserSession
+from .rating_analytics import invalidate_rating_analytics
+from .room_ratings import apply_rating_change
+from .room_search import room_search_index
+from .saved_rooms import invalidate_saved_room_ids
+from .schedule_cache import invalidate_user_schedule
+from .session_cache import forget_user_sessions
+
+
+@receiver([post_save, post_delete], sender=Floor)
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=RoomProfile)
+def invalidate_room_caches(sender, **kwargs):
+    """Invalidate cached room payloads once the change is committed"""
+    transaction.on_commit(invalidate_building_snapshot)
+    transaction.on_commit(invalidate_ar_payload)
+    transaction.on_commit(invalidate_rating_analytics)
+
+
+@receiver([post_save, post_delete], sender=RoomProfile)
+def reindex_room_profile(sender, instance, **kwargs):
+    """Re-index a room in the search index when its profile changes"""
+    transaction.on_commit(partial(room_search_index.refresh_rooms, [instance.room_id]))
+
+
+@receiver([post_save, post_delete], sender=Room)
+def reindex_room(sender, instance, **kwargs):
+    """Re-index a room and its floor's room count when a room changes"""
+    transaction.on_commit(partial(room_search_index.refresh_rooms, [instance.id]))
+    transaction.on_commit(partial(room_search_index.refresh_floors, [instance.floor_id]))
+
+
+@receiver([post_save, post_delete], sender=Floor)
+def reindex_floor(sender, instance, **kwargs):
+    """Re-index a floor and the rooms on it when the floor changes"""
+    transaction.on_commit(partial(room_search_index.refresh_floors, [instance.id], include_rooms=True))
+
+
+def rooms_bulk_changed(room_ids, floor_ids=()):
+    """Refresh cached room data after bulk writes, which don't send model signals"""
+    room_ids = list(room_ids)
+    floor_ids = list(floor_ids)
+    transaction.on_commit(invalidate_building_snapshot)
+    transaction.on_commit(invalidate_ar_payload)
+    transaction.on_commit(invalidate_rating_analytics)
+    transaction.on_commit(partial(room_search_index.refresh_rooms, room_ids))
+    if floor_ids:
+        transaction.on_commit(partial(room_search_index.refresh_floors, floor_ids))
+
+
+@receiver([post_save, post_delete], sender=Feedback)
+def invalidate_rating_cache(sender, **kwargs):
+    """Invalidate the cached rating analytics once the change is committed"""
+    transaction.on_commit(invalidate_rating_analytics)
+
+
+@receiver(pre_save, sender=Feedback)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Note the rating being replaced so its room summary can be adjusted after the save"""
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        instance._previous_rating = Feedback.objects.filter(pk=instance.pk).values_list('room_id', 'rating').first()
+
+
+@receiver(post_save, sender=Feedback)
+def update_rating_summary(sender, instance, raw=False, **kwargs):
+    """Apply a new or changed rating to its room summary"""
+    if raw:
+        return
+    apply_rating_change(getattr(instance, '_previous_rating', None), (instance.room_id, instance.rating))
+
+
+@receiver(post_delete, sender=Feedback)
+def remove_from_rating_summary(sender, instance, **kwargs):
+    """Remove a deleted rating from its room summary"""
+    apply_rating_change((instance.room_id, instance.rating), None)
+
+
+@receiver([post_save, post_delete], sender=SavedLocation)
+def invalidate_saved_rooms(sender, instance, **kwargs):
+    """Invalidate the user's cached saved set once a save or unsave is committed"""
+    transaction.on_commit(partial(invalidate_saved_room_ids, instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=Schedule)
+def invalidate_schedule_cache(sender, instance, **kwargs):
+    """Invalidate the owner's cached schedule JSON once the change is committed"""
+    transaction.on_commit(partial(invalidate_user_schedule, instance.user_id))
+
+
+def schedules_bulk_changed(user_ids):
+    """Invalidate cached schedule JSON after bulk writes, which don't send model signals"""
+    for user_id in set(user_ids):
+        transaction.on_commit(partial(invalidate_user_schedule, user_id))
+
+
+@receiver(post_save, sender=UserSession)
+def forget_inactive_session(sender, instance, **kwargs):
+    """Drop cached validity of the user's sessions once one is saved as inactive"""
+    if not instance.is_active:
+        transaction.on_commit(partial(forget_user_sessions, instance.user_id))
+
+
+@receiver(post_delete, sender=UserSession)
+def forget_deleted_session(sender, instance, **kwargs):
+    """Drop cached validity of the user's sessions once one is deleted"""
+    transaction.on_commit(partial(forget_user_sessions, instance.user_id))
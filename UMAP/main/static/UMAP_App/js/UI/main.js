@@ -1,11 +1,26 @@
 // Building location data - initialized globally
 window.buildingLocations = window.buildingLocations || {};
 
+// Shared /api/buildings/ request - every caller on the page reuses one response.
+// The server answers with an ETag, so reloads revalidate with a cheap 304.
+let buildingsApiPromise = null;
+
+function loadBuildingsApi() {
+    if (!buildingsApiPromise) {
+        buildingsApiPromise = fetch('/api/buildings/')
+            .then(response => response.json())
+            .catch(error => {
+                buildingsApiPromise = null;
+                throw error;
+            });
+    }
+    return buildingsApiPromise;
+}
+
 // Fetch additional building data from backend if available
 async function fetchBuildingData() {
     try {
-        const response = await fetch('/api/buildings/');
-        const data = await response.json();
+        const data = await loadBuildingsApi();
         
         if (data.status === 'success' && data.buildings) {
             // Ensure buildingLocations exists
@@ -200,8 +215,7 @@ function showBuildingPanel(data) {
     console.log('showBuildingPanel called for:', {buildingId, displayName: displayTitle});
     
     // Fetch building data from API to find exact building name
-    fetch(`/api/buildings/`)
-        .then(response => response.json())
+    loadBuildingsApi()
         .then(apiResponse => {
             if (apiResponse.status === 'success' && apiResponse.buildings) {
                 let exactBuildingName = null;
@@ -342,8 +356,7 @@ window.showFloorsPanel = function(buildingName) {
     console.log('showFloorsPanel called for building:', buildingName);
     
     // Fetch floors from backend
-    fetch(`/api/buildings/`)
-        .then(response => response.json())
+    loadBuildingsApi()
         .then(apiData => {
             console.log('API Response:', apiData);
             console.log('Buildings in API:', Object.keys(apiData.buildings || {}));
@@ -415,12 +428,10 @@ window.showFloorsPanel = function(buildingName) {
                             
                             // Fetch and calculate average rating for this floor
                             if (roomsInFloor.length > 0) {
-                                Promise.all(roomsInFloor.map(room => 
-                                    fetch(`/api/room/${room.id}/ratings/`)
-                                        .then(r => r.ok ? r.json() : Promise.resolve({ average_rating: 0, total_ratings: 0 }))
-                                        .catch(() => ({ average_rating: 0, total_ratings: 0 }))
-                                ))
-                                .then(ratings => {
+                                fetch(`/api/rooms/ratings/?ids=${roomsInFloor.map(room => room.id).join(',')}`)
+                                .then(r => r.ok ? r.json() : Promise.resolve({ ratings: {} }))
+                                .then(data => {
+                                    const ratings = Object.values(data.ratings || {});
                                     const ratingDiv = document.getElementById(`floor-rating-${floor.id}`);
                                     if (ratingDiv) {
                                         // Calculate average of all room ratings
@@ -490,6 +501,7 @@ window.showRoomsInFloor = function(buildingName, floorName, rooms) {
     }
     
     // Create room cards
+    const roomRatings = fetchRoomBatch(rooms.map(room => room.id), 'rating');
     rooms.forEach(room => {
         const roomCard = document.createElement('div');
         roomCard.className = 'location-card group cursor-pointer';
@@ -515,9 +527,9 @@ window.showRoomsInFloor = function(buildingName, floorName, rooms) {
         
         locationCards.appendChild(roomCard);
         
-        // Fetch and display ratings for this room
-        fetch(`/api/room/${room.id}/ratings/`)
-            .then(r => r.json())
+        // Display ratings for this room
+        roomRatings
+            .then(batch => batch[room.id] || { average_rating: 0, total_ratings: 0 })
             .then(data => {
                 const ratingDiv = document.getElementById(`room-rating-${room.id}`);
                 if (ratingDiv) {
@@ -826,6 +838,7 @@ window.showFloorPlanView = function(floorId, floorName, buildingName) {
                     .then(roomsData => {
                         console.log('Rooms response:', roomsData);
                         if (roomsData.status === 'success' && roomsData.rooms && roomsData.rooms.length > 0) {
+                            const roomRatings = fetchRoomBatch(roomsData.rooms.map(room => room.id), 'rating');
                             roomsData.rooms.forEach(room => {
                                 const roomCard = document.createElement('div');
                                 roomCard.className = 'location-card group cursor-pointer hover:shadow-lg transition-all';
@@ -860,9 +873,9 @@ window.showFloorPlanView = function(floorId, floorName, buildingName) {
                                 });
                                 roomsScrollContainer.appendChild(roomCard);
                                 
-                                // Fetch and display ratings for this room
-                                fetch(`/api/room/${room.id}/ratings/`)
-                                    .then(r => r.ok ? r.json() : Promise.resolve({ average_rating: 0, total_ratings: 0 }))
+                                // Display ratings for this room
+                                roomRatings
+                                    .then(batch => batch[room.id] || { average_rating: 0, total_ratings: 0 })
                                     .then(data => {
                                         const ratingDiv = document.getElementById(`room-rating-${room.id}`);
                                         if (ratingDiv) {
@@ -1091,15 +1104,16 @@ document.addEventListener("DOMContentLoaded", () => {
               return;
             }
 
+            const roomRatings = fetchRoomBatch(data.results.filter(result => result.type === 'room').map(result => result.id), 'rating');
             data.results.forEach(result => {
               const resultEl = document.createElement('a');
               resultEl.href = '#';
               resultEl.className = 'block px-4 py-3 hover:bg-slate-700/50 transition-colors duration-150 text-sm';
               
               if (result.type === 'room') {
-                // Fetch ratings for this room
-                fetch(`/api/room/${result.id}/ratings/`)
-                  .then(r => r.ok ? r.json() : Promise.resolve({ average_rating: 0, total_ratings: 0 }))
+                // Ratings for this room
+                roomRatings
+                  .then(batch => batch[result.id] || { average_rating: 0, total_ratings: 0 })
                   .then(ratingData => {
                     const avgRating = ratingData.average_rating || 0;
                     const totalRatings = ratingData.total_ratings || 0;
@@ -1294,13 +1308,12 @@ window.showRoomPreview = function(roomId) {
         star.classList.add('far');
     });
     
-    // Fetch room data, photos, and ratings in parallel for better performance
-    Promise.all([
-        fetch(`/api/room/${roomId}/`).then(r => r.ok ? r.json() : Promise.resolve({})),
-        fetch(`/api/room/${roomId}/photos/`).then(r => r.ok ? r.json() : Promise.resolve({})),
-        fetch(`/api/room/${roomId}/ratings/`).then(r => r.ok ? r.json() : Promise.resolve({ total_ratings: 0, average_rating: 0, feedbacks: [] }))
-    ])
-    .then(([roomData, photosData, ratingsData]) => {
+    // Fetch room details, photos, and ratings in one request
+    fetch(`/api/room/${roomId}/full/?fields=details,photos,ratings,feedback`)
+    .then(r => r.ok ? r.json() : Promise.resolve({ total_ratings: 0, average_rating: 0, feedbacks: [] }))
+    .then(roomData => {
+        const photosData = roomData;
+        const ratingsData = roomData;
         // Track room view with complete room data for guests
         if (roomData && roomData.room) {
             trackRoomView(roomId, roomData.room);
@@ -1488,6 +1501,14 @@ function highlightRoomOnFloorPlan(roomId, roomNumber) {
         .catch(err => console.error('Error highlighting room on floor plan:', err));
 }
 
+// Look up many rooms in one request; resolves to the rooms keyed by id
+function fetchRoomBatch(roomIds, include) {
+    if (roomIds.length === 0) return Promise.resolve({});
+    return fetch(`/api/rooms/batch/?ids=${roomIds.join(',')}&include=${include}`)
+        .then(r => r.ok ? r.json() : Promise.resolve({ rooms: {} }))
+        .then(data => data.rooms || {});
+}
+
 function generateStarDisplay(rating) {
     let starsHtml = '';
     const fullStars = Math.floor(rating);
@@ -2208,6 +2229,25 @@ document.getElementById('roomPreviewModal')?.addEventListener('click', (e) => {
 });
 
 // Save Location Functions
+
+// The user's saved room ids, loaded once per page and kept in step with save/unsave
+let savedRoomIdsPromise = null;
+function loadSavedRoomIds() {
+    if (!savedRoomIdsPromise) {
+        savedRoomIdsPromise = fetch('/api/user/saved/', {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        })
+        .then(response => response.ok ? response.json() : Promise.resolve({}))
+        .then(data => new Set(data.status === 'success' ? data.room_ids : []))
+        .catch(() => {
+            // Guests (or a failed request) see nothing as saved; retry next time
+            savedRoomIdsPromise = null;
+            return new Set();
+        });
+    }
+    return savedRoomIdsPromise;
+}
+
 window.toggleSaveLocation = function() {
     const modal = document.getElementById('roomPreviewModal');
     const roomId = modal.dataset.currentRoomId;
@@ -2258,6 +2298,7 @@ window.saveLocation = function(roomId, btn) {
                 span.textContent = 'Saved';
             }
             
+            if (savedRoomIdsPromise) savedRoomIdsPromise.then(ids => ids.add(Number(roomId)));
             showNotification('Location saved successfully!', 'success');
         } else if (data.error && (data.error.includes('authentication') || data.error.includes('login'))) {
             showNotification('Please login to save locations', 'error');
@@ -2299,6 +2340,7 @@ window.removeSavedLocation = function(roomId, btn) {
                 span.textContent = 'Save';
             }
             
+            if (savedRoomIdsPromise) savedRoomIdsPromise.then(ids => ids.delete(Number(roomId)));
             showNotification('Location removed from saved', 'success');
         } else {
             showNotification('Error: ' + (data.message || 'Failed to remove location'), 'error');
@@ -2313,31 +2355,9 @@ window.removeSavedLocation = function(roomId, btn) {
 window.updateSaveButtonState = function(roomId, btn) {
     if (!roomId || !btn) return;
     
-    const url = `/api/room/${roomId}/check-saved/`;
-    
-    fetch(url, {
-        method: 'GET',
-        headers: {
-            'X-Requested-With': 'XMLHttpRequest',
-            'Content-Type': 'application/json'
-        }
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        // Accept any successful response, regardless of content-type (some errors might be HTML)
-        return response.text().then(text => {
-            try {
-                return JSON.parse(text);
-            } catch (e) {
-                console.warn('Failed to parse JSON response, treating as empty:', text.substring(0, 100));
-                return { status: 'error', is_saved: false }; // Default to not saved on parse error
-            }
-        });
-    })
-    .then(data => {
-        if (data.status === 'success' && data.is_saved) {
+    loadSavedRoomIds()
+    .then(ids => {
+        if (ids.has(Number(roomId))) {
             btn.classList.add('saved');
             btn.querySelector('i').classList.remove('far');
             btn.querySelector('i').classList.add('fas');
@@ -0,0 +1,202 @@
+"""
+Pre-aggregated statistics for the admin statistics dashboard
+UserActivity is rolled up incrementally into hourly counts, reading only the
+rows added since the last run, while per-room stats and schedule load are
+rebuilt as small snapshot tables. The dashboard reads these rows instead of
+scanning the raw tables on every page load.
+"""
+from datetime import timedelta
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour, TruncHour
+from django.utils import timezone
+
+from .models import (
+    ActivityRollup, BackgroundJob, Feedback, Room, RollupCheckpoint, RoomStats,
+    SavedLocation, Schedule, ScheduleLoadRollup, UserActivity, UserActivityRollup
+)
+
+
+ACTIVITY_CHECKPOINT = 'activity'
+ACTIVITY_BATCH_SIZE = 10000  # UserActivity ids rolled up per transaction
+ACTIVITY_SETTLE_DELAY = timedelta(minutes=5)  # Newer rows may still have uncommitted rows below their ids
+REFRESH_MAX_AGE = timedelta(minutes=5)  # Dashboard queues a refresh once rollups are older than this
+
+
+def _apply_counts(model, key_fields, counts, hours):
+    """Add counts to the rollup rows for the given hours, creating missing rows"""
+    existing = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in model.objects.filter(hour__in=hours)
+    }
+    to_create, to_update = [], []
+    for key, count in counts.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(model(count=count, **dict(zip(key_fields, key))))
+        else:
+            row.count += count
+            to_update.append(row)
+    model.objects.bulk_create(to_create, batch_size=1000)
+    model.objects.bulk_update(to_update, ['count'], batch_size=1000)
+
+
+def _settled_upper_id(last_id: int, batch_size: int, cutoff) -> int:
+    """Get how far past last_id the checkpoint can safely move
+
+    Ids are handed out when rows are inserted but become visible when their
+    transaction commits, so concurrent inserts (e.g. buffered activity
+    flushed by several processes) can commit out of id order. The
+    checkpoint only moves over rows older than the settle delay and stops
+    at the first newer one, leaving the ids around it for a later run; a
+    gap below a settled row is a rolled back or deleted row.
+    """
+    upper_id = last_id
+    rows = UserActivity.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'timestamp')[:batch_size]
+    for activity_id, timestamp in rows:
+        if timestamp >= cutoff:
+            break
+        upper_id = activity_id
+    return upper_id
+
+
+def roll_up_activity(batch_size: int = ACTIVITY_BATCH_SIZE) -> int:
+    """Add settled UserActivity rows created since the last run to the hourly rollups
+
+    Each batch is aggregated by the database and applied in the same
+    transaction that advances the checkpoint, so a batch is counted exactly
+    once even if two workers run this at the same time.
+    Returns the id range size that was processed.
+    """
+    checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=ACTIVITY_CHECKPOINT)
+    cutoff = timezone.now() - ACTIVITY_SETTLE_DELAY
+    start_id = last_id = checkpoint.last_id
+
+    while True:
+        upper_id = _settled_upper_id(last_id, batch_size, cutoff)
+        if upper_id == last_id:
+            break
+        with transaction.atomic():
+            # Claim the batch first; a concurrent run that got here first makes this a no-op
+            claimed = RollupCheckpoint.objects.filter(
+                name=ACTIVITY_CHECKPOINT, last_id=last_id
+            ).update(last_id=upper_id)
+            if not claimed:
+                break
+
+            batch = UserActivity.objects.filter(id__gt=last_id, id__lte=upper_id).annotate(
+                bucket=TruncHour('timestamp')
+            )
+            type_counts = {
+                (row['bucket'], row['activity_type']): row['count']
+                for row in batch.values('bucket', 'activity_type').annotate(count=Count('id'))
+            }
+            user_counts = {
+                (row['bucket'], row['user_id']): row['count']
+                for row in batch.values('bucket', 'user_id').annotate(count=Count('id'))
+            }
+            hours = {bucket for bucket, _ in type_counts}
+            _apply_counts(ActivityRollup, ('hour', 'activity_type'), type_counts, hours)
+            _apply_counts(UserActivityRollup, ('hour', 'user_id'), user_counts, hours)
+        last_id = upper_id
+
+    return last_id - start_id
+
+
+def rebuild_room_stats() -> int:
+    """Recompute the rating, comment, save and schedule counts of every room"""
+    ratings = {
+        row['room_id']: row
+        for row in Feedback.objects.values('room_id').annotate(
+            rating_count=Count('id'),
+            rating_sum=Sum('rating'),
+            comment_count=Count('id', filter=~Q(comment=''))
+        )
+    }
+    saves = dict(SavedLocation.objects.values('room_id').annotate(n=Count('id')).values_list('room_id', 'n'))
+    schedules = dict(Schedule.objects.values('room_id').annotate(n=Count('id')).values_list('room_id', 'n'))
+
+    with transaction.atomic():
+        existing = {stats.room_id: stats for stats in RoomStats.objects.all()}
+        to_create, to_update = [], []
+        for room_id in Room.objects.values_list('id', flat=True):
+            rating = ratings.get(room_id, {})
+            stats = existing.get(room_id) or RoomStats(room_id=room_id)
+            stats.rating_count = rating.get('rating_count', 0)
+            stats.rating_sum = rating.get('rating_sum') or 0
+            stats.comment_count = rating.get('comment_count', 0)
+            stats.save_count = saves.get(room_id, 0)
+            stats.schedule_count = schedules.get(room_id, 0)
+            stats.updated_at = timezone.now()
+            (to_update if stats.pk else to_create).append(stats)
+        RoomStats.objects.bulk_create(to_create, batch_size=1000)
+        RoomStats.objects.bulk_update(
+            to_update,
+            ['rating_count', 'rating_sum', 'comment_count', 'save_count', 'schedule_count', 'updated_at'],
+            batch_size=1000
+        )
+    return len(to_create) + len(to_update)
+
+
+def rebuild_schedule_load() -> int:
+    """Recompute class counts per building, day and start hour"""
+    rows = [
+        ScheduleLoadRollup(
+            building=row['room__floor__building'], day=row['day'],
+            start_hour=row['start_hour'], count=row['count']
+        )
+        for row in Schedule.objects.annotate(start_hour=ExtractHour('start')).values(
+            'room__floor__building', 'day', 'start_hour'
+        ).annotate(count=Count('id'))
+    ]
+    with transaction.atomic():
+        ScheduleLoadRollup.objects.all().delete()
+        ScheduleLoadRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def refresh_rollups(rebuild_activity: bool = False) -> Dict:
+    """Bring every statistics rollup up to date
+
+    With rebuild_activity the activity rollups are dropped and recomputed
+    from the whole UserActivity table.
+    """
+    if rebuild_activity:
+        with transaction.atomic():
+            ActivityRollup.objects.all().delete()
+            UserActivityRollup.objects.all().delete()
+            RollupCheckpoint.objects.filter(name=ACTIVITY_CHECKPOINT).update(last_id=0)
+
+    report = {
+        'activity_ids': roll_up_activity(),
+        'rooms': rebuild_room_stats(),
+        'schedule_load_rows': rebuild_schedule_load(),
+    }
+    RollupCheckpoint.objects.filter(name=ACTIVITY_CHECKPOINT).update(updated_at=timezone.now())
+    print(f"[Statistics] Rollups refreshed: {report}")
+    return report
+
+
+def get_rollups_updated_at():
+    """Get the time of the last completed refresh, or None if it never ran"""
+    return RollupCheckpoint.objects.filter(name=ACTIVITY_CHECKPOINT).values_list('updated_at', flat=True).first()
+
+
+def request_refresh(updated_at, user=None) -> bool:
+    """Queue a rollup refresh for the worker if the rollups are stale
+
+    Returns True if a refresh is queued or already in progress.
+    """
+    from .jobs import enqueue_job
+
+    if updated_at and timezone.now() - updated_at < REFRESH_MAX_AGE:
+        return False
+    in_progress = BackgroundJob.objects.filter(
+        job_type=BackgroundJob.JobType.STATISTICS_ROLLUP,
+        status__in=[BackgroundJob.Status.PENDING, BackgroundJob.Status.RUNNING]
+    ).exists()
+    if not in_progress:
+        enqueue_job(BackgroundJob.JobType.STATISTICS_ROLLUP, {}, user=user)
+    return True
@@ -4,10 +4,9 @@ Extracts room information (IDs, dimensions, coordinates) from SVG files
 """
 
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Tuple, Optional
+from typing import Iterator, List, Dict, Tuple, Optional
 import re
 import os
-import csv
 
 
 class SVGRoom:
@@ -25,6 +24,7 @@ class SVGRoom:
         self.color = color  # Fill color from SVG (e.g., '#FF8D4F')
         self.room_type = room_type  # Determined by color (e.g., 'Fire Exit', 'Elevator/Stairs')
         self.room_name = room_name  # Room name from CSV reference
+        self.coords_match = None  # Strategy that matched Room_coords.csv, if any
         self.center_x = x + (width / 2) if width else x
         self.center_y = y + (height / 2) if height else y
     
@@ -43,6 +43,7 @@ class SVGRoom:
             'color': self.color,
             'room_type': self.room_type,
             'room_name': self.room_name,
+            'coords_match': self.coords_match,
         }
     
     def __repr__(self):
@@ -93,13 +94,19 @@ class SVGParser:
         '#8E44AD': 'Girls Bathroom',  # Dark purple
     }
     
-    def __init__(self, svg_file_path: str, floor_number: int = None, building_id: str = None):
+    # Bytes fed to the pull parser at a time in streaming mode
+    STREAM_CHUNK_SIZE = 256 * 1024
+    
+    def __init__(self, svg_file_path: str, floor_number: int = None, building_id: str = None,
+                 streaming: bool = False):
         """Initialize parser with SVG file path
         
         Args:
             svg_file_path: Path to the SVG file
             floor_number: Optional floor number (use if filename doesn't contain HPSB#)
             building_id: Optional building ID (default: "10" for HPSB)
+            streaming: If True, never build the full DOM; rooms are read with
+                iterparse via iter_rooms() (extract_rooms() also streams)
         """
         self.svg_file_path = svg_file_path
         self.tree = None
@@ -107,11 +114,13 @@ class SVGParser:
         self.rooms: List[SVGRoom] = []
         self.building_id = building_id  # Will extract from filename or use provided value
         self.floor_number = floor_number  # Will extract from filename or use provided value
+        self.streaming = streaming
         self.room_name_map = {}  # Map of room number to name from CSV
         self.room_coords_map = {}  # Map of room number to coordinates from CSV
         self._extract_building_floor_info()
         self._load_room_names_from_csv()
-        self._parse_file()
+        if not streaming:
+            self._parse_file()
     
     def _extract_building_floor_info(self):
         """Extract building ID and floor number from file path"""
@@ -143,53 +152,21 @@ class SVGParser:
             # Load room names
             self.room_name_map = RoomNameManager.load_room_names()
             
-            # Load room coordinates
-            self.room_coords_map = RoomNameManager.load_room_coordinates()
+            # Shared coordinate resolver (indexed lookups over Room_coords.csv)
+            self.coordinate_resolver = RoomNameManager.get_coordinate_resolver()
+            self.room_coords_map = self.coordinate_resolver.coords_map
             
-            # Build a mapping from Room Number to Room Id for coordinate lookup
+            # Mapping from Room Number to Room Id for coordinate lookup
             # This allows matching SVG element IDs (which are room numbers) to full room IDs
-            self._room_number_to_id_map = self._build_room_number_to_id_mapping()
+            self._room_number_to_id_map = self.coordinate_resolver.room_number_to_id
         
         except Exception as e:
             print(f"Warning: Error loading room data from CSV: {str(e)}")
+            from .room_manager import RoomCoordinateResolver
+            self.coordinate_resolver = RoomCoordinateResolver({})
             self.room_coords_map = {}
             self._room_number_to_id_map = {}
     
-    def _build_room_number_to_id_mapping(self) -> Dict[str, str]:
-        """Build a mapping from Room Number to Room Id using DataDicForSVG.csv
-        
-        This allows matching SVG element IDs (which are room numbers like '720')
-        to their full Room IDs (like '10721') for coordinate lookup.
-        """
-        room_number_to_id = {}
-        csv_file = None
-        
-        try:
-            from .room_manager import RoomNameManager
-            csv_file = RoomNameManager.get_csv_file_path()
-            
-            if not csv_file:
-                return room_number_to_id
-            
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if not row or not row.get('Room Number') or not row.get('Room Id'):
-                        continue
-                    
-                    room_number = row.get('Room Number', '').strip()
-                    room_id = row.get('Room Id', '').strip()
-                    
-                    if room_number and room_id:
-                        # Map room number to room id
-                        # Example: "720" -> "10721"
-                        room_number_to_id[room_number] = room_id
-        
-        except Exception as e:
-            print(f"Warning: Error building room number to ID mapping: {str(e)}")
-        
-        return room_number_to_id
-    
     def _get_room_name_from_id(self, element_id: str) -> Optional[str]:
         """Extract room number from SVG element ID and look up name in CSV"""
         try:
@@ -276,30 +253,77 @@ class SVGParser:
     
     def extract_rooms(self) -> List[SVGRoom]:
         """Extract all rooms from the SVG"""
-        self.rooms = []
-        
-        if self.root is None:
-            return self.rooms
-        
-        # Register namespace
-        namespace = {'svg': 'http://www.w3.org/2000/svg'}
-        
-        # Find all elements with IDs (potential rooms)
-        for element in self.root.iter():
-            element_id = element.get('id', '').strip()
+        if self.streaming:
+            self.rooms = list(self.iter_rooms())
+        else:
+            self.rooms = []
             
-            # Skip empty IDs and excluded elements
-            if not element_id or self._is_excluded(element_id):
-                continue
+            if self.root is None:
+                return self.rooms
             
-            room = self._parse_element(element, element_id)
-            if room:
-                self.rooms.append(room)
+            # Find all elements with IDs (potential rooms)
+            for element in self.root.iter():
+                room = self._room_from_element(element)
+                if room:
+                    self.rooms.append(room)
         
         # Sort rooms by ID for consistency
         self.rooms.sort(key=lambda r: r.room_id)
         return self.rooms
     
+    def iter_rooms(self) -> Iterator[SVGRoom]:
+        """Stream rooms from the SVG file without building the whole DOM
+        
+        Works like ET.iterparse, but feeds the pull parser in larger chunks
+        (floorplans embed multi-MB base64 images in a single attribute, which
+        iterparse's 16 KB reads handle slowly). Every element is dropped from
+        its parent as soon as it has been handled, so memory stays flat
+        regardless of SVG size. Rooms are yielded in document order
+        (extract_rooms() sorts them).
+        """
+        pull_parser = ET.XMLPullParser(events=('start', 'end'))
+        open_elements = []
+        
+        try:
+            with open(self.svg_file_path, 'rb') as svg_file:
+                while True:
+                    chunk = svg_file.read(self.STREAM_CHUNK_SIZE)
+                    if chunk:
+                        pull_parser.feed(chunk)
+                    else:
+                        pull_parser.close()
+                    
+                    for event, element in pull_parser.read_events():
+                        if event == 'start':
+                            open_elements.append(element)
+                            continue
+                        
+                        open_elements.pop()
+                        room = self._room_from_element(element)
+                        
+                        # Release the processed subtree
+                        element.clear()
+                        if open_elements:
+                            open_elements[-1].remove(element)
+                        
+                        if room:
+                            yield room
+                    
+                    if not chunk:
+                        break
+        except ET.ParseError as e:
+            raise ValueError(f"Error parsing SVG file: {str(e)}")
+    
+    def _room_from_element(self, element) -> Optional[SVGRoom]:
+        """Parse an element into a room if it has a room-like ID"""
+        element_id = element.get('id', '').strip()
+        
+        # Skip empty IDs and excluded elements
+        if not element_id or self._is_excluded(element_id):
+            return None
+        
+        return self._parse_element(element, element_id)
+    
     def _is_excluded(self, element_id: str) -> bool:
         """Check if element should be excluded based on room ID format
         
@@ -445,35 +469,15 @@ class SVGParser:
                 room.room_name = room_name
 
                 # --- FIXED: robust CSV lookup for coordinates, including Z ---
-                room_id = self._extract_room_number_from_id(element_id)
-                csv_coords = None
-
-                # 1️⃣ Try mapping SVG element ID (room number) to full Room Id from CSV
-                # Example: SVG ID "720" -> Room Id "10721"
-                if room_id in self._room_number_to_id_map:
-                    full_room_id = self._room_number_to_id_map[room_id]
-                    if full_room_id in self.room_coords_map:
-                        csv_coords = self.room_coords_map[full_room_id]
-
+                # Resolver tries, in order:
+                # 1️⃣ SVG element ID (room number) mapped to full Room Id, e.g. "720" -> "10721"
                 # 2️⃣ Direct match with full CSV ID (for full room IDs in SVG)
-                if not csv_coords and room_id in self.room_coords_map:
-                    csv_coords = self.room_coords_map[room_id]
-
                 # 3️⃣ Extracted digits from room ID (last 3-4 digits depending on floor)
-                if not csv_coords:
-                    if self.floor_number <= 9:
-                        extracted = room_id[-3:]  # last 3 digits
-                    else:
-                        extracted = room_id[-4:]  # last 4 digits
-                    if extracted in self.room_coords_map:
-                        csv_coords = self.room_coords_map[extracted]
-
-                # 4️⃣ Endswith fallback for mismatched numbering
-                if not csv_coords:
-                    for key, val in self.room_coords_map.items():
-                        if key.endswith(room_id):
-                            csv_coords = val
-                            break
+                # 4️⃣ Suffix fallback for mismatched numbering (indexed, no scan)
+                room_id = self._extract_room_number_from_id(element_id)
+                match = self.coordinate_resolver.resolve_svg_element(room_id, self.floor_number)
+                csv_coords = match.coords if match else None
+                room.coords_match = match.strategy if match else None
 
                 # Apply CSV coordinates if found
                 if csv_coords:
@@ -0,0 +1,28 @@
+"""
+Shared test setup: isolated caches so tests never read or clear the
+developer's shared cache directory, and a fast password hasher
+"""
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'umap-test-default',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'umap-test-shared',
+    },
+}
+
+
+@override_settings(CACHES=TEST_CACHES, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CacheTestCase(TestCase):
+    """TestCase that starts every test with empty caches"""
+
+    def setUp(self):
+        super().setUp()
+        for alias in TEST_CACHES:
+            caches[alias].clear()
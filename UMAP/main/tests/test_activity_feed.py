@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main.activity_feed import decode_cursor, encode_cursor, get_feed_page
+from main.models import Feedback, Floor, Room, SavedLocation, User, UserActivity
+
+from .base import CacheTestCase
+
+
+class ActivityFeedTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        floor = Floor.objects.create(name='1st Floor', building='HPSB')
+        rooms = [Room.objects.create(floor=floor) for _ in range(3)]
+        self.now = timezone.now().replace(microsecond=0)
+
+        # Several rows per source share a timestamp so ties cross page boundaries
+        self.expected = []
+        for minutes in (0, 0, 1, 2):
+            when = self.now - timedelta(minutes=minutes)
+            activity = UserActivity.objects.create(user=self.user, activity_type='login', timestamp=when)
+            self.expected.append((when, 0, activity.id))
+        for minutes, room in zip((0, 1, 1), rooms):
+            feedback = Feedback.objects.create(user=self.user, room=room, rating=4)
+            Feedback.objects.filter(id=feedback.id).update(creation_date=self.now - timedelta(minutes=minutes))
+            self.expected.append((self.now - timedelta(minutes=minutes), 1, feedback.id))
+        for minutes, room in zip((0, 2), rooms):
+            saved = SavedLocation.objects.create(user=self.user, room=room)
+            SavedLocation.objects.filter(id=saved.id).update(saved_date=self.now - timedelta(minutes=minutes))
+            self.expected.append((self.now - timedelta(minutes=minutes), 2, saved.id))
+        self.expected.sort(reverse=True)
+
+    def walk(self, page_size):
+        keys, cursor, pages = [], None, 0
+        while True:
+            page = get_feed_page(cursor, page_size=page_size)
+            pages += 1
+            keys.extend((entry['timestamp'], ('activity', 'feedback', 'saved_location').index(entry['type']),
+                         entry['item'].id) for entry in page['entries'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return keys, pages
+
+    def test_pages_cover_the_merged_feed_in_order(self):
+        for page_size in (1, 2, 3, 4, 20):
+            keys, pages = self.walk(page_size)
+            self.assertEqual(keys, self.expected)
+            self.assertEqual(pages, max(1, -(-len(self.expected) // page_size)))
+
+    def test_cursor_round_trip(self):
+        key = (self.now, 1, 42)
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+
+    def test_malformed_cursor(self):
+        with self.assertRaises(ValueError):
+            get_feed_page('not-a-cursor')
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+
+from main.ar_payload import PAYLOAD_CACHE_KEY, get_ar_delta, get_ar_payload
+from main.models import Floor, Room, RoomProfile
+
+from .base import CacheTestCase
+
+
+def in_other_worker(func, *args):
+    """Run func as a worker that has not built its own AR payload yet"""
+    own_payload = cache.get(PAYLOAD_CACHE_KEY)
+    cache.delete(PAYLOAD_CACHE_KEY)
+    try:
+        return func(*args)
+    finally:
+        cache.set(PAYLOAD_CACHE_KEY, own_payload, None)
+
+
+class ARPayloadVersionTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        floor = Floor.objects.create(name='1st Floor', building='HPSB')
+        self.profiles = [
+            RoomProfile.objects.create(room=Room.objects.create(floor=floor), number=f'10{i}',
+                                       name=f'Room 10{i}', type='Lecture', coordinates={'x': i, 'y': 0, 'z': 1})
+            for i in range(3)
+        ]
+
+    def test_versions_mean_the_same_in_every_worker(self):
+        first = get_ar_payload()
+        self.assertEqual(in_other_worker(get_ar_payload)['version'], first['version'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profiles[0].name = 'Renamed'
+            self.profiles[0].save()
+        changed = in_other_worker(get_ar_payload)
+        self.assertGreater(changed['version'], first['version'])
+
+        # A client that last synced with the first worker gets a delta from the other one
+        delta = in_other_worker(lambda: get_ar_delta(get_ar_payload(), first['version']))
+        self.assertEqual([room['name'] for room in delta['rooms']], ['Renamed'])
+
+        # And the first worker catches up to the same version and delta
+        payload = get_ar_payload()
+        self.assertEqual(payload['version'], changed['version'])
+        self.assertEqual(get_ar_delta(payload, changed['version'])['rooms'], [])
+        self.assertEqual(len(get_ar_delta(payload, first['version'])['rooms']), 1)
+
+    def test_deleted_rooms_leave_tombstones(self):
+        first = get_ar_payload()
+        room_id = self.profiles[1].room_id
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profiles[1].delete()
+        delta = get_ar_delta(in_other_worker(get_ar_payload), first['version'])
+
+        self.assertEqual(delta['deleted'], [room_id])
+        self.assertEqual(delta['total_rooms'], 2)
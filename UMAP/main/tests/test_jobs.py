@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from main.jobs import (
+    JOB_HANDLERS, MAX_ATTEMPTS, claim_next_job, job_handler, requeue_stale_jobs, run_job, update_progress
+)
+from main.models import BackgroundJob
+
+
+class JobQueueTests(TestCase):
+    def create_job(self, **fields):
+        return BackgroundJob.objects.create(job_type=BackgroundJob.JobType.STATISTICS_ROLLUP, **fields)
+
+    def test_claims_oldest_pending_job_once(self):
+        first = self.create_job()
+        second = self.create_job()
+        self.create_job(status=BackgroundJob.Status.SUCCEEDED)
+
+        claimed = claim_next_job()
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.status, BackgroundJob.Status.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(claimed.heartbeat_at, claimed.started_at)
+
+        self.assertEqual(claim_next_job().id, second.id)
+        self.assertIsNone(claim_next_job())
+
+    def test_run_job_records_result_and_failure(self):
+        @job_handler('test_ok')
+        def ok(job):
+            return {'done': job.payload['n']}
+
+        @job_handler('test_broken')
+        def broken(job):
+            raise RuntimeError('boom')
+
+        self.addCleanup(JOB_HANDLERS.pop, 'test_ok')
+        self.addCleanup(JOB_HANDLERS.pop, 'test_broken')
+
+        job = run_job(BackgroundJob.objects.create(job_type='test_ok', payload={'n': 3}))
+        self.assertEqual(job.status, BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(job.result, {'done': 3})
+
+        job = run_job(BackgroundJob.objects.create(job_type='test_broken'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertEqual(job.error, 'boom')
+
+    def test_requeues_stale_running_jobs(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        stale = self.create_job(status=BackgroundJob.Status.RUNNING, attempts=1,
+                                started_at=long_ago, heartbeat_at=long_ago)
+        fresh = self.create_job(status=BackgroundJob.Status.RUNNING, attempts=1,
+                                started_at=timezone.now(), heartbeat_at=timezone.now())
+
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), {'requeued': 1, 'failed': 0})
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, BackgroundJob.Status.PENDING)
+        self.assertIsNone(stale.started_at)
+        self.assertIsNone(stale.heartbeat_at)
+        self.assertEqual(fresh.status, BackgroundJob.Status.RUNNING)
+
+        self.assertEqual(claim_next_job().attempts, 2)
+
+    def test_fails_stale_jobs_out_of_attempts(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        job = self.create_job(status=BackgroundJob.Status.RUNNING, attempts=MAX_ATTEMPTS,
+                              started_at=long_ago, heartbeat_at=long_ago)
+
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), {'requeued': 0, 'failed': 1})
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next_job())
+
+    def test_long_job_reporting_progress_is_not_requeued(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        job = self.create_job(status=BackgroundJob.Status.RUNNING, attempts=1,
+                              started_at=long_ago, heartbeat_at=long_ago)
+        # Started two hours ago, but still reporting progress
+        update_progress(job, parsed=10)
+
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), {'requeued': 0, 'failed': 0})
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.RUNNING)
+        self.assertEqual(job.progress, {'parsed': 10})
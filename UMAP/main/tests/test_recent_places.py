@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main.activity_buffer import ActivityBuffer
+from main.models import Floor, Room, RoomProfile, User, UserActivity
+from main.recent_places import get_recent_places
+
+from .base import CacheTestCase
+
+
+class RecentPlacesTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.floor = Floor.objects.create(name='1st Floor', building='HPSB')
+        self.rooms = []
+        for number in ('1001', '1002'):
+            room = Room.objects.create(floor=self.floor)
+            RoomProfile.objects.create(room=room, number=number, name=f'Room {number}', type='Classroom')
+            self.rooms.append(room)
+        self.buffer = ActivityBuffer()
+        self.clock = timezone.now() - timedelta(minutes=10)
+
+    def view(self, activity_type, **details):
+        self.clock += timedelta(seconds=1)
+        self.buffer._pending.append(UserActivity(
+            user=self.user, activity_type=activity_type, details=details, timestamp=self.clock
+        ))
+
+    def places(self):
+        return [(place['type'], place['id']) for place in get_recent_places(self.user)]
+
+    def test_newest_first_without_duplicates(self):
+        self.view(UserActivity.ActivityType.ROOM_VIEW, room_id=self.rooms[0].id)
+        self.view(UserActivity.ActivityType.FLOOR_VIEW, floor_id=self.floor.id)
+        self.view(UserActivity.ActivityType.LOGIN)
+        self.view(UserActivity.ActivityType.ROOM_VIEW, room_id=self.rooms[0].id)
+        self.buffer.flush()
+
+        self.assertEqual(self.places(), [('room', self.rooms[0].id), ('floor', self.floor.id)])
+
+    def test_cached_list_follows_written_views(self):
+        self.view(UserActivity.ActivityType.ROOM_VIEW, room_id=self.rooms[0].id)
+        self.buffer.flush()
+        self.assertEqual(self.places(), [('room', self.rooms[0].id)])
+
+        # Buffered views show up once they are written, not before
+        self.view(UserActivity.ActivityType.ROOM_VIEW, room_id=self.rooms[1].id)
+        self.assertEqual(self.places(), [('room', self.rooms[0].id)])
+        self.buffer.flush()
+        self.assertEqual(self.places(), [('room', self.rooms[1].id), ('room', self.rooms[0].id)])
+
+    def test_deleted_places_are_skipped(self):
+        self.view(UserActivity.ActivityType.ROOM_VIEW, room_id=self.rooms[0].id)
+        self.view(UserActivity.ActivityType.ROOM_VIEW, room_id=self.rooms[1].id)
+        self.buffer.flush()
+        self.rooms[1].delete()
+
+        self.assertEqual(self.places(), [('room', self.rooms[0].id)])
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import AnonymousUser
+
+from main.models import Floor, Room, RoomProfile
+from main.room_batch import get_room_batch, parse_includes, parse_room_ids
+from main.room_detail import build_room_detail, get_room
+
+from .base import CacheTestCase
+
+
+class RoomBatchTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        floor = Floor.objects.create(name='1st Floor', building='HPSB')
+        self.room = Room.objects.create(floor=floor)
+        RoomProfile.objects.create(room=self.room, number='1001', name='Library', type='Study',
+                                   description='Quiet', images=['/media/a.jpg'])
+        self.bare_room = Room.objects.create(floor=floor)
+
+    def test_card_matches_modal_details(self):
+        card = get_room_batch([self.room.id], ('summary',), AnonymousUser())['rooms'][self.room.id]
+        details = build_room_detail(get_room(self.room.id), ('details',), AnonymousUser())
+
+        self.assertEqual(card['image_url'], '/media/a.jpg')
+        self.assertEqual(details['description'], 'Quiet')
+        self.assertEqual({key: details[key] for key in card}, card)
+
+    def test_missing_rooms_and_rooms_without_profile(self):
+        batch = get_room_batch([self.bare_room.id, 999999], ('summary', 'rating'), AnonymousUser())
+        self.assertEqual(batch['missing'], [999999])
+        self.assertEqual(batch['rooms'][self.bare_room.id]['name'], '')
+        self.assertEqual(batch['rooms'][self.bare_room.id]['total_ratings'], 0)
+
+    def test_parse_arguments(self):
+        self.assertEqual(parse_room_ids('3,1,3,'), [3, 1])
+        self.assertEqual(parse_includes(''), ('summary',))
+        with self.assertRaises(ValueError):
+            parse_room_ids('1,x')
+        with self.assertRaises(ValueError):
+            parse_includes('summary,secret')
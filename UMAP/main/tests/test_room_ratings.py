@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main.models import Feedback, Floor, Room, RoomRatingSummary, User
+from main.room_ratings import decode_cursor, get_feedback_page, get_rating_summaries, get_rating_summary
+
+from .base import CacheTestCase
+
+
+class RatingSummaryTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        floor = Floor.objects.create(name='1st Floor', building='HPSB')
+        self.room = Room.objects.create(floor=floor)
+        self.other_room = Room.objects.create(floor=floor)
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+
+    def assertSummary(self, room, total, average, histogram):
+        summary = get_rating_summary(room.id)
+        self.assertEqual(summary['total_ratings'], total)
+        self.assertEqual(summary['average_rating'], average)
+        self.assertEqual(summary['histogram'], {str(stars): histogram.get(stars, 0) for stars in range(1, 6)})
+
+    def test_new_ratings_are_added(self):
+        Feedback.objects.create(user=self.alice, room=self.room, rating=5)
+        Feedback.objects.create(user=self.bob, room=self.room, rating=2)
+        self.assertSummary(self.room, 2, 3.5, {5: 1, 2: 1})
+        self.assertSummary(self.other_room, 0, 0, {})
+
+    def test_changed_rating_moves_between_stars(self):
+        feedback = Feedback.objects.create(user=self.alice, room=self.room, rating=5)
+        feedback.rating = 1
+        feedback.save()
+        self.assertSummary(self.room, 1, 1, {1: 1})
+
+        # update_or_create as used by the rating view
+        Feedback.objects.update_or_create(user=self.alice, room=self.room, defaults={'rating': 3})
+        self.assertSummary(self.room, 1, 3, {3: 1})
+
+    def test_comment_only_edit_keeps_summary(self):
+        feedback = Feedback.objects.create(user=self.alice, room=self.room, rating=4)
+        feedback.comment = 'Quiet room'
+        feedback.save()
+        self.assertSummary(self.room, 1, 4, {4: 1})
+
+    def test_rating_moved_to_another_room(self):
+        feedback = Feedback.objects.create(user=self.alice, room=self.room, rating=4)
+        feedback.room = self.other_room
+        feedback.save()
+        self.assertSummary(self.room, 0, 0, {})
+        self.assertSummary(self.other_room, 1, 4, {4: 1})
+
+    def test_deleted_rating_is_removed(self):
+        feedback = Feedback.objects.create(user=self.alice, room=self.room, rating=4)
+        Feedback.objects.create(user=self.bob, room=self.room, rating=2)
+        feedback.delete()
+        self.assertSummary(self.room, 1, 2, {2: 1})
+
+    def test_cascading_deletes(self):
+        Feedback.objects.create(user=self.alice, room=self.room, rating=4)
+        Feedback.objects.create(user=self.bob, room=self.room, rating=2)
+        Feedback.objects.create(user=self.bob, room=self.other_room, rating=5)
+
+        # Deleting a user removes their ratings from every room
+        self.bob.delete()
+        self.assertSummary(self.room, 1, 4, {4: 1})
+        self.assertSummary(self.other_room, 0, 0, {})
+
+        # Deleting a room takes its summary with it
+        self.room.delete()
+        self.assertFalse(RoomRatingSummary.objects.filter(room_id=self.room.id).exists())
+
+    def test_summaries_in_bulk(self):
+        Feedback.objects.create(user=self.alice, room=self.room, rating=4)
+        summaries = get_rating_summaries([self.room.id, self.other_room.id])
+        self.assertEqual(summaries[self.room.id]['total_ratings'], 1)
+        self.assertEqual(summaries[self.other_room.id]['total_ratings'], 0)
+
+
+class FeedbackPageTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.room = Room.objects.create(floor=Floor.objects.create(name='1st Floor', building='HPSB'))
+        now = timezone.now()
+        self.feedback_ids = []
+        # Pairs of feedback share a creation date, so ties land on page boundaries
+        for index in range(7):
+            user = User.objects.create_user(f'user{index}', password='pw')
+            feedback = Feedback.objects.create(user=user, room=self.room, rating=3)
+            Feedback.objects.filter(id=feedback.id).update(creation_date=now - timedelta(minutes=index // 2))
+            self.feedback_ids.append(feedback.id)
+        # Newest first, ties broken by the higher id
+        self.expected = sorted(self.feedback_ids, key=lambda feedback_id: (
+            -(self.feedback_ids.index(feedback_id) // 2), feedback_id
+        ), reverse=True)
+
+    def test_pages_cover_every_feedback_once(self):
+        for page_size in (1, 2, 3, 7, 10):
+            ids, cursor = [], None
+            while True:
+                page = get_feedback_page(self.room.id, cursor, page_size)
+                ids.extend(feedback.id for feedback in page['feedbacks'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+            self.assertEqual(ids, self.expected)
+
+    def test_malformed_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('garbage')
@@ -0,0 +1,46 @@
+from main.models import Floor, Room, RoomProfile
+from main.room_search import RoomSearchIndex
+
+from .base import CacheTestCase
+
+
+class RoomSearchIndexTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.floor = Floor.objects.create(name='4th Floor', building='HPSB')
+        self.rooms = {}
+        for number, name in [('HPSB 1005', 'Computer Laboratory'), ('HPSB 1010', 'Faculty Room'),
+                             ('HPSB 2001', 'Chemistry Lab')]:
+            room = Room.objects.create(floor=self.floor)
+            RoomProfile.objects.create(room=room, number=number, name=name, type='Classroom')
+            self.rooms[number] = room.id
+        Floor.objects.create(name='Ground Floor', building='Admin Building')
+        self.index = RoomSearchIndex()
+
+    def result_ids(self, query):
+        return [result['id'] for result in self.index.search_rooms(query)]
+
+    def test_exact_number_ranks_first(self):
+        self.assertEqual(self.result_ids('HPSB 1005')[0], self.rooms['HPSB 1005'])
+        self.assertEqual(self.result_ids('1005')[0], self.rooms['HPSB 1005'])
+
+    def test_number_typos_use_one_edit_neighbours(self):
+        # Transposition and substitution of the digits
+        self.assertEqual(self.result_ids('0105'), [self.rooms['HPSB 1005']])
+        self.assertEqual(self.result_ids('2002'), [self.rooms['HPSB 2001']])
+
+    def test_name_typos_use_trigram_similarity(self):
+        self.assertEqual(self.result_ids('chemestry'), [self.rooms['HPSB 2001']])
+
+    def test_typo_tables_follow_removed_rooms(self):
+        self.index.ensure_current()
+        with self.index._lock:
+            self.index._remove_room(self.rooms['HPSB 2001'])
+        self.assertEqual(self.result_ids('chemestry'), [])
+        self.assertEqual(self.result_ids('2002'), [])
+
+    def test_search_floors_by_substring(self):
+        self.assertEqual([f['name'] for f in self.index.search_floors('hps')], ['4th Floor'])
+        self.assertEqual([f['name'] for f in self.index.search_floors('admin build')], ['Ground Floor'])
+        self.assertEqual([f['name'] for f in self.index.search_floors('floor')], ['4th Floor', 'Ground Floor'])
+        self.assertEqual(self.index.search_floors('basement'), [])
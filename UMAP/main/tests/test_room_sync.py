@@ -0,0 +1,69 @@
+from main.models import Floor, Room, RoomProfile
+from main.room_manager import RoomCoordinateResolver
+from main.room_sync import sync_floor_rooms
+from main.svg_parser import SVGRoom
+
+from .base import CacheTestCase
+
+
+class SyncFloorRoomsTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.floor = Floor.objects.create(name='9th Floor', building='HPSB')
+        self.resolver = RoomCoordinateResolver({
+            '10912': {'x': 1.0, 'y': 2.0, 'z': 30.0},
+            '10913': {'x': 3.0, 'y': 4.0, 'z': 30.0},
+        })
+
+    def sync(self, svg_rooms, **options):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            report = sync_floor_rooms(self.floor, svg_rooms, 9, self.resolver, **options)
+        return report, callbacks
+
+    def profiles(self):
+        return {profile.number: profile for profile in RoomProfile.objects.filter(room__floor=self.floor)}
+
+    def test_creates_rooms_with_csv_coordinates(self):
+        report, callbacks = self.sync([
+            SVGRoom('10912', 'rect', 5, 5, 10, 10, room_name='Faculty Room', room_type='Office'),
+            SVGRoom('10913', 'rect', 6, 6, 10, 10),
+            SVGRoom('10914', 'rect', 7, 7, 10, 10),  # No CSV coordinates
+        ])
+
+        self.assertEqual((report['extracted'], report['matched'], report['created'], report['skipped']), (3, 2, 2, 1))
+        self.assertEqual(report['skipped_rooms'], [{'svg_id': '10914', 'room_number': '914'}])
+        profiles = self.profiles()
+        self.assertEqual(sorted(profiles), ['912', '913'])
+        self.assertEqual(profiles['912'].name, 'Faculty Room')
+        self.assertEqual(profiles['912'].coordinates, {'x': 1.0, 'y': 2.0, 'z': 30.0, 'width': 10, 'height': 10})
+        self.assertEqual(profiles['913'].name, 'Room 913')
+        # Cached room data is refreshed once the transaction commits
+        self.assertTrue(callbacks)
+
+    def test_updates_or_skips_existing_rooms(self):
+        room = Room.objects.create(floor=self.floor)
+        RoomProfile.objects.create(room=room, number='912', name='Old Name', type='Classroom')
+        svg_rooms = [SVGRoom('10912', 'rect', 5, 5, room_name='New Name', room_type='Office')]
+
+        report, _ = self.sync(svg_rooms, update_existing=False)
+        self.assertEqual((report['updated'], report['skipped']), (0, 1))
+        self.assertEqual(self.profiles()['912'].name, 'Old Name')
+
+        report, _ = self.sync(svg_rooms)
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual(self.profiles()['912'].name, 'New Name')
+        self.assertEqual(Room.objects.filter(floor=self.floor).count(), 1)
+
+    def test_fallback_coordinates_and_duplicate_numbers(self):
+        report, _ = self.sync([
+            SVGRoom('10914', 'rect', 7, 8, 2, 2),
+            SVGRoom('20914', 'rect', 9, 9, 2, 2),  # Same room number, later element wins
+        ], require_coords=False)
+
+        self.assertEqual((report['created'], report['updated']), (1, 1))
+        self.assertEqual(self.profiles()['914'].coordinates, {'x': 9, 'y': 9, 'z': 0, 'width': 2, 'height': 2})
+
+    def test_nothing_to_write(self):
+        report, callbacks = self.sync([])
+        self.assertEqual(report['extracted'], 0)
+        self.assertEqual(callbacks, [])
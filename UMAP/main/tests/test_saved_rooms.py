@@ -0,0 +1,54 @@
+import base64
+
+from django.core.cache import cache
+
+from main.http_cache import get_cache_version
+from main.models import Floor, Room, SavedLocation, User
+from main.saved_rooms import SAVED_ROOMS_CACHE_KEY, VERSION_CACHE_KEY, encode_bitmap, get_saved_room_ids
+
+from .base import CacheTestCase
+
+
+class SavedRoomIdsTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        floor = Floor.objects.create(name='1st Floor', building='HPSB')
+        self.rooms = [Room.objects.create(floor=floor) for _ in range(2)]
+
+    def save_room(self, room):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SavedLocation.objects.create(user=self.user, room=room)
+
+    def test_save_and_unsave_update_the_cached_set(self):
+        self.assertEqual(get_saved_room_ids(self.user.id), set())
+
+        saved = self.save_room(self.rooms[0])
+        self.save_room(self.rooms[1])
+        self.assertEqual(get_saved_room_ids(self.user.id), {self.rooms[0].id, self.rooms[1].id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            saved.delete()
+        self.assertEqual(get_saved_room_ids(self.user.id), {self.rooms[1].id})
+
+    def test_cascaded_unsave(self):
+        self.save_room(self.rooms[0])
+        self.assertEqual(get_saved_room_ids(self.user.id), {self.rooms[0].id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rooms[0].delete()
+        self.assertEqual(get_saved_room_ids(self.user.id), set())
+
+    def test_stale_load_cannot_replace_newer_state(self):
+        # A load that read the version before the save commits stores its result under that old version
+        old_version = get_cache_version(VERSION_CACHE_KEY.format(user_id=self.user.id))
+        self.save_room(self.rooms[0])
+        cache.set(SAVED_ROOMS_CACHE_KEY.format(user_id=self.user.id, version=old_version), set())
+
+        self.assertEqual(get_saved_room_ids(self.user.id), {self.rooms[0].id})
+
+    def test_encode_bitmap(self):
+        self.assertEqual(encode_bitmap(set()), {'offset': 0, 'length': 0, 'bitmap': ''})
+        encoded = encode_bitmap({5, 7, 14})
+        self.assertEqual((encoded['offset'], encoded['length']), (5, 10))
+        self.assertEqual(base64.b64decode(encoded['bitmap']), bytes([0b101, 0b10]))
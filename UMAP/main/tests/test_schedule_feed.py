@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from main.models import CalendarFeedToken, User, UserSession
+from main.schedule_export import _get_feed_owner, schedule_feed_url
+
+from .base import TEST_CACHES, CacheTestCase
+
+
+def in_other_worker(func, *args):
+    """Run func against a fresh 'shared' cache instance, as another worker process would"""
+    own_cache = caches['shared']
+    caches['shared'] = caches.create_connection('shared')
+    try:
+        return func(*args)
+    finally:
+        caches['shared'] = own_cache
+
+
+class FeedTokenRevocationTests(CacheTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        settings_override = override_settings(CACHES={**TEST_CACHES, 'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
+
+        self.user = User.objects.create_user('student', password='pw')
+        self.feed = CalendarFeedToken.objects.create(user=self.user, token='old-token')
+
+    def regenerate(self):
+        request = RequestFactory().post('/')
+        request.user = self.user
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_feed_url(request)
+        self.feed.refresh_from_db()
+
+    def test_revoked_token_stops_working_in_other_workers(self):
+        self.assertEqual(in_other_worker(_get_feed_owner, 'old-token'), (self.user.id, 'student'))
+        self.assertIsNotNone(caches['shared'].get('schedule_feed:token:old-token'))
+
+        self.regenerate()
+
+        self.assertIsNone(in_other_worker(_get_feed_owner, 'old-token'))
+        self.assertEqual(in_other_worker(_get_feed_owner, self.feed.token), (self.user.id, 'student'))
+
+    def test_unknown_token(self):
+        self.assertIsNone(_get_feed_owner('missing'))
+
+
+class EmptyScheduleExportTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        CalendarFeedToken.objects.create(user=self.user, token='feed-token')
+        self.client.force_login(self.user)
+        UserSession.objects.create(user=self.user, session_key=self.client.session.session_key)
+
+    def test_feed_poll_does_not_turn_export_into_empty_file(self):
+        feed = self.client.get(reverse('schedule_ical_feed', args=['feed-token']))
+        self.assertEqual(feed.status_code, 200)
+        self.assertIn(b'BEGIN:VCALENDAR', feed.content)
+
+        response = self.client.get(reverse('export_schedule', args=['ical']))
+
+        self.assertRedirects(response, reverse('schedule_view'), fetch_redirect_response=False)
+        self.assertIn('No schedules found', str(list(get_messages(response.wsgi_request))[0]))
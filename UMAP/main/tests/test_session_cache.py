@@ -0,0 +1,34 @@
+from main.models import User, UserSession
+from main.session_cache import deactivate_user_sessions, is_session_active
+
+from .base import CacheTestCase
+
+
+class SessionCacheTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.session = UserSession.objects.create(user=self.user, session_key='a' * 32)
+
+    def test_active_session_is_cached(self):
+        self.assertTrue(is_session_active(self.user.id, self.session.session_key))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_session_active(self.user.id, self.session.session_key))
+
+    def test_unknown_or_other_users_session(self):
+        other = User.objects.create_user('other', password='pw')
+        self.assertFalse(is_session_active(self.user.id, 'b' * 32))
+        self.assertFalse(is_session_active(other.id, self.session.session_key))
+        self.assertFalse(is_session_active(self.user.id, None))
+
+    def test_deactivation_drops_cached_validity(self):
+        self.assertTrue(is_session_active(self.user.id, self.session.session_key))
+        with self.captureOnCommitCallbacks(execute=True):
+            deactivate_user_sessions(self.user)
+        self.assertFalse(is_session_active(self.user.id, self.session.session_key))
+
+    def test_deleted_session_drops_cached_validity(self):
+        self.assertTrue(is_session_active(self.user.id, self.session.session_key))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.delete()
+        self.assertFalse(is_session_active(self.user.id, self.session.session_key))
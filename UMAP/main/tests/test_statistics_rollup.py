@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from main.models import ActivityRollup, RollupCheckpoint, User, UserActivity, UserActivityRollup
+from main.statistics_rollup import ACTIVITY_CHECKPOINT, ACTIVITY_SETTLE_DELAY, refresh_rollups, roll_up_activity
+
+from .base import CacheTestCase
+
+
+class ActivityRollupTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.old = timezone.now() - ACTIVITY_SETTLE_DELAY - timedelta(minutes=1)
+
+    def log(self, timestamp, activity_type=UserActivity.ActivityType.ROOM_VIEW):
+        return UserActivity.objects.create(user=self.user, activity_type=activity_type, timestamp=timestamp)
+
+    def checkpoint(self):
+        return RollupCheckpoint.objects.get(name=ACTIVITY_CHECKPOINT).last_id
+
+    def total(self, model=ActivityRollup):
+        return model.objects.aggregate(total=Sum('count'))['total'] or 0
+
+    def test_rolls_up_in_batches_and_advances_checkpoint(self):
+        for _ in range(5):
+            self.log(self.old)
+        last = self.log(self.old, UserActivity.ActivityType.LOGIN)
+
+        roll_up_activity(batch_size=2)
+
+        self.assertEqual(self.total(), 6)
+        self.assertEqual(self.total(UserActivityRollup), 6)
+        self.assertEqual(ActivityRollup.objects.get(activity_type='room_view').count, 5)
+        self.assertEqual(self.checkpoint(), last.id)
+
+        # Nothing new: a second run counts nothing twice
+        self.assertEqual(roll_up_activity(), 0)
+        self.assertEqual(self.total(), 6)
+
+    def test_checkpoint_stops_before_unsettled_rows(self):
+        settled = self.log(self.old)
+        recent = self.log(timezone.now())
+        self.log(self.old)
+
+        roll_up_activity()
+        self.assertEqual(self.checkpoint(), settled.id)
+        self.assertEqual(self.total(), 1)
+
+        # Once the recent row settles, it and the row behind it are counted
+        UserActivity.objects.filter(id=recent.id).update(timestamp=self.old)
+        roll_up_activity()
+        self.assertEqual(self.total(), 3)
+
+    def test_gap_below_settled_rows_is_skipped(self):
+        self.log(self.old)
+        deleted = self.log(self.old)
+        last = self.log(self.old)
+        deleted.delete()
+
+        roll_up_activity()
+        self.assertEqual(self.checkpoint(), last.id)
+        self.assertEqual(self.total(), 2)
+
+    def test_rebuild_recounts_from_scratch(self):
+        self.log(self.old)
+        self.log(self.old)
+        roll_up_activity()
+        ActivityRollup.objects.update(count=99)
+
+        refresh_rollups(rebuild_activity=True)
+        self.assertEqual(self.total(), 2)
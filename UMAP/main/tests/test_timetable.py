@@ -0,0 +1,102 @@
+import json
+from datetime import time
+
+from django.test import RequestFactory
+
+from main.models import Floor, Room, Schedule, User
+from main.schedule_views import schedule_class_detail, validate_timetable
+from main.timetable import WeeklyTimetable
+
+from .base import CacheTestCase
+
+
+class WeeklyTimetableTests(CacheTestCase):
+    def test_intervals_are_half_open(self):
+        timetable = WeeklyTimetable([('Monday', time(9), time(10), 'a')])
+        self.assertFalse(timetable.overlaps('Monday', time(10), time(11)))
+        self.assertFalse(timetable.overlaps('Monday', time(8), time(9)))
+        self.assertTrue(timetable.overlaps('Monday', time(9, 30), time(9, 45)))
+        self.assertTrue(timetable.overlaps('Monday', time(8), time(12)))
+        self.assertFalse(timetable.overlaps('Tuesday', time(9), time(10)))
+
+    def test_long_class_found_behind_later_starts(self):
+        # The 8-12 class starts first but still overlaps 11:00, past the 9-10 class
+        timetable = WeeklyTimetable([
+            ('Monday', time(8), time(12), 'long'),
+            ('Monday', time(9), time(10), 'short'),
+        ])
+        self.assertTrue(timetable.overlaps('Monday', time(11), time(13)))
+        self.assertEqual(timetable.conflicts_with('Monday', time(11), time(13)), ['long'])
+        self.assertEqual(timetable.conflicts_with('Monday', time(9, 30), time(11)), ['long', 'short'])
+
+    def test_conflicting_pairs(self):
+        timetable = WeeklyTimetable([
+            ('Monday', time(8), time(10), 'a'),
+            ('Monday', time(9), time(11), 'b'),
+            ('Monday', time(11), time(12), 'c'),
+            ('Friday', time(8), time(9), 'd'),
+        ])
+        self.assertEqual(timetable.conflicts(), [{'day': 'Monday', 'first': 'a', 'second': 'b'}])
+
+
+class ScheduleClassEditTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        room = Room.objects.create(floor=Floor.objects.create(name='1st Floor', building='HPSB'))
+        self.first = Schedule.objects.create(user=self.user, room=room, course_code='CS101', subject='Intro',
+                                             day='Monday', start=time(8), end=time(10))
+        self.second = Schedule.objects.create(user=self.user, room=room, course_code='CS102', subject='Data',
+                                              day='Monday', start=time(10), end=time(11))
+        self.factory = RequestFactory()
+
+    def post(self, schedule, data):
+        request = self.factory.post('/', data)
+        request.user = self.user
+        return schedule_class_detail(request, schedule.id)
+
+    def test_resize_into_another_class_is_rejected(self):
+        response = self.post(self.first, {'duration': '3'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('CS102', json.loads(response.content)['error'])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.end, time(10))
+
+    def test_move_ignores_the_class_being_moved(self):
+        response = self.post(self.first, {'day': 'Monday', 'start': '09:00'})
+        self.assertEqual(response.status_code, 200)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.start, time(9))
+
+    def test_move_onto_another_class_is_rejected(self):
+        response = self.post(self.second, {'day': 'Monday', 'start': '09:00'})
+        self.assertEqual(response.status_code, 400)
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.start, time(10))
+
+
+class ValidateTimetableTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+
+    def post(self, classes):
+        request = RequestFactory().post('/', json.dumps({'classes': classes}), content_type='application/json')
+        request.user = self.user
+        return validate_timetable(request)
+
+    def test_overlapping_submitted_classes(self):
+        response = self.post([
+            {'day': 'Monday', 'start': '08:00', 'end': '10:00', 'course_code': 'CS101'},
+            {'day': 'Monday', 'start': '09:00', 'end': '11:00', 'course_code': 'CS102'},
+        ])
+        data = json.loads(response.content)
+        self.assertFalse(data['valid'])
+        self.assertEqual(len(data['conflicts']), 1)
+
+    def test_invalid_day_is_rejected(self):
+        for day in ['Funday', ['Monday'], {'name': 'Monday'}, None]:
+            with self.subTest(day=day):
+                response = self.post([{'day': day, 'start': '08:00', 'end': '10:00'}])
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(json.loads(response.content)['status'], 'error')
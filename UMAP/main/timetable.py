@@ -0,0 +1,98 @@
+"""
+Weekly timetable for schedule overlap checks
+Keeps each day's classes as intervals sorted by start time, with a running
+maximum of end times, so "does this class overlap anything?" is a binary
+search instead of a scan over every class on that day.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+from .models import Schedule
+
+
+class DayIntervals:
+    """Half-open [start, end) intervals for one day, sorted by start"""
+
+    def __init__(self):
+        self.intervals = []  # (start, end, key), sorted
+        self.max_ends = []  # max_ends[i] = latest end among intervals[:i + 1]
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def add(self, start, end, key=None):
+        """Add an interval; key identifies it in conflict reports"""
+        index = bisect_left(self.intervals, (start,))
+        self.intervals.insert(index, (start, end, key))
+        # Only the running maxima from the insertion point on can change
+        previous = self.max_ends[index - 1] if index else None
+        self.max_ends[index:] = []
+        for _, interval_end, _ in self.intervals[index:]:
+            previous = interval_end if previous is None or interval_end > previous else previous
+            self.max_ends.append(previous)
+
+    def overlaps(self, start, end) -> bool:
+        """Check whether [start, end) overlaps any interval, in O(log n)
+
+        Intervals starting before ``end`` form a prefix of the sorted list,
+        and one of them overlaps exactly when the prefix's latest end is
+        after ``start``.
+        """
+        count = bisect_left(self.intervals, (end,))
+        return count > 0 and self.max_ends[count - 1] > start
+
+    def conflicts_with(self, start, end) -> List:
+        """Get the keys of every interval overlapping [start, end)"""
+        count = bisect_left(self.intervals, (end,))
+        return [key for _, interval_end, key in self.intervals[:count] if interval_end > start]
+
+    def conflicting_pairs(self) -> List[tuple]:
+        """Get every pair of overlapping intervals in one sweep"""
+        pairs = []
+        active = []  # (end, key) of intervals that may still overlap later ones
+        for start, end, key in self.intervals:
+            active = [(active_end, active_key) for active_end, active_key in active if active_end > start]
+            pairs.extend((active_key, key) for _, active_key in active)
+            active.append((end, key))
+        return pairs
+
+
+class WeeklyTimetable:
+    """A user's classes grouped by day, built once per request"""
+
+    def __init__(self, entries: Iterable = ()):
+        self.days: Dict[str, DayIntervals] = {}
+        for day, start, end, key in entries:
+            self.add(day, start, end, key)
+
+    @classmethod
+    def for_user(cls, user, exclude_id: Optional[int] = None) -> 'WeeklyTimetable':
+        """Load a user's saved schedules with a single query"""
+        schedules = Schedule.objects.filter(user=user)
+        if exclude_id is not None:
+            schedules = schedules.exclude(id=exclude_id)
+        return cls(
+            (day, start, end, schedule_id)
+            for schedule_id, day, start, end in schedules.values_list('id', 'day', 'start', 'end')
+        )
+
+    def add(self, day, start, end, key=None):
+        self.days.setdefault(day, DayIntervals()).add(start, end, key)
+
+    def overlaps(self, day, start, end) -> bool:
+        """Return True if the time range overlaps any class on the same day"""
+        intervals = self.days.get(day)
+        return bool(intervals) and intervals.overlaps(start, end)
+
+    def conflicts_with(self, day, start, end) -> List:
+        """Get the keys of every class on the same day overlapping the time range"""
+        intervals = self.days.get(day)
+        return intervals.conflicts_with(start, end) if intervals else []
+
+    def conflicts(self) -> List[Dict]:
+        """Get every pair of overlapping classes in the timetable"""
+        return [
+            {'day': day, 'first': first, 'second': second}
+            for day, intervals in self.days.items()
+            for first, second in intervals.conflicting_pairs()
+        ]
@@ -21,6 +21,10 @@ urlpatterns = [
     path('schedule/delete-all/', schedule_views.delete_all_schedules, name='delete_all_schedules'),
     path('schedule/export/<str:format_type>/', schedule_views.export_schedule, name='export_schedule'),
     path('schedule/upload/', schedule_views.upload_schedule, name='upload_schedule'),
+    path('schedule/import-status/', schedule_views.schedule_import_status, name='schedule_import_status'),
+    path('schedule/validate/', schedule_views.validate_timetable, name='validate_timetable'),
+    path('schedule/feed/', schedule_views.schedule_feed_url, name='schedule_feed_url'),
+    path('schedule/feed/<str:token>.ics', schedule_views.schedule_ical_feed, name='schedule_ical_feed'),
     
     # AJAX endpoints
     path('api/delete/<str:model_name>/<int:item_id>/', views.delete_item, name='delete_item'),
@@ -30,8 +34,11 @@ urlpatterns = [
     path('api/buildings/', api_views.get_building_data, name='get_building_data'),
     path('api/rooms/<int:room_id>/', api_views.get_room_details, name='get_room_details'),
     path('api/room/<int:room_id>/', views.get_room_data, name='get_room_data'),
+    path('api/room/<int:room_id>/full/', api_views.get_room_composite, name='get_room_composite'),
     path('api/room/<int:room_id>/photos/', views.get_room_photos, name='get_room_photos'),
     path('api/room/<int:room_id>/ratings/', views.get_room_ratings, name='get_room_ratings'),
+    path('api/rooms/ratings/', views.get_rooms_ratings, name='get_rooms_ratings'),
+    path('api/rooms/batch/', api_views.get_rooms_batch, name='get_rooms_batch'),
     path('api/room/<int:room_id>/rate/', views.submit_room_rating, name='submit_room_rating'),
     path('api/feedback/<int:feedback_id>/delete/', views.delete_user_feedback, name='delete_user_feedback'),
     path('api/room/<int:room_id>/delete-photo/', views.delete_room_photo, name='delete_room_photo'),
@@ -40,7 +47,10 @@ urlpatterns = [
     path('api/room/<int:room_id>/check-saved/', api_views.check_saved_location, name='check_saved_location'),
     path('api/room/<int:room_id>/track-view/', api_views.track_room_view, name='track_room_view'),
     path('api/user/recent/', api_views.get_user_recent, name='get_user_recent'),
+    path('api/user/saved/', api_views.get_saved_rooms, name='get_saved_rooms'),
     path('api/ar/rooms/', api_views.get_ar_rooms_data, name='get_ar_rooms_data'),
+    path('api/jobs/<int:job_id>/', api_views.get_job_status, name='get_job_status'),
+    path('api/ratings/analytics/', api_views.get_rating_analytics_data, name='get_rating_analytics'),
     path('api/delete/roomimage/<int:image_id>/', views.delete_roomimage, name='delete_roomimage'),
     path('api/import-rooms-csv/', views.import_rooms_from_csv, name='import_rooms_csv'),
     path('api/search-rooms/', views.search_rooms_and_locations, name='search_rooms'),
@@ -53,6 +63,7 @@ urlpatterns = [
 
     path('admin_profile/', views.admin_profile_view, name='admin_profile_view'),
     path('admin_main/', views.admin_main_view, name='admin_main_view'),
+    path('admin_main/activity-feed/', views.admin_activity_feed, name='admin_activity_feed'),
     path('admin_users/', views.admin_user_list_view, name='admin_user_list'),
     path('admin_floors/', views.admin_floor_list_view, name='admin_floor_list'),
     path('admin_rooms/', views.admin_rooms_list_view, name='admin_rooms_list'),
@@ -1,5 +1,6 @@
 from django.contrib import messages
 from django.shortcuts import redirect, render, get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -11,7 +12,10 @@ from .forms import (
     UserRegistrationForm, FloorForm, RoomForm, RoomProfileForm,
     AdminUserForm, AdminProfileForm, UserProfileForm
 )
-from .models import User, Floor, Room, RoomProfile, Profile, Schedule, UserActivity, Feedback, SavedLocation, College
+from .models import User, Floor, Room, RoomProfile, Profile, Schedule, UserActivity, Feedback, SavedLocation, College, BackgroundJob
+from .activity_buffer import record_activity
+from .recent_places import get_recent_places
+from .activity_feed import get_feed_page
 
 def is_admin(user):
     return user.is_staff or user.is_superuser
@@ -89,20 +93,14 @@ def extract_room_number(room_id: str, floor_number: int) -> str:
 def track_activity(user, activity_type, details=None, request=None):
     """
     Utility function to track user activities
+    Records are buffered and written in batches by activity_buffer
     """
-    if details is None:
-        details = {}
-        
-    activity = UserActivity(
-        user=user,
-        activity_type=activity_type,
-        details=details
+    record_activity(
+        user,
+        activity_type,
+        details=details,
+        ip_address=request.META.get('REMOTE_ADDR') if request else None
     )
-    
-    if request:
-        activity.ip_address = request.META.get('REMOTE_ADDR')
-        
-    activity.save()
 
 def default_view(request):
     # Check if user is authenticated and is admin/superuser
@@ -494,15 +492,17 @@ def create_rooms_from_floor_svg(request, floor_id):
     Automatically create or update rooms from an existing floor's SVG file with 
     X, Y, and Z coordinates from Room_coords.csv.
     
-    Coordinate Matching Strategy:
+    Coordinate Matching Strategy (RoomCoordinateResolver.resolve_room):
     1. Exact match using svg_room_id
     2. Match using extracted RoomProfile.number
-    3. Endswith fallback to handle mismatched numbering
+    3. Suffix fallback to handle mismatched numbering
     
+    Rooms are written in bulk inside one transaction (see room_sync).
     Returns JSON with created, updated, skipped counts.
     """
     from .svg_parser import SVGParser
     from .room_manager import RoomNameManager
+    from .room_sync import sync_floor_rooms
     from django.http import JsonResponse
     import json
 
@@ -516,13 +516,13 @@ def create_rooms_from_floor_svg(request, floor_id):
             }, status=400)
 
         try:
-            # Parse SVG and extract rooms
-            parser = SVGParser(floor.floorplan_svg.path)
-            rooms = parser.extract_rooms()
+            # Stream rooms out of the SVG; they are processed as they are parsed
+            parser = SVGParser(floor.floorplan_svg.path, streaming=True)
+            rooms = parser.iter_rooms()
 
             # Load CSV coordinates - ✅ GUARANTEES Z coordinates available
-            room_coords_map = RoomNameManager.load_room_coordinates()
-            if not room_coords_map:
+            coords_resolver = RoomNameManager.get_coordinate_resolver()
+            if not len(coords_resolver):
                 return JsonResponse({
                     'success': False,
                     'message': 'Could not load Room_coords.csv'
@@ -530,130 +530,24 @@ def create_rooms_from_floor_svg(request, floor_id):
 
             print(f"\n{'='*60}")
             print(f"[SVG Upload] Processing floor: {floor.name}")
-            print(f"[SVG Upload] Loaded {len(room_coords_map)} CSV room records")
-            print(f"[SVG Upload] Extracted {len(rooms)} rooms from SVG")
+            print(f"[SVG Upload] Loaded {len(coords_resolver)} CSV room records")
             print(f"{'='*60}\n")
 
-            created_count = 0
-            skipped_count = 0
-            updated_count = 0
-            skipped_rooms = []
-            debug_print_count = 0
-            debug_limit = 3
-
-            for svg_room in rooms:
-                # Determine floor number for room number extraction
-                floor_number = parser.floor_number or extract_floor_number(floor.name)
-
-                # Extract room number from SVG room ID
-                room_number = extract_room_number(svg_room.room_id, floor_number)
-
-                # ========== STRATEGY 1: Exact match using svg_room_id ==========
-                csv_coords = None
-                debug_found = None
-
-                if svg_room.room_id in room_coords_map:
-                    csv_coords = room_coords_map[svg_room.room_id]
-                    debug_found = f"exact_svg_id={svg_room.room_id}"
-
-                # ========== STRATEGY 2: Match using extracted room number ==========
-                if not csv_coords and room_number in room_coords_map:
-                    csv_coords = room_coords_map[room_number]
-                    debug_found = f"room_number={room_number}"
-
-                # ========== STRATEGY 3: Endswith fallback ==========
-                # Handles cases where CSV key has prefix that matches suffix of room number
-                # Example: room_number="101" matches csv_key="1101" (endswith check)
-                if not csv_coords:
-                    for csv_key, coords in room_coords_map.items():
-                        if csv_key.endswith(str(room_number)):
-                            csv_coords = coords
-                            debug_found = f"endswith_match={csv_key}"
-                            break
-
-                # ========== SKIP if no CSV match found ==========
-                if not csv_coords:
-                    skipped_count += 1
-                    skipped_rooms.append({
-                        'svg_id': svg_room.room_id,
-                        'room_number': room_number
-                    })
-                    print(f"⚠ SKIP room SVG ID '{svg_room.room_id}' (room #{room_number}) - no CSV match found")
-                    continue
-
-                # ========== Build coordinates dict with X, Y, Z from CSV ==========
-                # ✅ Z coordinate is GUARANTEED to be included from CSV
-                coordinates = {
-                    'x': csv_coords['x'],
-                    'y': csv_coords['y'],
-                    'z': csv_coords['z'],  # ✅ Z is mandatory from CSV
-                    'width': svg_room.width,
-                    'height': svg_room.height
-                }
-
-                # Determine room name and type from SVG
-                if svg_room.room_name:
-                    room_name = svg_room.room_name
-                    room_type = svg_room.room_type or "Classroom"
-                elif svg_room.room_type:
-                    room_name = svg_room.room_type
-                    room_type = svg_room.room_type
-                else:
-                    room_name = f"Room {room_number}"
-                    room_type = "Classroom"
-
-                # ========== Create or update RoomProfile ==========
-                try:
-                    # Check for existing room
-                    existing_room = Room.objects.filter(
-                        floor=floor,
-                        profile__number=room_number
-                    ).first()
-
-                    if existing_room:
-                        # Update existing RoomProfile
-                        room_profile = existing_room.profile
-                        room_profile.coordinates = coordinates
-                        room_profile.name = room_name
-                        room_profile.type = room_type
-                        room_profile.svg_room_id = svg_room.room_id
-                        room_profile.save()
-                        updated_count += 1
-
-                        # Debug print for first few updated rooms
-                        if debug_print_count < debug_limit:
-                            print(f"✓ UPDATED room #{room_number} (SVG '{svg_room.room_id}')")
-                            print(f"  └─ Coords from CSV via {debug_found}")
-                            print(f"  └─ X={csv_coords['x']:.2f}, Y={csv_coords['y']:.2f}, Z={csv_coords['z']:.2f}")
-                            debug_print_count += 1
-                    else:
-                        # Create new Room and RoomProfile
-                        room = Room.objects.create(floor=floor)
-                        RoomProfile.objects.create(
-                            room=room,
-                            number=room_number,
-                            name=room_name,
-                            type=room_type,
-                            description="",
-                            coordinates=coordinates,
-                            svg_room_id=svg_room.room_id
-                        )
-                        created_count += 1
-
-                        # Debug print for first few created rooms
-                        if debug_print_count < debug_limit:
-                            print(f"✓ CREATED room #{room_number} (SVG '{svg_room.room_id}')")
-                            print(f"  └─ Coords from CSV via {debug_found}")
-                            print(f"  └─ X={csv_coords['x']:.2f}, Y={csv_coords['y']:.2f}, Z={csv_coords['z']:.2f}")
-                            debug_print_count += 1
+            # Determine floor number for room number extraction
+            floor_number = parser.floor_number or extract_floor_number(floor.name)
 
-                except Exception as e:
-                    print(f"❌ ERROR processing room SVG '{svg_room.room_id}' (#{room_number}): {str(e)}")
-                    skipped_count += 1
+            # ========== Bulk create/update rooms in one transaction ==========
+            report = sync_floor_rooms(floor, rooms, floor_number, coords_resolver)
+            created_count = report['created']
+            updated_count = report['updated']
+            skipped_count = report['skipped']
+            skipped_rooms = report['skipped_rooms']
+            match_strategies = report['match_strategies']
 
             # ========== Print Summary ==========
             print(f"\n{'='*60}")
             print(f"[SVG Upload Summary]")
+            print(f"  📄 Extracted from SVG: {report['extracted']}")
             print(f"  ✅ Created: {created_count}")
             print(f"  🔄 Updated: {updated_count}")
             print(f"  ⚠ Skipped: {skipped_count}")
@@ -675,7 +569,8 @@ def create_rooms_from_floor_svg(request, floor_id):
                 'updated': updated_count,
                 'skipped': skipped_count,
                 'floor_name': floor.name,
-                'skipped_rooms': skipped_rooms
+                'skipped_rooms': skipped_rooms,
+                'match_strategies': match_strategies
             })
 
         except Exception as e:
@@ -715,9 +610,7 @@ def create_rooms_from_floor_svg(request, floor_id):
 
 def admin_CRUD_Floors_view(request):
     from .svg_parser import SVGParser
-    from .room_manager import RoomNameManager
-    import tempfile
-    import os
+    from .jobs import enqueue_job
     
     if request.method == "POST":
         floor_id = request.POST.get('floor_id')
@@ -754,145 +647,20 @@ def admin_CRUD_Floors_view(request):
                 auto_create_rooms = 'auto_create_rooms' in request.POST
                 print(f"[Floor Creation] auto_create_rooms checkbox: {auto_create_rooms}, POST data: {request.POST.get('auto_create_rooms')}")
                 if auto_create_rooms:
-                    try:
-                        # Save SVG to temporary file for parsing
-                        with tempfile.NamedTemporaryFile(suffix='.svg', delete=False) as tmp_file:
-                            for chunk in floorplan_svg.chunks():
-                                tmp_file.write(chunk)
-                            tmp_path = tmp_file.name
-                        
-                        try:
-                            # Parse SVG to extract rooms
-                            # Extract floor number for parser (needed for temp files that don't have HPSB# in name)
-                            floor_number = extract_floor_number(floor.name)
-                            parser = SVGParser(tmp_path, floor_number=floor_number, building_id='10')
-                            rooms = parser.extract_rooms()
-
-                            # Load CSV coordinates - ✅ GUARANTEES Z coordinates available
-                            room_coords_map = RoomNameManager.load_room_coordinates()
-                            if not room_coords_map:
-                                print("[Floor Creation] Warning: Could not load Room_coords.csv - Z coordinates will not be available")
-                            
-                            created_count = 0
-                            skipped_count = 0
-                            
-                            print(f"\n[Floor Creation] Processing {len(rooms)} rooms from SVG, {len(room_coords_map)} CSV records available")
-                            
-                            # Create Room and RoomProfile for each extracted room
-                            for idx, svg_room in enumerate(rooms):
-                                # Check if room already exists
-                                existing_room = Room.objects.filter(
-                                    floor=floor,
-                                    profile__number=svg_room.room_id
-                                ).exists()
-                                
-                                if existing_room:
-                                    skipped_count += 1
-                                    continue
-                                
-                                try:
-                                    # Extract room number based on floor number
-                                    room_number = extract_room_number(svg_room.room_id, floor_number)
-
-                                    # ========== STRATEGY 1: Exact match using svg_room_id ==========
-                                    csv_coords = None
-                                    debug_found = None
-
-                                    if svg_room.room_id in room_coords_map:
-                                        csv_coords = room_coords_map[svg_room.room_id]
-                                        debug_found = f"exact_svg_id={svg_room.room_id}"
-
-                                    # ========== STRATEGY 2: Match using extracted room number ==========
-                                    if not csv_coords and room_number in room_coords_map:
-                                        csv_coords = room_coords_map[room_number]
-                                        debug_found = f"room_number={room_number}"
-
-                                    # ========== STRATEGY 3: Endswith fallback ==========
-                                    if not csv_coords:
-                                        for csv_key, coords in room_coords_map.items():
-                                            if csv_key.endswith(str(room_number)):
-                                                csv_coords = coords
-                                                debug_found = f"endswith_match={csv_key}"
-                                                break
-
-                                    # ========== Build coordinates dict ==========
-                                    # Include Z from CSV if available, otherwise set to 0
-                                    if csv_coords:
-                                        coordinates = {
-                                            'x': csv_coords['x'],
-                                            'y': csv_coords['y'],
-                                            'z': csv_coords['z'],  # ✅ Z from CSV
-                                            'width': svg_room.width,
-                                            'height': svg_room.height
-                                        }
-                                    else:
-                                        # Fallback: use SVG coordinates without Z
-                                        coordinates = {
-                                            'x': svg_room.x,
-                                            'y': svg_room.y,
-                                            'z': 0,  # Default Z value
-                                            'width': svg_room.width,
-                                            'height': svg_room.height
-                                        }
-
-                                    # Determine room name and type from SVG
-                                    if svg_room.room_name:
-                                        # Use name from CSV reference
-                                        room_name = svg_room.room_name
-                                        room_type = svg_room.room_type or "Classroom"
-                                    elif svg_room.room_type:
-                                        # Use room type if no CSV name available
-                                        room_name = svg_room.room_type
-                                        room_type = svg_room.room_type
-                                    else:
-                                        # Default fallback
-                                        room_name = f"Room {room_number}"
-                                        room_type = "Classroom"
-
-                                    # Create Room instance
-                                    room = Room.objects.create(floor=floor)
-                                    
-                                    # Create RoomProfile with extracted room number and Z coordinate
-                                    room_profile = RoomProfile.objects.create(
-                                        room=room,
-                                        number=room_number,
-                                        name=room_name,
-                                        description="",
-                                        type=room_type,
-                                        coordinates=coordinates,
-                                        svg_room_id=svg_room.room_id
-                                    )
-                                    created_count += 1
-                                    
-                                    # Debug print for first 3 rooms
-                                    if created_count <= 3:
-                                        z_source = f"(CSV via {debug_found})" if csv_coords else "(default Z=0)"
-                                        print(f"  ✓ Room #{room_number}: X={coordinates['x']:.2f}, Y={coordinates['y']:.2f}, Z={coordinates['z']:.2f} {z_source}")
-                                        
-                                except Exception as e:
-                                    print(f"  ❌ Error creating room {svg_room.room_id}: {str(e)}")
-                                    skipped_count += 1
-                            
-                            print(f"\n[Floor Creation Summary] Created: {created_count}, Skipped: {skipped_count}\n")
-                            
-                            if created_count > 0:
-                                messages.success(request, f'✅ Floor saved successfully! Created {created_count} rooms from SVG with Z coordinates.')
-                                # Redirect to rooms list with floor pre-selected to show created rooms
-                                return redirect(f"{reverse('admin_rooms_list')}?floor={floor.id}")
-                            else:
-                                messages.info(request, f'Floor saved. {skipped_count} rooms already existed (not duplicated).')
-                        finally:
-                            # Clean up temporary file
-                            try:
-                                os.unlink(tmp_path)
-                            except:
-                                pass
-                    except Exception as e:
-                        import traceback
-                        error_msg = f'SVG parsing error: {str(e)}'
-                        print(f"[SVG Parse Error] {error_msg}\n{traceback.format_exc()}")
-                        messages.error(request, f'Floor saved but SVG parsing failed: {error_msg}')
-                        return redirect('admin_floor_list')
+                    # Parsing large floorplans can outlast the request timeout, so the
+                    # run_jobs worker streams the saved SVG and creates the rooms.
+                    # Rooms already on the floor are skipped; rooms without a CSV match
+                    # fall back to their SVG position with Z=0.
+                    job = enqueue_job(
+                        BackgroundJob.JobType.FLOOR_SVG_IMPORT,
+                        {'floor_id': floor.id, 'update_existing': False, 'require_coords': False},
+                        user=request.user if request.user.is_authenticated else None
+                    )
+                    messages.info(
+                        request,
+                        f'Floor saved. Rooms are being created from the SVG in the background '
+                        f'(job #{job.id}); check progress at {reverse("get_job_status", args=[job.id])}.'
+                    )
             else:
                 # No SVG file provided or auto_create_rooms not enabled
                 if floorplan_svg and auto_create_rooms:
@@ -920,7 +688,7 @@ def admin_CRUD_Floors_view(request):
             
             if floor.floorplan_svg:
                 try:
-                    parser = SVGParser(floor.floorplan_svg.path)
+                    parser = SVGParser(floor.floorplan_svg.path, streaming=True)
                     rooms = parser.extract_rooms()
                     return JsonResponse({
                         'success': True,
@@ -1141,54 +909,50 @@ def admin_main_view(request):
     total_rooms = Room.objects.count()
     total_floors = Floor.objects.count()
     
-    # Get all activities, feedback, and saved locations
-    from django.utils import timezone
-    from datetime import timedelta
-    activities = UserActivity.objects.select_related('user').all().order_by('-timestamp')
-    feedbacks = Feedback.objects.select_related('user', 'room').all().order_by('-creation_date')
-    saved_locations = SavedLocation.objects.select_related('user', 'room').all().order_by('-saved_date')
-    
-    # Combine activities, feedbacks, and saved locations
-    combined_items = []
-    for activity in activities:
-        combined_items.append({
-            'type': 'activity',
-            'item': activity,
-            'timestamp': activity.timestamp,
-            'user': activity.user
-        })
-    for feedback in feedbacks:
-        combined_items.append({
-            'type': 'feedback',
-            'item': feedback,
-            'timestamp': feedback.creation_date,
-            'user': feedback.user
-        })
-    for saved_location in saved_locations:
-        combined_items.append({
-            'type': 'saved_location',
-            'item': saved_location,
-            'timestamp': saved_location.saved_date,
-            'user': saved_location.user
-        })
-    
-    # Sort combined items by timestamp (most recent first)
-    combined_items.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    # Paginate combined items
-    paginator = Paginator(combined_items, 10)  # Show 10 items per page
-    page = request.GET.get('page', 1)
-    recent_activities = paginator.get_page(page)
-    
+    # Recent activities, feedback and saved locations, merged newest first.
+    # Older pages are reached through the cursor of the previous page.
+    cursor = request.GET.get('cursor')
+    try:
+        feed = get_feed_page(cursor)
+    except ValueError:
+        cursor = None
+        feed = get_feed_page()
+
     context = {
         'total_users': total_users,
         'total_rooms': total_rooms,
         'total_floors': total_floors,
-        'recent_activities': recent_activities
+        'recent_activities': feed['entries'],
+        'next_cursor': feed['next_cursor'],
+        'is_first_page': not cursor
     }
     
     return render(request, 'UMAP_App/Admin/Admin_main.html', context)
 
+@login_required
+@user_passes_test(is_admin)
+@require_http_methods(["GET"])
+def admin_activity_feed(request):
+    """API endpoint for the admin home page's "Load more" button
+
+    Returns the rendered rows of the feed page after ?cursor= and the
+    cursor of the page after it (null on the last page).
+    """
+    try:
+        feed = get_feed_page(request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'html': render_to_string('UMAP_App/Admin/Admin_Activity_Rows.html', {'recent_activities': feed['entries']}, request=request),
+        'count': len(feed['entries']),
+        'next_cursor': feed['next_cursor']
+    })
+
 @login_required
 def user_main_view(request):
     response = redirect('default_view')
@@ -1508,86 +1272,24 @@ def import_rooms_from_csv(request):
 
 
 def search_rooms_and_locations(request):
-    """Search for rooms and locations by name, number, building. (Public endpoint - no login required)"""
+    """Search for rooms and locations by name, number, building. (Public endpoint - no login required)
+
+    Served from the in-process room search index, which ranks exact,
+    prefix, suffix, "HPSB 1005" style and typo-tolerant matches.
+    """
     query = request.GET.get('q', '').strip()
     
     if not query or len(query) < 1:
         return JsonResponse({'results': []})
     
     try:
-        from django.db.models import Q
-        import re
-        
-        # Normalize query for flexible matching
-        normalized_query = query.replace('-', '').replace(' ', '').upper()
-        # Extract just the numeric part if query contains letters and numbers (e.g., "HPSB 1005" -> "1005")
-        numeric_only = re.sub(r'[^0-9]', '', query)
-        
-        # Search in RoomProfile for room name/number and Floor for building
-        results = []
-        seen_rooms = set()
-        
-        # Search rooms by name or number
-        room_profiles = RoomProfile.objects.filter(
-            Q(name__icontains=query) | Q(number__icontains=query)
-        ).select_related('room__floor')[:20]
-        
-        for profile in room_profiles:
-            if profile.room.id not in seen_rooms:
-                seen_rooms.add(profile.room.id)
-                results.append({
-                    'id': profile.room.id,
-                    'type': 'room',
-                    'name': profile.name,
-                    'number': profile.number,
-                    'building': profile.room.floor.building,
-                    'floor': profile.room.floor.name,
-                    'floor_id': profile.room.floor.id,
-                    'room_type': profile.type,
-                    'description': profile.description[:100] if profile.description else ''
-                })
+        from .room_search import room_search_index
         
-        # Also search by normalized number (handling variations like 1005, 10-05, 10 05, HPSB 1005)
-        if len(results) == 0 and numeric_only:
-            all_profiles = RoomProfile.objects.select_related('room__floor')
-            for profile in all_profiles:
-                normalized_profile_number = profile.number.replace('-', '').replace(' ', '').upper()
-                profile_numeric_only = re.sub(r'[^0-9]', '', profile.number)
-                
-                # Match if normalized versions match or numeric parts match
-                if (normalized_profile_number == normalized_query or 
-                    normalized_profile_number.endswith(normalized_query) or
-                    profile_numeric_only == numeric_only or
-                    profile_numeric_only.endswith(numeric_only)):
-                    
-                    if profile.room.id not in seen_rooms:
-                        seen_rooms.add(profile.room.id)
-                        results.append({
-                            'id': profile.room.id,
-                            'type': 'room',
-                            'name': profile.name,
-                            'number': profile.number,
-                            'building': profile.room.floor.building,
-                            'floor': profile.room.floor.name,
-                            'floor_id': profile.room.floor.id,
-                            'room_type': profile.type,
-                            'description': profile.description[:100] if profile.description else ''
-                        })
+        results = room_search_index.search_rooms(query, limit=20)
         
         # Search floors/buildings by name or building name
         if len(results) < 5:
-            floors = Floor.objects.filter(
-                Q(name__icontains=query) | Q(building__icontains=query)
-            ).distinct()[:10]
-            
-            for floor in floors:
-                results.append({
-                    'id': floor.id,
-                    'type': 'floor',
-                    'name': floor.name,
-                    'building': floor.building,
-                    'room_count': floor.rooms.count()
-                })
+            results = results + room_search_index.search_floors(query, limit=10)
         
         return JsonResponse({'results': results})
     
@@ -1599,7 +1301,7 @@ def search_rooms_and_locations(request):
 def get_room_photos(request, room_id):
     """Get all photos for a room. (Public endpoint - no login required)"""
     try:
-        room = get_object_or_404(Room, id=room_id)
+        room = get_object_or_404(Room.objects.select_related('profile', 'floor'), id=room_id)
         
         photos_data = []
         if room.profile and room.profile.images:
@@ -1647,7 +1349,7 @@ def delete_room_photo(request, room_id):
 def get_room_data(request, room_id):
     """Get room data including coordinates, details, and photos. (Public endpoint - no login required)"""
     try:
-        room = get_object_or_404(Room, id=room_id)
+        room = get_object_or_404(Room.objects.select_related('profile', 'floor'), id=room_id)
         
         import json
         coordinates = {}
@@ -1727,71 +1429,59 @@ def delete_roomimage(request, image_id):
 
 
 def get_room_ratings(request, room_id):
-    """Get all ratings for a room. (Public endpoint - no login required)"""
+    """Get the rating summary and latest feedback for a room. (Public endpoint - no login required)
+
+    Feedback comes FEEDBACK_PAGE_SIZE at a time (?limit= up to 50); pass the
+    returned next_cursor as ?cursor= for older feedback, or ?summary=1 to
+    skip the feedback list entirely.
+    """
+    empty_response = {
+        'total_ratings': 0,
+        'average_rating': 0,
+        'feedbacks': [],
+        'user_rating': None,
+        'is_authenticated': request.user.is_authenticated
+    }
     try:
-        try:
-            room = Room.objects.get(id=room_id)
-        except Room.DoesNotExist:
+        if not Room.objects.filter(id=room_id).exists():
             # Return empty ratings instead of 404
-            return JsonResponse({
-                'total_ratings': 0,
-                'average_rating': 0,
-                'feedbacks': [],
-                'user_rating': None,
-                'is_authenticated': request.user.is_authenticated
-            })
-        
-        from .models import Feedback
-        feedbacks = room.feedbacks.all().order_by('-creation_date')
-        
-        # Calculate average rating
-        ratings = feedbacks.filter(rating__isnull=False).values_list('rating', flat=True)
-        average_rating = sum(ratings) / len(ratings) if ratings else 0
-        
-        # Get user's existing rating if authenticated
-        user_rating = None
-        if request.user.is_authenticated:
-            try:
-                user_feedback = feedbacks.filter(user=request.user).first()
-                if user_feedback:
-                    user_rating = {
-                        'id': user_feedback.id,
-                        'rating': user_feedback.rating,
-                        'comment': user_feedback.comment
-                    }
-            except:
-                pass
-        
-        feedbacks_data = [{
-            'id': feedback.id,
-            'rating': feedback.rating,
-            'comment': feedback.comment,
-            'user': feedback.user.display_name() if feedback.user else 'Anonymous',
-            'date': feedback.creation_date.strftime('%Y-%m-%d %H:%M'),
-            'created_at': feedback.creation_date.isoformat(),
-            'updated_at': feedback.updated_at.isoformat(),
-            'user_type': feedback.user.get_type_display() if feedback.user else 'Guest',
-            'profile_picture': feedback.user.profile.profile_pic.url if feedback.user and hasattr(feedback.user, 'profile') and feedback.user.profile.profile_pic else None,
-            'is_own_feedback': request.user.is_authenticated and feedback.user == request.user
-        } for feedback in feedbacks]
-        
-        return JsonResponse({
-            'total_ratings': len(ratings),
-            'average_rating': round(average_rating, 1),
-            'feedbacks': feedbacks_data,
-            'user_rating': user_rating,
-            'is_authenticated': request.user.is_authenticated
-        })
+            return JsonResponse(empty_response)
+
+        from .room_ratings import FEEDBACK_PAGE_SIZE, get_feedback_listing, get_rating_summary
+
+        summary = get_rating_summary(room_id)
+        if request.GET.get('summary') == '1':
+            return JsonResponse(summary)
+
+        try:
+            page_size = int(request.GET.get('limit', FEEDBACK_PAGE_SIZE))
+            listing = get_feedback_listing(room_id, request.user, request.GET.get('cursor'), page_size)
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+        return JsonResponse({**summary, **listing})
     except Exception as e:
         print(f"Error getting ratings: {str(e)}")
         # Return 200 with empty data instead of 500
-        return JsonResponse({
-            'total_ratings': 0,
-            'average_rating': 0,
-            'feedbacks': [],
-            'user_rating': None,
-            'is_authenticated': request.user.is_authenticated
-        })
+        return JsonResponse(empty_response)
+
+
+@require_http_methods(["GET"])
+def get_rooms_ratings(request):
+    """Get rating summaries for several rooms at once: ?ids=1,2,3 (Public endpoint - no login required)"""
+    from .room_batch import parse_room_ids
+    from .room_ratings import get_rating_summaries
+
+    try:
+        room_ids = parse_room_ids(request.GET.get('ids', ''))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    summaries = get_rating_summaries(room_ids)
+    return JsonResponse({
+        'status': 'success',
+        'ratings': {str(room_id): summary for room_id, summary in summaries.items()}
+    })
 
 
 def submit_room_rating(request, room_id):
@@ -1815,8 +1505,6 @@ def submit_room_rating(request, room_id):
         if not rating_value or rating_value < 1 or rating_value > 5:
             return JsonResponse({'error': 'Rating must be between 1 and 5'}, status=400)
         
-        from .models import Feedback
-        
         # One rating per user per room (update if exists)
         feedback, created = Feedback.objects.update_or_create(
             user=request.user,
@@ -1840,25 +1528,17 @@ def submit_room_rating(request, room_id):
 def admin_ratings_view(request):
     """Admin dashboard for managing room ratings"""
     # Get all feedbacks with related room and user info
-    from .models import Feedback
-    
     feedbacks = Feedback.objects.select_related('room', 'room__profile', 'user').order_by('-creation_date')
     
-    # Get unique rooms with their average ratings
-    rooms = Room.objects.filter(feedbacks__isnull=False).distinct()
-    room_stats = []
-    
-    for room in rooms:
-        room_feedbacks = room.feedbacks.all()
-        ratings = room_feedbacks.filter(rating__isnull=False).values_list('rating', flat=True)
-        average_rating = sum(ratings) / len(ratings) if ratings else 0
-        
-        room_stats.append({
-            'room': room,
-            'total_ratings': len(ratings),
-            'average_rating': round(average_rating, 1),
-            'feedback_count': room_feedbacks.count()
-        })
+    # Get unique rooms with their average ratings, from the rating summaries
+    from .models import RoomRatingSummary
+    summaries = RoomRatingSummary.objects.filter(rating_count__gt=0).select_related('room__profile', 'room__floor')
+    room_stats = [{
+        'room': summary.room,
+        'total_ratings': summary.rating_count,
+        'average_rating': round(summary.average_rating, 1),
+        'feedback_count': summary.rating_count
+    } for summary in summaries]
     
     # Pagination
     paginator = Paginator(feedbacks, 20)
@@ -1883,8 +1563,6 @@ def delete_feedback(request, feedback_id):
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
     try:
-        from .models import Feedback
-        
         feedback = Feedback.objects.filter(id=feedback_id).first()
         if not feedback:
             return JsonResponse({'error': 'Feedback not found'}, status=404)
@@ -1916,8 +1594,6 @@ def delete_user_feedback(request, feedback_id):
         return JsonResponse({'status': 'error', 'message': 'Must be logged in'}, status=401)
     
     try:
-        from .models import Feedback
-        
         feedback = Feedback.objects.filter(id=feedback_id).first()
         if not feedback:
             return JsonResponse({'status': 'error', 'message': 'Feedback not found'}, status=404)
@@ -2049,63 +1725,8 @@ def recent_locations_view(request):
         
         # Only query database if user is authenticated
         if request.user.is_authenticated:
-            # Get recent room and floor views for the user (last 10 unique places)
-            recent_activities = UserActivity.objects.filter(
-                user=request.user,
-                activity_type__in=['room_view', 'floor_view']
-            ).select_related('user').order_by('-timestamp')[:50]  # Get more to filter unique
-            
-            # Track unique rooms and floors to avoid duplicates
-            seen_rooms = set()
-            seen_floors = set()
-            
-            for activity in recent_activities:
-                if len(recent_places) >= 10:
-                    break
-                    
-                details = activity.details or {}
-                
-                if activity.activity_type == 'room_view':
-                    room_id = details.get('room_id')
-                    if room_id and room_id not in seen_rooms:
-                        seen_rooms.add(room_id)
-                        try:
-                            room = Room.objects.select_related('floor', 'profile').get(id=room_id)
-                            # Get first image from room profile if available
-                            room_images = room.profile.get_images() if room.profile else []
-                            image_url = room_images[0] if room_images else None
-                            
-                            recent_places.append({
-                                'type': 'room',
-                                'id': room.id,
-                                'name': room.profile.name if room.profile else f'Room {room.id}',
-                                'number': room.profile.number if room.profile else 'N/A',
-                                'building': room.floor.building,
-                                'floor': room.floor.name,
-                                'floor_id': room.floor.id,
-                                'timestamp': activity.timestamp,
-                                'description': room.profile.description if room.profile else '',
-                                'image_url': image_url
-                            })
-                        except Room.DoesNotExist:
-                            pass
-                            
-                elif activity.activity_type == 'floor_view':
-                    floor_id = details.get('floor_id')
-                    if floor_id and floor_id not in seen_floors:
-                        seen_floors.add(floor_id)
-                        try:
-                            floor = Floor.objects.get(id=floor_id)
-                            recent_places.append({
-                                'type': 'floor',
-                                'id': floor.id,
-                                'name': floor.name,
-                                'building': floor.building,
-                                'timestamp': activity.timestamp,
-                                'room_count': floor.rooms.count()
-                            })
-                        except Floor.DoesNotExist:
-                            pass
+            # Last 10 unique rooms/floors from the user's recent places list
+            recent_places = get_recent_places(request.user)
             
             # Organize by building
             for place in recent_places:
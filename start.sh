@@ -0,0 +1,16 @@
+#!/bin/sh
+# Start the background job worker next to gunicorn in the same container.
+# The worker has to share the host with the web processes: uploads live in
+# local media storage and cache version keys in the 'shared' file cache.
+cd "$(dirname "$0")/UMAP" || exit 1
+
+# Restart the worker if it ever exits so queued imports are never stranded
+(
+    while true; do
+        python manage.py run_jobs
+        echo "Job worker exited, restarting in 5 seconds" >&2
+        sleep 5
+    done
+) &
+
+exec gunicorn UMAP.wsgi:application --bind "0.0.0.0:${PORT:-8000}"